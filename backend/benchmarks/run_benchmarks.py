@@ -0,0 +1,225 @@
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.src.ml_engine.behavior_analyzer import BehaviorAnalyzer
+from backend.src.ml_engine.budget_optimizer import BudgetOptimizer
+from backend.src.ml_engine.forecasting import FinancialForecaster
+from backend.src.ml_engine.savings_strategist import SavingsStrategist
+from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer
+from backend.benchmarks.synthetic_data import SyntheticFinanceGenerator
+
+# Scale presets (users, transactions); any other scale can be given with --users/--transactions
+SCALES = {
+    "small": (1_000, 50_000),
+    "medium": (10_000, 250_000),
+    "large": (100_000, 1_000_000),
+}
+# Relative slowdown (current / baseline seconds) reported as a regression by --baseline
+REGRESSION_THRESHOLD = 1.2
+
+def _categorizer_train(data: dict, options: dict) -> int:
+    debits = data['transactions'][data['transactions']['type'] == 'debit']
+    categorizer = TransactionCategorizer(incremental=options['incremental'])
+    categorizer.train(debits[['description', 'category']])
+    data['categorizer'] = categorizer # Reused by the predict benchmark
+    return len(debits)
+
+def _categorizer_predict(data: dict, options: dict) -> int:
+    categorizer = data['categorizer']
+    categorizer.clear_cache()
+    descriptions = data['transactions']['description'].tolist()
+    categorizer.predict_many(descriptions)
+    return len(descriptions)
+
+def _behavior_analyzer(data: dict, options: dict) -> int:
+    debits = data['transactions'][data['transactions']['type'] == 'debit']
+    BehaviorAnalyzer().analyze_spending_patterns(debits, n_clusters=options['n_clusters'])
+    return len(debits)
+
+def _budget_optimizer(data: dict, options: dict) -> int:
+    debits = data['transactions'][data['transactions']['type'] == 'debit']
+    BudgetOptimizer().optimize_budgets(debits, data['budgets'])
+    return len(debits)
+
+def _forecaster_holt(data: dict, options: dict) -> int:
+    FinancialForecaster().fast_forecast_cash_flows(data['transactions'], steps=options['steps'])
+    return len(data['transactions'])
+
+def _forecaster_arima(data: dict, options: dict) -> int:
+    # Per-user ARIMA fits are orders of magnitude slower, so only a fixed sample of users is fitted
+    transactions = data['transactions']
+    users = np.sort(transactions['user_id'].unique())[:options['arima_users']]
+    sample = transactions[transactions['user_id'].isin(users)]
+    FinancialForecaster().forecast_cash_flows(sample, steps=options['steps'], max_workers=options['arima_workers'])
+    return len(sample)
+
+def _savings_strategist(data: dict, options: dict) -> int:
+    transactions = data['transactions']
+    credits = transactions['type'] == 'credit'
+    income = transactions.loc[credits, ['user_id', 'amount']].assign(amount=lambda df: -df['amount'])
+    expenses = transactions.loc[~credits, ['user_id', 'amount']]
+    SavingsStrategist().allocate_savings(income, expenses, data['goals'], as_of=transactions['date'].max())
+    return len(transactions)
+
+COMPONENTS: Dict[str, Callable[[dict, dict], int]] = {
+    "categorizer_train": _categorizer_train,
+    "categorizer_predict": _categorizer_predict,
+    "behavior_analyzer": _behavior_analyzer,
+    "budget_optimizer": _budget_optimizer,
+    "forecaster_holt": _forecaster_holt,
+    "forecaster_arima": _forecaster_arima,
+    "savings_strategist": _savings_strategist,
+}
+
+def measure(fn: Callable[[], int], trace_memory: bool = True) -> dict:
+    """
+    Runs fn once untraced for wall time and throughput (items/s, fn returns the item count), then,
+    if trace_memory, once more under tracemalloc for the peak Python/numpy heap allocated during the
+    call. The runs are separate so tracing overhead never skews the timings.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    items = fn()
+    seconds = time.perf_counter() - start
+    result = {
+        "items": items,
+        "seconds": round(seconds, 4),
+        "throughput_per_s": round(items / seconds, 1) if seconds > 0 else None,
+        "peak_memory_mb": None,
+    }
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_memory_mb"] = round(peak / 2**20, 2)
+    return result
+
+def run_benchmarks(n_users: int, n_transactions: int, seed: int = 42, days: int = 365,
+                   components: Optional[List[str]] = None, trace_memory: bool = True, **options) -> dict:
+    """
+    Generates the synthetic dataset and benchmarks each requested component on it.
+    Returns a JSON-serializable report with the environment, configuration and per-component results.
+    """
+    options = {"incremental": False, "n_clusters": 5, "steps": 30, "arima_users": 50, "arima_workers": 1, **options}
+    components = components or list(COMPONENTS)
+    unknown = set(components) - set(COMPONENTS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark components: {sorted(unknown)}")
+
+    generator = SyntheticFinanceGenerator(n_users=n_users, n_transactions=n_transactions, days=days, seed=seed)
+    data = {}
+
+    def _generate() -> int:
+        data.update(generator.generate())
+        return len(data['transactions'])
+
+    results = {"synthetic_data": measure(_generate, trace_memory)}
+    for name in components:
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        if name == "categorizer_predict" and 'categorizer' not in data:
+            _categorizer_train(data, options) # Untimed setup when training is not benchmarked first
+        results[name] = measure(lambda: COMPONENTS[name](data, options), trace_memory)
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "config": {
+            "n_users": n_users, "n_transactions": n_transactions, "days": days, "seed": seed,
+            "trace_memory": trace_memory, **options,
+        },
+        "dataset": {
+            "transactions": len(data['transactions']),
+            "users": int(data['transactions']['user_id'].nunique()),
+            "budgets": len(data['budgets']),
+            "goals": len(data['goals']),
+        },
+        "results": results,
+    }
+
+def compare(report: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> Dict[str, dict]:
+    """
+    Compares each component's wall time with a baseline report from an earlier commit.
+    Returns {component: {'baseline_seconds', 'seconds', 'ratio', 'regression'}}.
+    """
+    comparison = {}
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("seconds"):
+            continue
+        ratio = result["seconds"] / previous["seconds"]
+        comparison[name] = {
+            "baseline_seconds": previous["seconds"],
+            "seconds": result["seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > threshold,
+        }
+    return comparison
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the ml_engine components on seeded synthetic data.")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--users", type=int, help="Overrides the number of users of --scale")
+    parser.add_argument("--transactions", type=int, help="Overrides the number of transactions of --scale")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--components", nargs="+", choices=list(COMPONENTS))
+    parser.add_argument("--arima-users", type=int, default=50)
+    parser.add_argument("--incremental", action="store_true", help="Benchmark the hashing+SGD categorizer")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass (halves the runtime)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare wall times against")
+    args = parser.parse_args(argv)
+
+    n_users, n_transactions = SCALES[args.scale]
+    report = run_benchmarks(
+        args.users or n_users, args.transactions or n_transactions, seed=args.seed, days=args.days,
+        components=args.components, trace_memory=not args.no_memory,
+        arima_users=args.arima_users, incremental=args.incremental
+    )
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    regressions = [name for name, row in report.get("comparison", {}).items() if row["regression"]]
+    if regressions:
+        print(f"Regressions over {REGRESSION_THRESHOLD}x baseline: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Discretionary merchants per category with the median and spread (lognormal sigma) of a purchase
+MERCHANTS: Dict[str, dict] = {
+    'Groceries': {'median': 65.0, 'sigma': 0.6, 'names': ['WHOLE FOODS MARKET', 'TRADER JOES', 'SAFEWAY', 'KROGER', 'ALDI']},
+    'Dining Out': {'median': 32.0, 'sigma': 0.7, 'names': ['CHIPOTLE', 'OLIVE GARDEN', 'SHAKE SHACK', 'PANERA BREAD', 'LOCAL BISTRO']},
+    'Coffee': {'median': 6.5, 'sigma': 0.4, 'names': ['STARBUCKS', 'DUNKIN', 'PEETS COFFEE', 'BLUE BOTTLE COFFEE']},
+    'Transportation': {'median': 18.0, 'sigma': 0.8, 'names': ['UBER TRIP', 'LYFT RIDE', 'NYC TRANSIT MTA', 'AMTRAK']},
+    'Gas': {'median': 45.0, 'sigma': 0.4, 'names': ['SHELL OIL', 'CHEVRON', 'EXXONMOBIL', 'BP GAS STATION']},
+    'Shopping': {'median': 48.0, 'sigma': 1.0, 'names': ['AMAZON MKTPLACE', 'TARGET', 'WALMART', 'BEST BUY', 'IKEA']},
+    'Health': {'median': 28.0, 'sigma': 0.8, 'names': ['CVS PHARMACY', 'WALGREENS', 'CITY DENTAL CARE']},
+    'Entertainment': {'median': 22.0, 'sigma': 0.7, 'names': ['AMC THEATRES', 'STEAM GAMES', 'TICKETMASTER']},
+    'Cash': {'median': 80.0, 'sigma': 0.5, 'names': ['ATM WITHDRAWAL']},
+}
+# Relative share of discretionary transactions per category (same order as MERCHANTS)
+CATEGORY_WEIGHTS = [0.18, 0.16, 0.14, 0.12, 0.08, 0.16, 0.05, 0.06, 0.05]
+
+# Monthly recurring charges: merchant, category, typical amount
+SUBSCRIPTIONS = [
+    ('NETFLIX.COM', 'Subscriptions', 15.49), ('SPOTIFY USA', 'Subscriptions', 10.99),
+    ('HULU', 'Subscriptions', 7.99), ('APPLE.COM BILL', 'Subscriptions', 2.99),
+    ('PLANET FITNESS', 'Health', 24.99), ('COMCAST XFINITY', 'Utilities', 79.99),
+    ('VERIZON WIRELESS', 'Utilities', 65.00), ('CITY WATER DEPT', 'Utilities', 42.00),
+    ('STATE FARM INSURANCE', 'Insurance', 118.00), ('RENT PAYMENT', 'Housing', 1650.00),
+]
+EMPLOYERS = ['ACME CORP PAYROLL', 'GLOBEX DIRECT DEP', 'INITECH PAYROLL', 'UMBRELLA CO DIR DEP']
+GOAL_NAMES = ['Emergency Fund', 'Vacation', 'New Car', 'Home Down Payment', 'Wedding']
+PRIORITIES = ['high', 'medium', 'low']
+
+DAYS_PER_MONTH = 30.44
+PAY_PERIOD_DAYS = 14
+
+class SyntheticFinanceGenerator:
+    """
+    Seeded generator of realistic-looking financial data for benchmarking the ml_engine components.
+    transactions() produces Plaid-shaped rows (debits positive, credits negative) made of biweekly
+    payroll income, monthly recurring charges and lognormally sized discretionary purchases whose
+    per-user activity is skewed (a few heavy users, many light ones). Descriptions carry store numbers
+    and cities so the categorizer sees the same noise as real feeds. Everything is generated with
+    vectorized numpy ops, so 1M transactions take seconds; the same seed always yields the same data.
+    """
+    def __init__(self, n_users: int = 1_000, n_transactions: int = 100_000, days: int = 365, seed: int = 42,
+                 income_share: float = 0.08, recurring_share: float = 0.12, start: Optional[datetime] = None):
+        self.n_users = n_users
+        self.n_transactions = n_transactions
+        self.days = days
+        self.seed = seed
+        self.income_share = income_share # Target share of payroll credits among all rows
+        self.recurring_share = recurring_share # Target share of recurring charges among all rows
+        self.start = pd.Timestamp(start or datetime(2024, 1, 1), tz='UTC')
+
+    def generate(self) -> Dict[str, pd.DataFrame]:
+        """
+        Returns {'transactions', 'budgets', 'goals'} generated from one seeded stream.
+        """
+        rng = np.random.default_rng(self.seed)
+        transactions = self.transactions(rng)
+        return {
+            'transactions': transactions,
+            'budgets': self.budgets(rng, transactions),
+            'goals': self.goals(rng),
+        }
+
+    def transactions(self, rng: np.random.Generator) -> pd.DataFrame:
+        """
+        Transactions with 'id', 'user_id', 'account_id', 'description', 'amount', 'date', 'category'
+        and 'type' ('debit'/'credit'), sorted by date.
+        """
+        income = self._income(rng)
+        recurring = self._recurring(rng)
+        discretionary = self._discretionary(rng, max(self.n_transactions - len(income) - len(recurring), 0))
+        df = pd.concat([income, recurring, discretionary], ignore_index=True)
+        df = df.sort_values('date', kind='stable').reset_index(drop=True)
+        df.insert(0, 'id', np.arange(1, len(df) + 1))
+        df.insert(2, 'account_id', df['user_id']) # One linked account per user
+        df['type'] = np.where(df['amount'] > 0, 'debit', 'credit')
+        return df
+
+    def budgets(self, rng: np.random.Generator, transactions: pd.DataFrame, per_user: int = 3) -> pd.DataFrame:
+        """
+        Monthly budget limits ('user_id', 'category', 'amount') for up to `per_user` of each user's
+        spending categories, set around their actual average spend so all optimizer branches fire.
+        """
+        debits = transactions[transactions['type'] == 'debit']
+        avg_spend = debits.groupby(['user_id', 'category'])['amount'].mean().reset_index()
+        avg_spend['rank'] = rng.random(len(avg_spend))
+        avg_spend = avg_spend[avg_spend.groupby('user_id')['rank'].rank(method='first') <= per_user]
+        limits = avg_spend['amount'].to_numpy() * rng.uniform(0.7, 1.4, len(avg_spend))
+        return pd.DataFrame({
+            'user_id': avg_spend['user_id'].to_numpy(),
+            'category': avg_spend['category'].to_numpy(),
+            'amount': np.round(limits, 2),
+        })
+
+    def goals(self, rng: np.random.Generator, max_per_user: int = 3) -> pd.DataFrame:
+        """
+        Savings goals with 'user_id', 'name', 'target_amount', 'current_amount', 'target_date' and
+        'priority'; roughly a fifth of them have no deadline.
+        """
+        user_ids = np.repeat(np.arange(1, self.n_users + 1), rng.integers(0, max_per_user + 1, self.n_users))
+        n = len(user_ids)
+        target = np.round(rng.lognormal(np.log(5_000), 0.9, n), 2)
+        deadline_days = rng.integers(30, 5 * 365, n)
+        target_date = pd.Series(self.start + pd.Timedelta(days=self.days) + pd.to_timedelta(deadline_days, unit='D'))
+        target_date[rng.random(n) < 0.2] = pd.NaT
+        return pd.DataFrame({
+            'user_id': user_ids,
+            'name': rng.choice(GOAL_NAMES, n),
+            'target_amount': target,
+            'current_amount': np.round(target * rng.uniform(0.0, 0.9, n), 2),
+            'target_date': target_date,
+            'priority': rng.choice(PRIORITIES, n, p=[0.3, 0.5, 0.2]),
+        })
+
+    def _income(self, rng: np.random.Generator) -> pd.DataFrame:
+        periods = max(self.days // PAY_PERIOD_DAYS, 1)
+        n_streams = min(self.n_users, int(self.n_transactions * self.income_share) // periods)
+        user_ids = rng.choice(np.arange(1, self.n_users + 1), n_streams, replace=False)
+        salary = rng.lognormal(np.log(2_400), 0.45, n_streams)
+        offsets = rng.integers(0, PAY_PERIOD_DAYS, n_streams)
+        employer = rng.choice(EMPLOYERS, n_streams)
+        period = np.arange(periods)
+        days = offsets[:, None] + period[None, :] * PAY_PERIOD_DAYS
+        return self._stream_rows(
+            np.repeat(user_ids, periods), np.repeat(employer, periods), np.full(n_streams * periods, 'Income'),
+            -np.repeat(salary, periods), days.ravel(), hour=9
+        )
+
+    def _recurring(self, rng: np.random.Generator) -> pd.DataFrame:
+        months = max(int(self.days / DAYS_PER_MONTH), 1)
+        n_streams = int(self.n_transactions * self.recurring_share) // months
+        user_ids = rng.integers(1, self.n_users + 1, n_streams)
+        which = rng.integers(0, len(SUBSCRIPTIONS), n_streams)
+        merchants = np.array([s[0] for s in SUBSCRIPTIONS])[which]
+        categories = np.array([s[1] for s in SUBSCRIPTIONS])[which]
+        # Each stream has its own price (plans, regional pricing) with a little month-to-month noise
+        base = np.array([s[2] for s in SUBSCRIPTIONS])[which] * rng.uniform(0.8, 1.2, n_streams)
+        amounts = np.repeat(base, months) * rng.normal(1.0, 0.02, n_streams * months)
+        offsets = rng.integers(0, 28, n_streams)
+        days = offsets[:, None] + np.round(np.arange(months)[None, :] * DAYS_PER_MONTH).astype(int)
+        return self._stream_rows(
+            np.repeat(user_ids, months), np.repeat(merchants, months), np.repeat(categories, months),
+            amounts, days.ravel(), hour=6
+        )
+
+    def _discretionary(self, rng: np.random.Generator, n: int) -> pd.DataFrame:
+        categories = np.array(list(MERCHANTS))
+        # Skewed activity: lognormal per-user weights give a long tail of heavy spenders
+        activity = rng.lognormal(0.0, 1.0, self.n_users)
+        user_ids = rng.choice(np.arange(1, self.n_users + 1), n, p=activity / activity.sum())
+        category_idx = rng.choice(len(categories), n, p=np.asarray(CATEGORY_WEIGHTS) / sum(CATEGORY_WEIGHTS))
+
+        medians = np.array([MERCHANTS[c]['median'] for c in categories])
+        sigmas = np.array([MERCHANTS[c]['sigma'] for c in categories])
+        amounts = rng.lognormal(np.log(medians[category_idx]), sigmas[category_idx])
+
+        # Flatten the merchant catalog so a (category, merchant) pick is one integer lookup
+        names: List[str] = []
+        first = np.zeros(len(categories), dtype=int)
+        sizes = np.zeros(len(categories), dtype=int)
+        for i, category in enumerate(categories):
+            first[i], sizes[i] = len(names), len(MERCHANTS[category]['names'])
+            names.extend(MERCHANTS[category]['names'])
+        merchant_idx = first[category_idx] + (rng.random(n) * sizes[category_idx]).astype(int)
+        store_numbers = rng.integers(1, 9999, n).astype(str)
+        cities = rng.choice(['NEW YORK NY', 'SAN FRANCISCO CA', 'AUSTIN TX', 'CHICAGO IL', 'SEATTLE WA'], n)
+        descriptions = np.char.add(np.char.add(np.char.add(np.array(names)[merchant_idx], ' #'), store_numbers), np.char.add(' ', cities))
+
+        seconds = rng.integers(0, self.days * 86_400, n)
+        return pd.DataFrame({
+            'user_id': user_ids,
+            'description': descriptions,
+            'amount': np.round(amounts, 2),
+            'date': self.start + pd.to_timedelta(seconds, unit='s'),
+            'category': categories[category_idx],
+        })
+
+    def _stream_rows(self, user_ids, descriptions, categories, amounts, days, hour: int) -> pd.DataFrame:
+        keep = days < self.days
+        return pd.DataFrame({
+            'user_id': user_ids[keep],
+            'description': descriptions[keep],
+            'amount': np.round(amounts[keep], 2),
+            'date': self.start + pd.to_timedelta(days[keep] * 24 + hour, unit='h'),
+            'category': categories[keep],
+        })
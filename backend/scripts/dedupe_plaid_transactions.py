@@ -0,0 +1,16 @@
+import asyncio
+from backend.src.db.migrations import ensure_plaid_transaction_unique_index
+from backend.src.db.session import async_session_factory
+
+async def run_dedupe():
+    """
+    Script to deduplicate transactions by plaid_transaction_id and create the unique index that
+    Plaid ingestion upserts on (INSERT ... ON CONFLICT). Safe to re-run; the API also applies it on startup.
+    """
+    print("Checking transactions.plaid_transaction_id for a unique index...")
+    async with async_session_factory() as session:
+        deleted = await ensure_plaid_transaction_unique_index(session)
+    print(f"Unique index in place; removed {deleted} duplicate transactions.")
+
+if __name__ == "__main__":
+    asyncio.run(run_dedupe())
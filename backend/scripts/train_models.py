@@ -1,22 +1,49 @@
 import pandas as pd
-import os
-from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer
+from backend.src.core.config import settings
+from backend.src.ml_engine.model_registry import ModelRegistry
+from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer, CATEGORIZER_MODEL_NAME
+from backend.src.services.snapshot_service import read_transaction_snapshot, snapshot_exists
 # Import other ML models as needed
 
 def run_training():
     """
     Script to train all necessary ML models for the FinGenius AI backend.
-    In a real scenario, this would load data from a database or data lake.
+    Training data comes from the Parquet transaction snapshot in settings.SNAPSHOT_DIR
+    (written by export_transaction_snapshot_task); dummy data is used when no snapshot exists.
     """
     print("Starting ML model training process...")
 
-    # Ensure a 'models' directory exists for saving models
-    model_dir = "./backend/models"
-    os.makedirs(model_dir, exist_ok=True)
+    # Versioned artifacts go to the model registry that the API and workers load from
+    registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
 
     # --- Transaction Categorizer ---
     print("Training Transaction Categorizer...")
-    # Dummy data for demonstration. Replace with actual data loading.
+    if snapshot_exists(settings.SNAPSHOT_DIR):
+        # Column pruning: only the two training columns are decoded from the snapshot. Only Plaid and user
+        # labels are used, never the categorizer's own predictions or the Uncategorized placeholder
+        transactions_df = read_transaction_snapshot(settings.SNAPSHOT_DIR, ['description', 'category'], labeled_only=True, trusted_only=True)
+    else:
+        transactions_df = dummy_transactions()
+    categorizer = TransactionCategorizer()
+    categorizer.train(transactions_df)
+    version = registry.register(CATEGORIZER_MODEL_NAME, *categorizer.to_artifacts())
+    print(f"Transaction Categorizer trained on {len(transactions_df)} transactions and saved as version {version}.")
+
+    # --- Other models would follow similar pattern ---
+    # Example for BehaviorAnalyzer (needs more complex data setup):
+    # print("Training Behavior Analyzer...")
+    # behavior_data = pd.DataFrame({ ... })
+    # analyzer = BehaviorAnalyzer()
+    # analyzer.train_model(behavior_data)
+    # registry.register("behavior_analyzer", {"scaler": analyzer.scaler, "kmeans": analyzer.kmeans_model})
+    # print("Behavior Analyzer trained and saved.")
+
+    print("All ML models training completed successfully.")
+
+def dummy_transactions() -> pd.DataFrame:
+    """
+    Dummy data for demonstration when no snapshot has been exported yet.
+    """
     transaction_data = {
         'description': [
             'STARBUCKS COFFEE', 'WHOLE FOODS MARKET', 'AMAZON.COM',
@@ -33,22 +60,7 @@ def run_training():
             'Shopping', 'Health', 'Dining Out'
         ]
     }
-    transactions_df = pd.DataFrame(transaction_data)
-    categorizer = TransactionCategorizer()
-    categorizer.train(transactions_df)
-    categorizer.save_model(os.path.join(model_dir, "transaction_categorizer"))
-    print("Transaction Categorizer trained and saved.")
-
-    # --- Other models would follow similar pattern ---
-    # Example for BehaviorAnalyzer (needs more complex data setup):
-    # print("Training Behavior Analyzer...")
-    # behavior_data = pd.DataFrame({ ... })
-    # analyzer = BehaviorAnalyzer()
-    # analyzer.train_model(behavior_data)
-    # analyzer.save_model(os.path.join(model_dir, "behavior_analyzer"))
-    # print("Behavior Analyzer trained and saved.")
-
-    print("All ML models training completed successfully.")
+    return pd.DataFrame(transaction_data)
 
 if __name__ == "__main__":
     run_training()
\ No newline at end of file
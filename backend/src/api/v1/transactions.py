@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends
 from typing import List, Annotated
 from ...core.security import get_current_user
+from ...core.dependencies import get_inference_executor
+from ...services.inference_executor import InferenceExecutor
 from ...models.financial import TransactionRead, TransactionCreate
 
 router = APIRouter()
@@ -12,7 +14,10 @@ async def get_transactions(current_user: Annotated[dict, Depends(get_current_use
     return []
 
 @router.post("/", response_model=TransactionRead)
-async def create_transaction(transaction: TransactionCreate, current_user: Annotated[dict, Depends(get_current_user)]):
+async def create_transaction(transaction: TransactionCreate, current_user: Annotated[dict, Depends(get_current_user)],
+                             inference_executor: Annotated[InferenceExecutor, Depends(get_inference_executor)]):
     """Manually add a transaction."""
+    # Categorized in the inference worker pool; concurrent requests share one batched predict
+    category = transaction.category or await inference_executor.categorize(transaction.description)
     # Logic to save transaction to DB
-    return TransactionRead(id=1, description=transaction.description, amount=transaction.amount, date="2023-01-01", type="expense", category="Uncategorized", account_id=transaction.account_id)
\ No newline at end of file
+    return TransactionRead(id=1, description=transaction.description, amount=transaction.amount, date="2023-01-01", type="expense", category=category, account_id=transaction.account_id)
\ No newline at end of file
@@ -19,11 +19,31 @@ class Settings(BaseSettings):
     PLAID_ENV: str = "sandbox" # sandbox, development, production
     PLAID_PRODUCTS: str = "transactions,investments,auth,identity"
     PLAID_COUNTRY_CODES: str = "US"
+    PLAID_HOST: str = "" # Overrides the PLAID_ENV base URL (e.g. a local fake Plaid server)
+    PLAID_SYNC_PAGE_SIZE: int = 500 # Transactions per /transactions/sync page (Plaid maximum: 500)
+    PLAID_POOL_SIZE: int = 8 # Keep-alive connections (and threads) of the shared Plaid client
+    PLAID_SYNC_CONCURRENCY: int = 4 # Items of one user fetched from Plaid at the same time
+    PLAID_SYNC_ITEM_TIMEOUT_SECONDS: float = 60.0
+
+    # Rows per INSERT ... ON CONFLICT statement when ingesting Plaid transactions
+    INGESTION_BATCH_SIZE: int = 1000
 
     # Celery
     CELERY_BROKER_URL: str = "redis://redis:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/2"
 
+    # ML model registry (versioned artifacts, defaults to backend/models)
+    MODEL_REGISTRY_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models")
+    MODEL_REFRESH_INTERVAL_SECONDS: float = 60.0
+
+    # Process-pool ML inference for the API (see services/inference_executor.py)
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_BATCH_WINDOW_MS: float = 5.0
+    INFERENCE_MAX_BATCH_SIZE: int = 256
+
+    # Month-partitioned Parquet snapshots of transactions used for training (defaults to backend/snapshots)
+    SNAPSHOT_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "snapshots")
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
\ No newline at end of file
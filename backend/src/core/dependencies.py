@@ -1,7 +1,7 @@
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..db.session import async_session_factory
-from fastapi import Depends
+from fastapi import Depends, Request
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency that provides an async database session."""
@@ -11,12 +11,28 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
 # Example for services:
 from ..services.user_service import UserService
 from ..services.account_service import AccountService
+from ..services.inference_executor import InferenceExecutor
+from ..services.plaid_client import PlaidClient
+from ..services.plaid_webhook_handler import PlaidWebhookHandler
 # ... other services
 
 def get_user_service(session: AsyncSession = Depends(get_db_session)) -> UserService:
     return UserService(session)
 
-def get_account_service(session: AsyncSession = Depends(get_db_session)) -> AccountService:
-    return AccountService(session)
+def get_inference_executor(request: Request) -> InferenceExecutor:
+    """Dependency that returns the app-wide process-pool inference executor created in the lifespan hook."""
+    return request.app.state.inference_executor
+
+def get_plaid_client(request: Request) -> PlaidClient:
+    """Dependency that returns the app-wide pooled Plaid client created in the lifespan hook."""
+    return request.app.state.plaid_client
+
+def get_account_service(session: AsyncSession = Depends(get_db_session),
+                        plaid_client: PlaidClient = Depends(get_plaid_client)) -> AccountService:
+    return AccountService(session, plaid_client)
+
+def get_plaid_webhook_handler(session: AsyncSession = Depends(get_db_session),
+                              plaid_client: PlaidClient = Depends(get_plaid_client)) -> PlaidWebhookHandler:
+    return PlaidWebhookHandler(session, plaid_client)
 
 # ... other get_service functions
\ No newline at end of file
@@ -0,0 +1,31 @@
+import importlib
+import sys
+from types import ModuleType
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a heavy module (pandas, scikit-learn, ...) that performs the real import on first
+    attribute access. Lets ML modules keep their `pd.` / `np.` call style while processes that never
+    touch them (API, notification and sync workers) don't pay the import cost.
+    """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns a LazyModule for `name`, or the module itself if it is already imported.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
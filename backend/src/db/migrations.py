@@ -0,0 +1,83 @@
+from sqlalchemy import select, delete, func, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models.transaction import Transaction
+
+PLAID_TRANSACTION_INDEX = "ix_transactions_plaid_transaction_id"
+
+def _plaid_index_is_unique(sync_session) -> bool:
+    indexes = inspect(sync_session.connection()).get_indexes(Transaction.__tablename__)
+    return any(index["name"] == PLAID_TRANSACTION_INDEX and index["unique"] for index in indexes)
+
+def _missing_transaction_columns(sync_session) -> list:
+    existing = {column["name"] for column in inspect(sync_session.connection()).get_columns(Transaction.__tablename__)}
+    return [column for column in Transaction.__table__.columns if column.name not in existing]
+
+def _recreate_plaid_index(sync_session):
+    # Replaces the plain index older schemas created under the same name with the model's unique one
+    connection = sync_session.connection()
+    index = next(index for index in Transaction.__table__.indexes if index.name == PLAID_TRANSACTION_INDEX)
+    if any(existing["name"] == PLAID_TRANSACTION_INDEX for existing in inspect(connection).get_indexes(Transaction.__tablename__)):
+        index.drop(connection)
+    index.create(connection)
+
+async def dedupe_plaid_transactions(db_session: AsyncSession) -> int:
+    """
+    Deletes duplicate rows sharing a plaid_transaction_id, keeping the most recently inserted one
+    (the latest version Plaid delivered), and rebuilds the daily rollup of the affected users.
+    Does not commit; returns the number of rows deleted.
+    """
+    from ..services.rollup_service import RollupService
+
+    latest = (
+        select(func.max(Transaction.id))
+        .where(Transaction.plaid_transaction_id.is_not(None))
+        .group_by(Transaction.plaid_transaction_id)
+    )
+    duplicates = (
+        Transaction.plaid_transaction_id.is_not(None),
+        Transaction.id.not_in(latest),
+    )
+    user_ids = (await db_session.execute(select(Transaction.user_id).where(*duplicates).distinct())).scalars().all()
+    if not user_ids:
+        return 0
+    result = await db_session.execute(delete(Transaction).where(*duplicates))
+    await RollupService(db_session).rebuild(user_ids)
+    return result.rowcount
+
+async def ensure_plaid_transaction_unique_index(db_session: AsyncSession) -> int:
+    """
+    Makes transactions.plaid_transaction_id unique on databases created before ingestion started
+    upserting on it (create_all never alters existing tables): removes duplicates, then swaps the
+    plain index for a unique one. Idempotent, and a no-op once the unique index exists.
+    Commits; returns the number of duplicate rows deleted.
+    """
+    if await db_session.run_sync(_plaid_index_is_unique):
+        return 0
+    deleted = await dedupe_plaid_transactions(db_session)
+    await db_session.run_sync(_recreate_plaid_index)
+    await db_session.commit()
+    return deleted
+
+async def add_missing_transaction_columns(db_session: AsyncSession) -> list:
+    """
+    Adds nullable columns introduced after the transactions table was created (e.g. category_source),
+    which create_all does not do for existing tables. Idempotent; commits and returns the added names.
+    """
+    missing = await db_session.run_sync(_missing_transaction_columns)
+    for column in missing:
+        column_type = column.type.compile(dialect=db_session.bind.dialect)
+        await db_session.execute(text(f"ALTER TABLE {Transaction.__tablename__} ADD COLUMN {column.name} {column_type}"))
+    await db_session.commit()
+    return [column.name for column in missing]
+
+async def upgrade_schema(db_session: AsyncSession):
+    """
+    Brings tables created by older versions up to the current models; run on startup after create_all.
+    """
+    added = await add_missing_transaction_columns(db_session)
+    if added:
+        print(f"Added transactions columns: {', '.join(added)}.")
+    deleted = await ensure_plaid_transaction_unique_index(db_session)
+    if deleted:
+        print(f"Removed {deleted} duplicate Plaid transactions before creating the unique index.")
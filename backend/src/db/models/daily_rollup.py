@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..session import Base
+
+class DailyUserCategoryRollup(Base):
+    __tablename__ = "daily_user_category_rollup"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)
+    type = Column(String, primary_key=True) # 'debit', 'credit'
+    amount_total = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DailyUserCategoryRollup(user_id={self.user_id}, day={self.day}, category='{self.category}', type='{self.type}')>"
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from ..session import Base
+
+class ForecasterState(Base):
+    __tablename__ = "forecaster_states"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    state = Column(JSON, nullable=False) # Order, estimated params and trailing daily history
+    last_observation_date = Column(DateTime(timezone=True), nullable=False) # Last day folded into the fit
+    last_full_fit_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ForecasterState(user_id={self.user_id}, last_observation_date={self.last_observation_date})>"
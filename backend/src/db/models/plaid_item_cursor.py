@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..session import Base
+
+class PlaidItemCursor(Base):
+    __tablename__ = "plaid_item_cursors"
+    plaid_item_id = Column(String, primary_key=True) # Item ID from Plaid; one cursor per item
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    cursor = Column(String, nullable=True) # next_cursor of the last applied /transactions/sync page
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<PlaidItemCursor(plaid_item_id='{self.plaid_item_id}', user_id={self.user_id})>"
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from ..session import Base
+
+class RecurringChargeState(Base):
+    __tablename__ = "recurring_charge_states"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    merchant = Column(String, primary_key=True) # Normalized merchant key
+    state = Column(JSON, nullable=False) # RecurringDetector state: counts, interval and amount stats
+    is_recurring = Column(Boolean, default=False, index=True)
+    next_expected_date = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<RecurringChargeState(user_id={self.user_id}, merchant='{self.merchant}', is_recurring={self.is_recurring})>"
@@ -3,16 +3,24 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..session import Base
 
+# Where a transaction's category came from. Model predictions are not trusted as labels (e.g. for the
+# merchant index), so a model's mistakes are never fed back into what it learns from.
+CATEGORY_SOURCE_PLAID = "plaid"
+CATEGORY_SOURCE_USER = "user"
+CATEGORY_SOURCE_MODEL = "model"
+TRUSTED_CATEGORY_SOURCES = (CATEGORY_SOURCE_PLAID, CATEGORY_SOURCE_USER)
+
 class Transaction(Base):
     __tablename__ = "transactions"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
-    plaid_transaction_id = Column(String, index=True, nullable=True) # Optional, for Plaid transactions
+    plaid_transaction_id = Column(String, unique=True, index=True, nullable=True) # Optional, for Plaid transactions; ingestion upserts on it
     description = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     date = Column(DateTime(timezone=True), nullable=False)
     category = Column(String, nullable=True)
+    category_source = Column(String, nullable=True) # CATEGORY_SOURCE_*; NULL for rows stored before sources were tracked
     type = Column(String, nullable=False) # 'debit', 'credit'
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..session import Base
+
+class UserSegment(Base):
+    __tablename__ = "user_segments"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    segment = Column(Integer, nullable=False)
+    model_version = Column(String, nullable=True) # Registry version of the segmentation model
+    assigned_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserSegment(user_id={self.user_id}, segment={self.segment})>"
@@ -16,4 +16,8 @@ Base = declarative_base()
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all) # Use with caution for development
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+    # create_all skips existing tables, so schema changes ingestion relies on are applied here
+    from .migrations import upgrade_schema
+    async with async_session_factory() as session:
+        await upgrade_schema(session)
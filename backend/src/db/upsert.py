@@ -0,0 +1,44 @@
+from typing import List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+
+def dialect_insert(session: AsyncSession, table):
+    """
+    Returns an INSERT construct supporting ON CONFLICT for the session's dialect
+    (PostgreSQL in production, SQLite in tests).
+    """
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+async def upsert_rows(session: AsyncSession, table, rows: List[dict], index_elements: Sequence[str],
+                      update_columns: Sequence[str], batch_size: int = 1000, extra_set: Optional[dict] = None) -> int:
+    """
+    Bulk INSERT ... ON CONFLICT (index_elements) DO UPDATE in batches of `batch_size` rows.
+    extra_set adds SQL expressions to the update (e.g. {'updated_at': func.now()}, which the
+    ORM's onupdate does not apply to ON CONFLICT updates).
+    Does not commit; returns the number of rows written.
+    """
+    for start in range(0, len(rows), batch_size):
+        stmt = dialect_insert(session, table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_={**{column: stmt.excluded[column] for column in update_columns}, **(extra_set or {})}
+        )
+        await session.execute(stmt, rows[start:start + batch_size])
+    return len(rows)
+
+async def accumulate_rows(session: AsyncSession, table, rows: List[dict], index_elements: Sequence[str],
+                          sum_columns: Sequence[str], batch_size: int = 1000) -> int:
+    """
+    Bulk INSERT ... ON CONFLICT (index_elements) DO UPDATE SET col = col + excluded.col, so counters
+    and totals are incremented atomically in the database. Does not commit; returns the number of rows written.
+    """
+    for start in range(0, len(rows), batch_size):
+        stmt = dialect_insert(session, table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_={column: table.c[column] + stmt.excluded[column] for column in sum_columns}
+        )
+        await session.execute(stmt, rows[start:start + batch_size])
+    return len(rows)
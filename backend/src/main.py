@@ -5,15 +5,28 @@ from contextlib import asynccontextmanager
 from .api.v1 import api_router
 from .core.config import settings
 from .db.session import init_db
+from .services.inference_executor import InferenceExecutor
+from .services.plaid_client import PlaidClient
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup event
     print("Starting up FinGenius AI backend...")
     await init_db() # Initialize DB tables if they don't exist
+    # Model inference runs in pre-warmed worker processes, off the event loop
+    app.state.inference_executor = InferenceExecutor(
+        max_workers=settings.INFERENCE_WORKERS,
+        batch_window=settings.INFERENCE_BATCH_WINDOW_MS / 1000,
+        max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE
+    )
+    await app.state.inference_executor.start()
+    # One pooled, keep-alive Plaid client shared by all requests
+    app.state.plaid_client = PlaidClient(pool_size=settings.PLAID_POOL_SIZE)
     yield
     # Shutdown event
     print("Shutting down FinGenius AI backend...")
+    await app.state.inference_executor.shutdown()
+    app.state.plaid_client.close()
 
 app = FastAPI(
     title="FinGenius AI API",
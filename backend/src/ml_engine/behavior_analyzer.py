@@ -1,11 +1,21 @@
-import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from ..core.lazy_imports import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+BEHAVIOR_SEGMENTS_MODEL_NAME = "behavior_segments"
 
 class BehaviorAnalyzer:
     def __init__(self):
+        from sklearn.preprocessing import StandardScaler
         self.scaler = StandardScaler()
         self.kmeans_model = None
+        # Fixed category feature set of the population model, in column order
+        self.feature_names: Optional[List[str]] = None
+        self._pending_vectors: List[np.ndarray] = []
 
     def analyze_spending_patterns(self, transactions_df: pd.DataFrame, n_clusters: int = 3):
         """
@@ -19,10 +29,13 @@ class BehaviorAnalyzer:
         # Example: Aggregate spending by category per user
         spending_pivot = transactions_df.groupby(['user_id', 'category'])['amount'].sum().unstack(fill_value=0)
         
+        self.feature_names = list(spending_pivot.columns)
+
         # Normalize data
-        scaled_data = self.scaler.fit_transform(spending_pivot)
+        scaled_data = self.scaler.fit_transform(spending_pivot.to_numpy())
 
         # Apply KMeans clustering
+        from sklearn.cluster import KMeans
         self.kmeans_model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
         clusters = self.kmeans_model.fit_predict(scaled_data)
         
@@ -36,15 +49,100 @@ class BehaviorAnalyzer:
         """
         Identifies the segment for a single user.
         """
+        if 'user_id' not in user_transactions_df:
+            user_transactions_df = user_transactions_df.assign(user_id=0)
+        segments = self.assign_segments(user_transactions_df)
+        if not segments:
+            raise ValueError("No transactions provided for segment assignment.")
+        return next(iter(segments.values()))
+
+    def assign_segments(self, transactions_df: pd.DataFrame) -> Dict[int, int]:
+        """
+        Assigns segments for many users at once.
+        transactions_df is long-format with 'user_id', 'category', 'amount'; it is pivoted once,
+        reindexed to the trained feature set, then scaled and predicted as one matrix.
+        Returns {user_id: segment}.
+        """
         if self.kmeans_model is None:
-            raise ValueError("Model not trained. Call analyze_spending_patterns() first.")
-        
-        user_spending = user_transactions_df.groupby('category')['amount'].sum().unstack(fill_value=0)
-        # Ensure consistent columns with training data (add missing categories with 0)
-        # This is a simplification; in production, you'd handle unseen categories more robustly.
-        all_categories = self.scaler.feature_names_in_ # Assuming StandardScaler remembers features
-        user_spending = user_spending.reindex(columns=all_categories, fill_value=0)
-
-        scaled_user_data = self.scaler.transform(user_spending)
-        user_cluster = self.kmeans_model.predict(scaled_user_data)[0]
-        return user_cluster
\ No newline at end of file
+            raise ValueError("Model not trained. Call analyze_spending_patterns() or run a population fit first.")
+        if transactions_df.empty:
+            return {}
+
+        spend_vectors = self.pivot_spend_vectors(transactions_df)
+        segments = self.kmeans_model.predict(self.scaler.transform(spend_vectors.to_numpy()))
+        return dict(zip(spend_vectors.index.tolist(), segments.tolist()))
+
+    def pivot_spend_vectors(self, transactions_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pivots long-format ('user_id', 'category', 'amount') rows into one spend vector per user,
+        reindexed to the population feature set (unknown categories dropped, missing ones 0).
+        """
+        if self.feature_names is None:
+            raise ValueError("Feature set not defined. Train the model or call start_population_fit() first.")
+        pivot = transactions_df.groupby(['user_id', 'category'])['amount'].sum().unstack(fill_value=0)
+        return pivot.reindex(columns=self.feature_names, fill_value=0).astype(float)
+
+    def start_population_fit(self, categories: List[str], n_clusters: int = 5, batch_size: int = 1024):
+        """
+        Resets the analyzer for a streamed population fit over the given category feature set.
+        The fit runs in two passes over the same stream of chunks: update_population_scaler() on
+        every chunk, then update_population_segments() on every chunk.
+        """
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.preprocessing import StandardScaler
+        self.feature_names = sorted(categories)
+        self.scaler = StandardScaler()
+        self.kmeans_model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=42, n_init=3)
+        self._pending_vectors = []
+
+    def update_population_scaler(self, transactions_df: pd.DataFrame):
+        """
+        First pass: accumulates mean/variance of per-user spend vectors from one chunk of users.
+        """
+        if not transactions_df.empty:
+            self.scaler.partial_fit(self.pivot_spend_vectors(transactions_df).to_numpy())
+
+    def update_population_segments(self, transactions_df: pd.DataFrame):
+        """
+        Second pass: incrementally updates the MiniBatchKMeans centroids with one chunk of users.
+        Chunks are buffered until there are at least n_clusters users for the initial fit.
+        """
+        if transactions_df.empty:
+            return
+        scaled = self.scaler.transform(self.pivot_spend_vectors(transactions_df).to_numpy())
+        if not hasattr(self.kmeans_model, 'cluster_centers_'):
+            self._pending_vectors.append(scaled)
+            scaled = np.vstack(self._pending_vectors)
+            if len(scaled) < self.kmeans_model.n_clusters:
+                return
+            self._pending_vectors = []
+        self.kmeans_model.partial_fit(scaled)
+
+    def finish_population_fit(self):
+        """
+        Flushes users still buffered at the end of the stream.
+        """
+        if self._pending_vectors:
+            pending = np.vstack(self._pending_vectors)
+            self._pending_vectors = []
+            if len(pending) < self.kmeans_model.n_clusters:
+                raise ValueError(f"Not enough users ({len(pending)}) for {self.kmeans_model.n_clusters} segments.")
+            self.kmeans_model.partial_fit(pending)
+        if not hasattr(self.kmeans_model, 'cluster_centers_'):
+            raise ValueError("No user spend vectors were provided for the population fit.")
+
+    def to_artifacts(self) -> Tuple[dict, dict]:
+        """
+        Returns (artifacts, metadata) for ModelRegistry.register.
+        """
+        artifacts = {"scaler": self.scaler, "kmeans": self.kmeans_model}
+        metadata = {"feature_names": self.feature_names, "n_clusters": int(self.kmeans_model.n_clusters)}
+        return artifacts, metadata
+
+    @classmethod
+    def from_artifacts(cls, artifacts: dict, metadata: dict) -> "BehaviorAnalyzer":
+        analyzer = cls()
+        analyzer.scaler = artifacts["scaler"]
+        analyzer.kmeans_model = artifacts["kmeans"]
+        analyzer.feature_names = metadata["feature_names"]
+        return analyzer
@@ -1,8 +1,17 @@
-import pandas as pd
-from sklearn.linear_model import LinearRegression
+from __future__ import annotations
+
+from typing import Dict
+
+from ..core.lazy_imports import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+OVERSPEND_RATIO = 1.1 # Overspent by more than 10%
+UNDERSPEND_RATIO = 0.8 # Underspent by more than 20%
 
 class BudgetOptimizer:
     def __init__(self):
+        from sklearn.linear_model import LinearRegression
         self.model = LinearRegression()
 
     def optimize_budget(self, user_id: int, current_budget_data: dict, spending_history_df: pd.DataFrame) -> dict:
@@ -13,33 +22,83 @@ class BudgetOptimizer:
         spending_history_df: pd.DataFrame with 'user_id', 'category', 'amount', 'date'
         """
         print(f"Optimizing budget for user {user_id}...")
-        
+
         # Filter for the specific user's spending history
         user_spending = spending_history_df[spending_history_df['user_id'] == user_id]
 
         if user_spending.empty:
             return {"message": "No spending history for optimization", "suggestions": current_budget_data}
 
+        budgets_df = pd.DataFrame({
+            'user_id': user_id,
+            'category': list(current_budget_data.keys()),
+            'amount': list(current_budget_data.values())
+        })
+        suggestions = self.format_suggestions(self.optimize_budgets(user_spending, budgets_df))
+        # No budget rows means nothing to adjust; keep the baseline's empty response
+        return suggestions.get(user_id, {"message": "Budget optimization initiated", "suggestions": {}})
+
+    def optimize_budgets(self, history_df: pd.DataFrame, budgets_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Suggests budget adjustments for every user in one pass.
+        history_df: pd.DataFrame with 'user_id', 'category', 'amount', and optionally a 'count' column when
+        rows are pre-aggregated (e.g. daily rollups), in which case averages are per transaction
+        budgets_df: pd.DataFrame with 'user_id', 'category', 'amount' (the budget limit)
+        Spending is aggregated with a single groupby over (user_id, category), joined against all
+        users' limits, and the over/under thresholds are applied as vectorized masks.
+        Returns one row per budget with 'limit', 'avg_spent', 'has_history', 'action',
+        'suggested_amount' (NaN for no_change) and 'reason'.
+        """
         # Example: Simple optimization based on average spending vs budget
         # This is a simplified approach. A real model would use more features and time-series analysis.
-        category_spending_avg = user_spending.groupby('category')['amount'].mean()
-
-        optimized_budget_suggestions = {}
-        for category, limit in current_budget_data.items():
-            avg_spent = category_spending_avg.get(category, 0)
-            if avg_spent > limit * 1.1: # If overspent by more than 10%
-                optimized_budget_suggestions[category] = {
-                    "action": "decrease_suggestion",
-                    "suggested_amount": round(avg_spent * 0.9, 2), # Suggesting 10% less than average spent
-                    "reason": "Consistently overspending in this category."
-                }
-            elif avg_spent < limit * 0.8: # If underspent by more than 20%
-                 optimized_budget_suggestions[category] = {
-                    "action": "increase_suggestion",
-                    "suggested_amount": round(avg_spent * 1.1, 2), # Suggesting 10% more than average spent
-                    "reason": "Consistently underspending; consider reallocating funds."
+        if 'count' in history_df:
+            totals = history_df.groupby(['user_id', 'category'])[['amount', 'count']].sum()
+            category_spending_avg = (totals['amount'] / totals['count']).rename('avg_spent')
+        else:
+            category_spending_avg = history_df.groupby(['user_id', 'category'])['amount'].mean().rename('avg_spent')
+
+        suggestions = budgets_df[['user_id', 'category', 'amount']].rename(columns={'amount': 'limit'})
+        suggestions = suggestions.join(category_spending_avg, on=['user_id', 'category'])
+        suggestions['avg_spent'] = suggestions['avg_spent'].fillna(0.0)
+        suggestions['has_history'] = suggestions['user_id'].isin(history_df['user_id'].unique())
+
+        avg_spent = suggestions['avg_spent'].to_numpy()
+        limit = suggestions['limit'].to_numpy(dtype=float)
+        overspent = avg_spent > limit * OVERSPEND_RATIO
+        underspent = ~overspent & (avg_spent < limit * UNDERSPEND_RATIO)
+
+        suggestions['action'] = np.select([overspent, underspent], ["decrease_suggestion", "increase_suggestion"], "no_change")
+        # Suggesting 10% less than average spent when overspending, 10% more when underspending
+        suggestions['suggested_amount'] = np.round(np.select([overspent, underspent], [avg_spent * 0.9, avg_spent * 1.1], np.nan), 2)
+        suggestions['reason'] = np.select(
+            [overspent, underspent],
+            ["Consistently overspending in this category.", "Consistently underspending; consider reallocating funds."],
+            "Spending within healthy limits."
+        )
+        return suggestions.reset_index(drop=True)
+
+    def format_suggestions(self, suggestions: pd.DataFrame) -> Dict[int, dict]:
+        """
+        Converts optimize_budgets() output into the per-user response shape of optimize_budget().
+        """
+        results = {}
+        for user_id, user_rows in suggestions.groupby('user_id', sort=False):
+            if not user_rows['has_history'].iloc[0]:
+                results[user_id] = {
+                    "message": "No spending history for optimization",
+                    "suggestions": dict(zip(user_rows['category'], user_rows['limit']))
                 }
-            else:
-                optimized_budget_suggestions[category] = {"action": "no_change", "reason": "Spending within healthy limits."}
+                continue
 
-        return {"message": "Budget optimization initiated", "suggestions": optimized_budget_suggestions}
+            optimized_budget_suggestions = {}
+            for row in user_rows.itertuples(index=False):
+                if row.action == "no_change":
+                    optimized_budget_suggestions[row.category] = {"action": row.action, "reason": row.reason}
+                else:
+                    optimized_budget_suggestions[row.category] = {
+                        "action": row.action,
+                        "suggested_amount": float(row.suggested_amount),
+                        "reason": row.reason
+                    }
+            results[user_id] = {"message": "Budget optimization initiated", "suggestions": optimized_budget_suggestions}
+        return results
@@ -1,5 +1,130 @@
-import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
+from __future__ import annotations
+
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from ..core.lazy_imports import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+ARIMA_ORDER = (5, 1, 0)
+MIN_TRANSACTIONS_FOR_FORECAST = 20
+
+class ForecastFitTimeout(Exception):
+    pass
+
+def _raise_fit_timeout(signum, frame):
+    raise ForecastFitTimeout()
+
+def build_daily_cash_flows(transaction_data: pd.DataFrame) -> Dict[int, pd.Series]:
+    """
+    Builds one daily net cash-flow series per user with vectorized ops.
+    transaction_data: pd.DataFrame with 'date', 'amount', 'type' (debit/credit), 'user_id'
+    Credits count positive, debits negative; days without transactions are filled with 0.
+    """
+    if transaction_data.empty:
+        return {}
+    dates = pd.to_datetime(transaction_data['date']).dt.normalize()
+    amounts = transaction_data['amount'].to_numpy(dtype=float)
+    net_amount = np.where(transaction_data['type'].to_numpy() == 'credit', amounts, -amounts)
+    daily = pd.Series(net_amount, index=pd.MultiIndex.from_arrays([transaction_data['user_id'], dates], names=['user_id', 'date']))
+    daily = daily.groupby(level=['user_id', 'date']).sum()
+    return {
+        user_id: user_daily.droplevel('user_id').asfreq('D', fill_value=0.0)
+        for user_id, user_daily in daily.groupby(level='user_id')
+    }
+
+def _fit_and_forecast(user_id: int, daily_cash_flow: pd.Series, steps: int, order: Tuple[int, int, int],
+                      fit_timeout: Optional[float]) -> Tuple[int, List[float]]:
+    """
+    Fits one ARIMA model and forecasts `steps` days. Runs inside pool workers, so the per-fit
+    timeout is enforced with SIGALRM in the worker (where available) instead of abandoning a busy process.
+    """
+    use_alarm = bool(fit_timeout) and hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_fit_timeout)
+        signal.setitimer(signal.ITIMER_REAL, fit_timeout)
+    try:
+        from statsmodels.tsa.arima.model import ARIMA
+        model_fit = ARIMA(daily_cash_flow, order=order).fit()
+        return user_id, np.asarray(model_fit.forecast(steps)).tolist()
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+def _format_forecast(last_date: pd.Timestamp, values: List[float]) -> list:
+    dates = pd.date_range(last_date + pd.Timedelta(days=1), periods=len(values), freq='D').strftime("%Y-%m-%d")
+    return [{"date": date, "net_cash_flow": round(float(val), 2)} for date, val in zip(dates, values)]
+
+def _history_from_state(state: dict) -> pd.Series:
+    return pd.Series(
+        state["history"], index=pd.date_range(state["history_start"], periods=len(state["history"]), freq='D'), dtype=float
+    )
+
+def state_last_observation_date(state: dict) -> pd.Timestamp:
+    """Returns the last day folded into a persisted forecaster state."""
+    return pd.Timestamp(state["history_start"]) + pd.Timedelta(days=len(state["history"]) - 1)
+
+def _state_from_fit(series: pd.Series, params: np.ndarray, order: Tuple[int, int, int], last_full_fit_at: str) -> dict:
+    return {
+        "order": list(order),
+        "params": [float(p) for p in params],
+        "history_start": series.index[0].isoformat(),
+        "history": [float(v) for v in series.to_numpy()],
+        "last_full_fit_at": last_full_fit_at,
+    }
+
+def build_cash_flow_matrix(transaction_data: pd.DataFrame) -> Tuple[np.ndarray, pd.DatetimeIndex, np.ndarray]:
+    """
+    Aligns every user's daily net cash flow into one (n_users, n_days) array over a shared date range.
+    Returns (user_ids, dates, matrix). Days before a user's first transaction are NaN; later days
+    without transactions are 0.
+    """
+    dates = pd.to_datetime(transaction_data['date']).dt.normalize()
+    amounts = transaction_data['amount'].to_numpy(dtype=float)
+    net_amount = np.where(transaction_data['type'].to_numpy() == 'credit', amounts, -amounts)
+    wide = (
+        pd.Series(net_amount, index=pd.MultiIndex.from_arrays([transaction_data['user_id'], dates]))
+        .groupby(level=[0, 1]).sum()
+        .unstack()
+    )
+    all_dates = pd.date_range(wide.columns.min(), wide.columns.max(), freq='D')
+    matrix = wide.reindex(columns=all_dates).to_numpy(dtype=float)
+    started = np.maximum.accumulate(~np.isnan(matrix), axis=1)
+    matrix = np.where(started & np.isnan(matrix), 0.0, matrix)
+    return wide.index.to_numpy(), all_dates, matrix
+
+def holt_forecast_matrix(matrix: np.ndarray, steps: int, alpha: float = 0.3, beta: float = 0.1, damping: float = 0.98) -> np.ndarray:
+    """
+    Runs a damped Holt (level + trend) exponential-smoothing recurrence over all rows at once and
+    returns an (n_rows, steps) forecast. NaN observations (before a row's series starts) leave the
+    row's state untouched; each row is initialized at its first observation.
+    """
+    n_rows = matrix.shape[0]
+    level = np.zeros(n_rows)
+    trend = np.zeros(n_rows)
+    initialized = np.zeros(n_rows, dtype=bool)
+    for observations in matrix.T:
+        observed = ~np.isnan(observations)
+        starting = observed & ~initialized
+        updating = observed & initialized
+
+        level[starting] = observations[starting]
+        initialized |= starting
+
+        previous_level = level[updating]
+        smoothed_trend = damping * trend[updating]
+        level[updating] = alpha * observations[updating] + (1 - alpha) * (previous_level + smoothed_trend)
+        trend[updating] = beta * (level[updating] - previous_level) + (1 - beta) * smoothed_trend
+
+    # Damped trend contribution for horizon h: (phi + phi^2 + ... + phi^h) * trend
+    damping_sums = np.cumsum(damping ** np.arange(1, steps + 1))
+    return level[:, None] + trend[:, None] * damping_sums[None, :]
 
 class FinancialForecaster:
     def __init__(self):
@@ -12,18 +137,17 @@ class FinancialForecaster:
         """
         print(f"Training cash flow forecast model for user {user_id}...")
         user_transactions = transaction_data[transaction_data['user_id'] == user_id].copy()
-        if user_transactions.empty or len(user_transactions) < 20: # Need enough data points
+        if user_transactions.empty or len(user_transactions) < MIN_TRANSACTIONS_FOR_FORECAST: # Need enough data points
             print(f"Not enough data for user {user_id} to train forecasting model.")
             return
         
         # Prepare data: sum daily net cash flow
-        user_transactions['date'] = pd.to_datetime(user_transactions['date'])
-        user_transactions['net_amount'] = user_transactions.apply(lambda row: row['amount'] if row['type'] == 'credit' else -row['amount'], axis=1)
-        daily_cash_flow = user_transactions.groupby('date')['net_amount'].sum().resample('D').sum().fillna(0)
+        daily_cash_flow = build_daily_cash_flows(user_transactions)[user_id]
 
         try:
             # Example ARIMA model (p,d,q). This might need tuning.
-            model = ARIMA(daily_cash_flow, order=(5,1,0))
+            from statsmodels.tsa.arima.model import ARIMA
+            model = ARIMA(daily_cash_flow, order=ARIMA_ORDER)
             model_fit = model.fit()
             self.models[user_id] = model_fit
             print(f"Cash flow forecast model trained for user {user_id}.")
@@ -42,10 +166,129 @@ class FinancialForecaster:
         forecast = model_fit.predict(start=len(model_fit.fittedvalues), end=len(model_fit.fittedvalues) + steps - 1)
         
         # Convert forecast to a list of dicts for API response
-        forecast_data = []
-        current_date = model_fit.index[-1] + pd.Timedelta(days=1)
-        for val in forecast:
-            forecast_data.append({"date": current_date.strftime("%Y-%m-%d"), "net_cash_flow": round(val, 2)})
-            current_date += pd.Timedelta(days=1)
+        return _format_forecast(model_fit.fittedvalues.index[-1], np.asarray(forecast))
+
+    def forecast_cash_flows(self, transaction_data: pd.DataFrame, steps: int = 30, max_workers: Optional[int] = None,
+                            fit_timeout: Optional[float] = 60.0, order: Tuple[int, int, int] = ARIMA_ORDER,
+                            method: str = "arima") -> Dict[int, list]:
+        """
+        Batch entry point: builds daily cash-flow series for every user in transaction_data,
+        fits the per-user ARIMA models across a process pool and returns {user_id: forecast}.
+        Users without enough data, or whose fit fails or exceeds fit_timeout seconds, get [].
+        max_workers=1 fits in-process.
+        method="holt" instead runs the vectorized exponential-smoothing mode over all users as one
+        matrix, which is fast enough for on-demand dashboard forecasts.
+        """
+        if method == "holt":
+            return self.fast_forecast_cash_flows(transaction_data, steps)
+        if method != "arima":
+            raise ValueError(f"Unknown forecasting method: {method}")
+
+        user_counts = transaction_data['user_id'].value_counts()
+        eligible = user_counts.index[user_counts >= MIN_TRANSACTIONS_FOR_FORECAST]
+        daily_cash_flows = build_daily_cash_flows(transaction_data[transaction_data['user_id'].isin(eligible)])
+        forecasts = {user_id: [] for user_id in user_counts.index.tolist()}
+        if not daily_cash_flows:
+            return forecasts
+
+        max_workers = max_workers or os.cpu_count() or 1
+        print(f"Forecasting cash flow for {len(daily_cash_flows)} users with {max_workers} workers...")
+        if max_workers == 1:
+            results = (self._safe_fit(user_id, series, steps, order, fit_timeout) for user_id, series in daily_cash_flows.items())
+            for user_id, values in results:
+                if values is not None:
+                    forecasts[user_id] = _format_forecast(daily_cash_flows[user_id].index[-1], values)
+            return forecasts
+
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(daily_cash_flows))) as executor:
+            futures = {
+                executor.submit(_fit_and_forecast, user_id, series, steps, order, fit_timeout): user_id
+                for user_id, series in daily_cash_flows.items()
+            }
+            for future in as_completed(futures):
+                user_id = futures[future]
+                try:
+                    _, values = future.result()
+                except ForecastFitTimeout:
+                    print(f"ARIMA fit for user {user_id} exceeded {fit_timeout}s; skipping.")
+                    continue
+                except Exception as e:
+                    print(f"Error training ARIMA model for user {user_id}: {e}")
+                    continue
+                forecasts[user_id] = _format_forecast(daily_cash_flows[user_id].index[-1], values)
+        return forecasts
+
+    def fast_forecast_cash_flows(self, transaction_data: pd.DataFrame, steps: int = 30, alpha: float = 0.3,
+                                 beta: float = 0.1, damping: float = 0.98) -> Dict[int, list]:
+        """
+        Forecasts N users x `steps` days in a single pass: all users' daily series are aligned in one
+        2-D array and smoothed with a vectorized damped Holt recurrence (no per-user model fits).
+        """
+        if transaction_data.empty:
+            return {}
+        user_ids, dates, matrix = build_cash_flow_matrix(transaction_data)
+        forecast = np.round(holt_forecast_matrix(matrix, steps, alpha, beta, damping), 2)
+        forecast_dates = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=steps, freq='D').strftime("%Y-%m-%d").tolist()
+        return {
+            user_id: [{"date": date, "net_cash_flow": val} for date, val in zip(forecast_dates, row)]
+            for user_id, row in zip(user_ids.tolist(), forecast.tolist())
+        }
+
+    def _safe_fit(self, user_id, series, steps, order, fit_timeout):
+        try:
+            return _fit_and_forecast(user_id, series, steps, order, fit_timeout)
+        except ForecastFitTimeout:
+            print(f"ARIMA fit for user {user_id} exceeded {fit_timeout}s; skipping.")
+        except Exception as e:
+            print(f"Error training ARIMA model for user {user_id}: {e}")
+        return user_id, None
+
+    def fit_state(self, user_id: int, daily_cash_flow: pd.Series, as_of: Optional[datetime] = None,
+                  order: Tuple[int, int, int] = ARIMA_ORDER, max_history_days: int = 365) -> dict:
+        """
+        Fully estimates a user's ARIMA model and returns its JSON-serializable state:
+        order, estimated params and the trailing `max_history_days` of daily observations.
+        """
+        series = daily_cash_flow.iloc[-max_history_days:]
+        from statsmodels.tsa.arima.model import ARIMA
+        model_fit = ARIMA(series, order=order).fit()
+        self.models[user_id] = model_fit
+        return _state_from_fit(series, model_fit.params, order, (as_of or datetime.utcnow()).isoformat())
+
+    def update_state(self, user_id: int, state: dict, new_daily_cash_flow: pd.Series, through: Optional[pd.Timestamp] = None,
+                     as_of: Optional[datetime] = None, refit_interval_days: int = 30, drift_threshold: float = 4.0,
+                     max_history_days: int = 365) -> Tuple[dict, bool]:
+        """
+        Appends new daily observations to a persisted fit without re-estimating parameters
+        (Kalman filtering with the stored params only). Days up to `through` without transactions
+        are appended as 0. A full re-estimation happens when the last one is older than
+        refit_interval_days, or when the new observations drift: their mean squared standardized
+        one-step-ahead error exceeds drift_threshold. as_of is naive UTC.
+        Returns (new_state, refitted).
+        """
+        as_of = as_of or datetime.utcnow()
+        order = tuple(state["order"])
+        history = _history_from_state(state)
+        history_end = history.index[-1]
+        new_observations = new_daily_cash_flow[new_daily_cash_flow.index > history_end]
+        end = max(through, history_end) if through is not None else max([history_end, *new_observations.index[-1:]])
+        combined = pd.concat([history, new_observations]).reindex(
+            pd.date_range(history.index[0], end, freq='D'), fill_value=0.0
+        ).iloc[-max_history_days:]
+
+        if as_of - datetime.fromisoformat(state["last_full_fit_at"]) >= timedelta(days=refit_interval_days):
+            print(f"Scheduled full refit of forecaster for user {user_id}.")
+            return self.fit_state(user_id, combined, as_of, order, max_history_days), True
+
+        params = np.asarray(state["params"])
+        from statsmodels.tsa.arima.model import ARIMA
+        model_fit = ARIMA(combined, order=order).filter(params)
+        appended_days = int((combined.index > history_end).sum())
+        if appended_days:
+            new_errors = model_fit.standardized_forecasts_error[0, -appended_days:]
+            if np.nanmean(new_errors ** 2) > drift_threshold:
+                print(f"Drift detected for user {user_id}; re-estimating forecaster.")
+                return self.fit_state(user_id, combined, as_of, order, max_history_days), True
 
-        return forecast_data
+        self.models[user_id] = model_fit
+        return _state_from_fit(combined, params, order, state["last_full_fit_at"]), False
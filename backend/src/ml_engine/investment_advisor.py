@@ -1,8 +1,34 @@
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence, Tuple
+
+from ..core.lazy_imports import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Capital-market assumptions per asset class (annualized), used by the Monte Carlo simulator
+ASSET_CLASSES = ["stocks", "bonds", "cash"]
+ANNUAL_EXPECTED_RETURNS = (0.07, 0.03, 0.02)
+ANNUAL_VOLATILITIES = (0.16, 0.06, 0.01)
+ASSET_CORRELATIONS = (
+    (1.0, 0.1, 0.0),
+    (0.1, 1.0, 0.2),
+    (0.0, 0.2, 1.0),
+)
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+# Monte Carlo paths per independently seeded random block; part of the seed, so changing it changes results
+PATH_BLOCK_SIZE = 10_000
+
+# Investment.type -> asset class; unknown types are treated as equity risk
+INVESTMENT_TYPE_ASSET_CLASS = {
+    "stock": "stocks", "etf": "stocks", "mutual_fund": "stocks", "crypto": "stocks",
+    "bond": "bonds", "cash": "cash", "money_market": "cash",
+}
+REBALANCE_DRIFT_THRESHOLD = 0.05 # Max absolute weight drift tolerated per asset class
 
 class InvestmentAdvisor:
     def __init__(self):
+        from sklearn.ensemble import RandomForestClassifier
         self.model = RandomForestClassifier(random_state=42)
         self.risk_tolerance_map = {'low': 0, 'medium': 1, 'high': 2}
         self.inv_strategy_map = {0: 'conservative', 1: 'moderate', 2: 'aggressive'}
@@ -48,4 +74,162 @@ class InvestmentAdvisor:
             "moderate": {"stocks": 0.6, "bonds": 0.3, "cash": 0.1},
             "aggressive": {"stocks": 0.8, "bonds": 0.15, "cash": 0.05}
         }
-        return allocations.get(strategy, allocations["moderate"])
\ No newline at end of file
+        return allocations.get(strategy, allocations["moderate"])
+
+    def holdings_weight_matrix(self, holdings_df: pd.DataFrame) -> Tuple[pd.Index, np.ndarray, np.ndarray]:
+        """
+        Pivots holdings of all users into an asset-class weight matrix.
+        holdings_df: 'user_id', 'type', 'current_value' (raw rows or pre-aggregated per user/type).
+        Returns (user_ids, weights (n_users, n_asset_classes) ordered like ASSET_CLASSES, total_values).
+        """
+        asset_class = holdings_df['type'].astype('string').str.lower().map(INVESTMENT_TYPE_ASSET_CLASS).fillna("stocks")
+        values = holdings_df['current_value'].astype(float).groupby([holdings_df['user_id'], asset_class]).sum().unstack(fill_value=0.0)
+        values = values.reindex(columns=ASSET_CLASSES, fill_value=0.0)
+        totals = values.sum(axis=1).to_numpy()
+        weights = np.divide(values.to_numpy(), totals[:, None], out=np.zeros(values.shape), where=totals[:, None] > 0)
+        return values.index, weights, totals
+
+    def compute_rebalancing_drift(self, holdings_df: pd.DataFrame, strategies: Optional[pd.Series] = None,
+                                  threshold: float = REBALANCE_DRIFT_THRESHOLD) -> pd.DataFrame:
+        """
+        Compares every user's current asset-class weights against the target allocation of their strategy
+        in one vectorized pass.
+        strategies: optional Series user_id -> strategy name; users without one get "moderate".
+        Returns one row per user whose largest absolute drift exceeds threshold, with 'strategy',
+        'total_value', 'max_drift' and per asset class '<class>_weight', '<class>_target' and
+        '<class>_trade' (amount to buy, negative to sell).
+        """
+        user_ids, weights, totals = self.holdings_weight_matrix(holdings_df)
+        user_strategies = pd.Series("moderate", index=user_ids) if strategies is None else strategies.reindex(user_ids).fillna("moderate")
+
+        strategy_names = list(dict.fromkeys(user_strategies))
+        target_table = self.allocation_matrix([self.suggest_portfolio_allocation(name) for name in strategy_names])
+        targets = target_table[pd.Index(strategy_names).get_indexer(user_strategies)]
+
+        drift = weights - targets
+        max_drift = np.abs(drift).max(axis=1)
+        needs_rebalance = (max_drift > threshold) & (totals > 0)
+
+        result = pd.DataFrame({
+            'user_id': user_ids,
+            'strategy': user_strategies.to_numpy(),
+            'total_value': totals,
+            'max_drift': np.round(max_drift, 4),
+        })
+        for i, asset_class in enumerate(ASSET_CLASSES):
+            result[f'{asset_class}_weight'] = np.round(weights[:, i], 4)
+            result[f'{asset_class}_target'] = targets[:, i]
+            result[f'{asset_class}_trade'] = np.round(-drift[:, i] * totals, 2)
+        return result[needs_rebalance].reset_index(drop=True)
+
+    def format_rebalance_suggestions(self, drift_df: pd.DataFrame) -> Dict[int, dict]:
+        """
+        Converts compute_rebalancing_drift() output into per-user suggestion payloads.
+        """
+        suggestions = {}
+        for row in drift_df.to_dict('records'):
+            trades = {asset_class: row[f'{asset_class}_trade'] for asset_class in ASSET_CLASSES if row[f'{asset_class}_trade'] != 0}
+            suggestions[int(row['user_id'])] = {
+                "type": "portfolio_rebalance",
+                "description": f"Your portfolio has drifted {row['max_drift']:.0%} from your {row['strategy']} allocation.",
+                "current_allocation": {asset_class: row[f'{asset_class}_weight'] for asset_class in ASSET_CLASSES},
+                "target_allocation": {asset_class: row[f'{asset_class}_target'] for asset_class in ASSET_CLASSES},
+                "trades": trades,
+                "requires_approval": True
+            }
+        return suggestions
+
+    def allocation_matrix(self, allocations: Sequence[dict]) -> np.ndarray:
+        """
+        Converts allocation dicts (as returned by suggest_portfolio_allocation) into an
+        (n_portfolios, n_asset_classes) weight matrix ordered like ASSET_CLASSES.
+        """
+        return pd.DataFrame(list(allocations)).reindex(columns=ASSET_CLASSES, fill_value=0.0).fillna(0.0).to_numpy(dtype=float)
+
+    def simulate_portfolios(self, weights: np.ndarray, initial_values: np.ndarray, monthly_contributions: Optional[np.ndarray] = None,
+                            horizon_months: int = 120, target_amounts: Optional[np.ndarray] = None, n_paths: int = 100_000,
+                            seed: int = 42, percentiles: Sequence[float] = DEFAULT_PERCENTILES, checkpoint_months: int = 12,
+                            max_chunk_elements: int = 4_000_000, path_block_size: int = PATH_BLOCK_SIZE) -> dict:
+        """
+        Monte Carlo projection of many portfolios in one batched call.
+        weights: (n_portfolios, n_asset_classes) target weights, rebalanced monthly.
+        Monthly asset returns are drawn from a correlated lognormal model. Paths are generated in fixed
+        blocks of path_block_size seeded by (seed, block index), so every portfolio sees the same market
+        scenarios whatever max_chunk_elements or the other portfolios in the call are.
+        Portfolios are processed in batches whose retained checkpoint values (n_paths * n_checkpoints
+        floats per portfolio) fit in max_chunk_elements; a batch always holds at least one portfolio, so
+        a single portfolio with more paths than that still needs n_paths * n_checkpoints floats.
+        Returns {'checkpoint_months', 'percentiles', 'bands' (n_portfolios, n_percentiles, n_checkpoints),
+        'goal_probability' (n_portfolios,) or None}.
+        """
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        n_portfolios = weights.shape[0]
+        initial_values = np.broadcast_to(np.asarray(initial_values, dtype=float), (n_portfolios,))
+        contributions = np.broadcast_to(np.asarray(0.0 if monthly_contributions is None else monthly_contributions, dtype=float), (n_portfolios,))
+
+        checkpoints = np.unique(np.append(np.arange(checkpoint_months, horizon_months + 1, checkpoint_months), horizon_months))
+        n_checkpoints = len(checkpoints)
+        is_checkpoint = np.zeros(horizon_months + 1, dtype=bool)
+        is_checkpoint[checkpoints] = True
+
+        returns, volatilities = np.asarray(ANNUAL_EXPECTED_RETURNS), np.asarray(ANNUAL_VOLATILITIES)
+        monthly_mean = (returns - 0.5 * volatilities ** 2) / 12
+        monthly_cov = np.outer(volatilities, volatilities) * np.asarray(ASSET_CORRELATIONS) / 12
+        cholesky = np.linalg.cholesky(monthly_cov)
+
+        portfolios_per_batch = max(1, min(n_portfolios, max_chunk_elements // (n_paths * n_checkpoints)))
+
+        bands = np.empty((n_portfolios, len(percentiles), n_checkpoints))
+        goal_probability = np.empty(n_portfolios) if target_amounts is not None else None
+        for batch_start in range(0, n_portfolios, portfolios_per_batch):
+            batch = slice(batch_start, min(batch_start + portfolios_per_batch, n_portfolios))
+            batch_weights = weights[batch]
+            checkpoint_values = np.empty((n_paths, n_checkpoints, batch_weights.shape[0]))
+
+            for block_index, path_start in enumerate(range(0, n_paths, path_block_size)):
+                chunk_paths = min(path_block_size, n_paths - path_start)
+                rng = np.random.default_rng([seed, block_index])
+                values = np.tile(initial_values[batch], (chunk_paths, 1))
+                checkpoint_index = 0
+                for month in range(1, horizon_months + 1):
+                    log_returns = monthly_mean + rng.standard_normal((chunk_paths, len(ASSET_CLASSES))) @ cholesky.T
+                    portfolio_returns = np.expm1(log_returns) @ batch_weights.T
+                    values = values * (1.0 + portfolio_returns) + contributions[batch]
+                    if is_checkpoint[month]:
+                        checkpoint_values[path_start:path_start + chunk_paths, checkpoint_index] = values
+                        checkpoint_index += 1
+
+            # (n_percentiles, n_checkpoints, batch) -> (batch, n_percentiles, n_checkpoints)
+            bands[batch] = np.percentile(checkpoint_values, percentiles, axis=0).transpose(2, 0, 1)
+            if goal_probability is not None:
+                targets = np.broadcast_to(np.asarray(target_amounts, dtype=float), (n_portfolios,))[batch]
+                goal_probability[batch] = (checkpoint_values[:, -1, :] >= targets).mean(axis=0)
+
+        return {
+            "checkpoint_months": checkpoints.tolist(),
+            "percentiles": list(percentiles),
+            "bands": bands,
+            "goal_probability": goal_probability,
+        }
+
+    def project_allocation(self, strategy: str, initial_value: float, monthly_contribution: float = 0.0,
+                           horizon_years: int = 10, target_amount: Optional[float] = None, n_paths: int = 100_000,
+                           seed: int = 42) -> dict:
+        """
+        Projects the outcome distribution of a strategy's allocation for one user.
+        target_amount is typically the user's Goal.target_amount.
+        """
+        allocation = self.suggest_portfolio_allocation(strategy)
+        result = self.simulate_portfolios(
+            self.allocation_matrix([allocation]), initial_value, monthly_contribution, horizon_years * 12,
+            None if target_amount is None else target_amount, n_paths=n_paths, seed=seed
+        )
+        bands: Dict[str, list] = {
+            f"p{p}": np.round(result["bands"][0, i], 2).tolist() for i, p in enumerate(result["percentiles"])
+        }
+        return {
+            "allocation": allocation,
+            "checkpoint_months": result["checkpoint_months"],
+            "percentile_bands": bands,
+            "goal_probability": None if result["goal_probability"] is None else round(float(result["goal_probability"][0]), 4),
+        }
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .transaction_categorizer import UNCATEGORIZED, normalize_merchant
+from ..core.lazy_imports import lazy_import
+pd = lazy_import("pandas")
+
+MERCHANT_INDEX_MODEL_NAME = "merchant_index"
+
+class MerchantIndex:
+    """
+    Exact-match normalized merchant -> category index used as a fast path before the ML categorizer.
+    Only merchants whose historical labels are frequent and consistent enough make it into the index;
+    everything else is a miss and falls through to the model.
+    """
+    def __init__(self, min_support: int = 3, min_purity: float = 0.9):
+        self.min_support = min_support
+        self.min_purity = min_purity
+        self.index: Dict[str, str] = {}
+        self.built_at: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+
+    def build(self, transactions_df: pd.DataFrame):
+        """
+        Builds the index from labeled history.
+        transactions_df should have 'description' and 'category' columns, and optionally a 'count'
+        column when rows are pre-aggregated (e.g. GROUP BY description, category in SQL).
+        Pass only trusted labels (Plaid or user-confirmed, not the categorizer's own predictions):
+        index hits are served with full confidence, so a predicted label here would freeze a model
+        mistake in. UNCATEGORIZED rows are never indexed.
+        """
+        transactions_df = transactions_df[transactions_df['category'] != UNCATEGORIZED]
+        if transactions_df.empty:
+            self.index = {}
+            self.built_at = datetime.utcnow()
+            return
+
+        df = transactions_df[['description', 'category']].copy()
+        df['count'] = transactions_df['count'] if 'count' in transactions_df else 1
+        # Normalize each distinct description once, then re-aggregate on the merchant key
+        distinct = df['description'].drop_duplicates()
+        df['merchant'] = df['description'].map(dict(zip(distinct, distinct.map(normalize_merchant))))
+        df = df[df['merchant'] != ""]
+
+        counts = df.groupby(['merchant', 'category'])['count'].sum().reset_index()
+        totals = counts.groupby('merchant')['count'].transform('sum')
+        counts['purity'] = counts['count'] / totals
+        confident = counts[(totals >= self.min_support) & (counts['purity'] >= self.min_purity)]
+
+        self.index = dict(zip(confident['merchant'], confident['category']))
+        self.built_at = datetime.utcnow()
+        print(f"Merchant index built with {len(self.index)} merchants.")
+
+    def lookup(self, description: str) -> Optional[str]:
+        return self.lookup_many([description])[0]
+
+    def lookup_many(self, descriptions: List[str]) -> List[Optional[str]]:
+        """
+        Returns the indexed category for each description, or None on a miss.
+        """
+        results = [self.index.get(normalize_merchant(d)) for d in descriptions]
+        hits = sum(r is not None for r in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """
+        Lookup counters since the index was loaded; every hit is one categorizer inference skipped.
+        """
+        return {
+            "size": len(self.index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "model_calls_saved": self.hits,
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def needs_rebuild(self, max_age: timedelta) -> bool:
+        return self.built_at is None or datetime.utcnow() - self.built_at >= max_age
+
+    def to_artifacts(self) -> Tuple[dict, dict]:
+        """
+        Returns (artifacts, metadata) for ModelRegistry.register.
+        """
+        artifacts = {"index": self.index}
+        metadata = {
+            "min_support": self.min_support,
+            "min_purity": self.min_purity,
+            "size": len(self.index),
+            "built_at": self.built_at.isoformat() if self.built_at else None
+        }
+        return artifacts, metadata
+
+    @classmethod
+    def from_artifacts(cls, artifacts: dict, metadata: dict) -> "MerchantIndex":
+        merchant_index = cls(min_support=metadata.get("min_support", 3), min_purity=metadata.get("min_purity", 0.9))
+        merchant_index.index = artifacts["index"]
+        if metadata.get("built_at"):
+            merchant_index.built_at = datetime.fromisoformat(metadata["built_at"])
+        return merchant_index
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import errno
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.lazy_imports import lazy_import
+joblib = lazy_import("joblib")
+
+LATEST_POINTER = "LATEST"
+METADATA_FILE = "metadata.json"
+# Attempts to publish under a fresh version number when concurrent trainers race for the same one
+MAX_PUBLISH_ATTEMPTS = 10
+
+class ModelRegistry:
+    """
+    File-based registry of versioned model artifacts.
+    Layout: <root_dir>/<name>/<version>/{<artifact>.joblib, metadata.json} plus a
+    <root_dir>/<name>/LATEST pointer. Versions are published with an atomic directory rename
+    and the pointer is swapped with os.replace, so readers never see a half-written version.
+    """
+    def __init__(self, root_dir: str):
+        self.root_dir = os.path.abspath(root_dir)
+
+    def register(self, name: str, artifacts: Dict[str, Any], metadata: Optional[dict] = None, set_latest: bool = True) -> str:
+        """
+        Stores a new version of `name`. Artifacts are dumped uncompressed so they can be
+        memory-mapped on load. Returns the new version string.
+        """
+        model_dir = os.path.join(self.root_dir, name)
+        os.makedirs(model_dir, exist_ok=True)
+        staging_dir = os.path.join(model_dir, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging_dir)
+        try:
+            for artifact_name, obj in artifacts.items():
+                joblib.dump(obj, os.path.join(staging_dir, artifact_name + ".joblib"))
+
+            for attempt in range(MAX_PUBLISH_ATTEMPTS):
+                version = f"{self._next_version_number(name):06d}"
+                full_metadata = {
+                    **(metadata or {}),
+                    "name": name,
+                    "version": version,
+                    "artifacts": sorted(artifacts),
+                    "created_at": datetime.utcnow().isoformat(),
+                }
+                with open(os.path.join(staging_dir, METADATA_FILE), "w") as f:
+                    json.dump(full_metadata, f, default=str)
+                try:
+                    os.rename(staging_dir, os.path.join(model_dir, version))
+                    break
+                except OSError as e:
+                    # Another process published this version number first; take the next one.
+                    # Anything else (permissions, full or read-only disk, ...) will not go away by retrying.
+                    if e.errno not in (errno.EEXIST, errno.ENOTEMPTY) or attempt == MAX_PUBLISH_ATTEMPTS - 1:
+                        raise
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if set_latest:
+            self.set_latest(name, version)
+        print(f"Registered {name} version {version}.")
+        return version
+
+    def set_latest(self, name: str, version: str):
+        model_dir = os.path.join(self.root_dir, name)
+        if not os.path.isdir(os.path.join(model_dir, version)):
+            raise ValueError(f"Unknown version {version} for model {name}.")
+        tmp_pointer = os.path.join(model_dir, f".{LATEST_POINTER}-{uuid.uuid4().hex}")
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+        os.replace(tmp_pointer, os.path.join(model_dir, LATEST_POINTER))
+
+    def latest_version(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root_dir, name, LATEST_POINTER)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def list_versions(self, name: str) -> List[str]:
+        model_dir = os.path.join(self.root_dir, name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(v for v in os.listdir(model_dir) if v.isdigit())
+
+    def get_metadata(self, name: str, version: Optional[str] = None) -> dict:
+        version = version or self.latest_version(name)
+        if version is None:
+            raise FileNotFoundError(f"No registered versions for model {name}.")
+        with open(os.path.join(self.root_dir, name, version, METADATA_FILE)) as f:
+            return json.load(f)
+
+    def load(self, name: str, version: Optional[str] = None, mmap_mode: Optional[str] = "r") -> Tuple[Dict[str, Any], dict]:
+        """
+        Loads the artifacts and metadata of a version (latest by default).
+        With mmap_mode='r' NumPy arrays are memory-mapped read-only, so forked workers share
+        the page cache instead of each holding a copy. Pass mmap_mode=None for models that
+        will be updated in place (e.g. partial_fit during training).
+        """
+        metadata = self.get_metadata(name, version)
+        version_dir = os.path.join(self.root_dir, name, metadata["version"])
+        artifacts = {
+            artifact_name: joblib.load(os.path.join(version_dir, artifact_name + ".joblib"), mmap_mode=mmap_mode)
+            for artifact_name in metadata["artifacts"]
+        }
+        return artifacts, metadata
+
+    def prune(self, name: str, keep: int = 5):
+        """
+        Deletes all but the `keep` newest versions, never removing the LATEST one.
+        """
+        latest = self.latest_version(name)
+        versions = self.list_versions(name)
+        for version in versions[:-keep] if keep > 0 else versions:
+            if version != latest:
+                shutil.rmtree(os.path.join(self.root_dir, name, version), ignore_errors=True)
+
+    def _next_version_number(self, name: str) -> int:
+        versions = self.list_versions(name)
+        return int(versions[-1]) + 1 if versions else 1
+
+class ModelHandle:
+    """
+    Process-local handle to the LATEST version of a registered model.
+    get() re-checks the registry pointer at most every `poll_interval` seconds; when a newer
+    version is published it is fully loaded first and then swapped in with a single reference
+    assignment, so callers always see either the old or the new model, never a mix.
+    """
+    def __init__(self, registry: ModelRegistry, name: str, loader: Callable[[Dict[str, Any], dict], Any],
+                 mmap_mode: Optional[str] = "r", poll_interval: float = 30.0):
+        self.registry = registry
+        self.name = name
+        self.loader = loader
+        self.mmap_mode = mmap_mode
+        self.poll_interval = poll_interval
+        self._current: Tuple[Optional[str], Any] = (None, None)
+        self._last_checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._current[0]
+
+    def get(self):
+        if time.monotonic() - self._last_checked >= self.poll_interval:
+            self.refresh()
+        model = self._current[1]
+        if model is None:
+            raise FileNotFoundError(f"No registered versions for model {self.name}.")
+        return model
+
+    def refresh(self) -> bool:
+        """
+        Swaps to the registry's LATEST version if it changed. Returns True if a swap happened.
+        """
+        with self._lock:
+            self._last_checked = time.monotonic()
+            latest = self.registry.latest_version(self.name)
+            if latest is None or latest == self._current[0]:
+                return False
+            artifacts, metadata = self.registry.load(self.name, latest, mmap_mode=self.mmap_mode)
+            self._current = (latest, self.loader(artifacts, metadata))
+            print(f"Loaded {self.name} version {latest}.")
+            return True
+
+_handles: Dict[Tuple[str, str], ModelHandle] = {}
+_handles_lock = threading.Lock()
+
+def get_model_handle(root_dir: str, name: str, loader: Callable[[Dict[str, Any], dict], Any], **handle_kwargs) -> ModelHandle:
+    """
+    Returns the process-wide ModelHandle for (root_dir, name), creating it on first use.
+    Handles are created lazily so each forked worker maps the artifacts itself after the fork.
+    """
+    key = (os.path.abspath(root_dir), name)
+    with _handles_lock:
+        handle = _handles.get(key)
+        if handle is None:
+            handle = ModelHandle(ModelRegistry(root_dir), name, loader, **handle_kwargs)
+            _handles[key] = handle
+        return handle
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from .transaction_categorizer import normalize_merchant
+from ..core.lazy_imports import lazy_import
+pd = lazy_import("pandas")
+
+# Typical billing cycles (days) used to label a detected interval
+CADENCES = {"weekly": 7, "biweekly": 14, "monthly": 30.4, "quarterly": 91.3, "yearly": 365.25}
+
+class RecurringDetector:
+    """
+    Incremental recurring-charge (subscription) detector.
+    Keeps a compact state per (user, merchant): count, first/last date and exponentially weighted
+    mean/variance of the interval between charges and of the amount. update() folds one transaction
+    into a state in O(1), so recurring charges and their next expected date are always current
+    without rescanning history.
+    """
+    def __init__(self, min_occurrences: int = 3, interval_tolerance: float = 0.2, amount_tolerance: float = 0.25,
+                 smoothing: float = 0.3):
+        self.min_occurrences = min_occurrences
+        self.interval_tolerance = interval_tolerance # Max interval std / mean to count as regular
+        self.amount_tolerance = amount_tolerance # Max amount std / mean to count as the same charge
+        self.smoothing = smoothing # EWMA weight of the newest observation
+
+    def new_state(self, date: datetime, amount: float) -> dict:
+        return {
+            "count": 1,
+            "first_date": date.isoformat(),
+            "last_date": date.isoformat(),
+            "interval_mean": None,
+            "interval_var": 0.0,
+            "amount_mean": float(amount),
+            "amount_var": 0.0,
+        }
+
+    def update(self, state: Optional[dict], date: datetime, amount: float) -> dict:
+        """
+        Folds one charge into a (user, merchant) state and returns the updated state.
+        Charges on or before the last seen day (same-day splits, late deliveries) only update the
+        amount statistics, so the interval estimate is never polluted by out-of-order data.
+        """
+        if state is None:
+            return self.new_state(date, amount)
+
+        state = dict(state)
+        last_date = datetime.fromisoformat(state["last_date"])
+        interval = (date - last_date).total_seconds() / 86400.0
+        if interval >= 1.0:
+            if state["interval_mean"] is None:
+                state["interval_mean"] = interval
+            else:
+                state["interval_mean"], state["interval_var"] = self._ewm(state["interval_mean"], state["interval_var"], interval)
+            state["last_date"] = date.isoformat()
+        state["amount_mean"], state["amount_var"] = self._ewm(state["amount_mean"], state["amount_var"], float(amount))
+        state["count"] += 1
+        return state
+
+    def is_recurring(self, state: dict) -> bool:
+        if state["count"] < self.min_occurrences or not state["interval_mean"]:
+            return False
+        interval_cv = math.sqrt(state["interval_var"]) / state["interval_mean"]
+        amount_cv = math.sqrt(state["amount_var"]) / abs(state["amount_mean"]) if state["amount_mean"] else float("inf")
+        return interval_cv <= self.interval_tolerance and amount_cv <= self.amount_tolerance
+
+    def next_expected_date(self, state: dict) -> Optional[datetime]:
+        if not state["interval_mean"]:
+            return None
+        return datetime.fromisoformat(state["last_date"]) + timedelta(days=state["interval_mean"])
+
+    def cadence(self, state: dict) -> Optional[str]:
+        """
+        Labels the estimated interval with the closest billing cycle, if it is within tolerance.
+        """
+        if not state["interval_mean"]:
+            return None
+        name, days = min(CADENCES.items(), key=lambda item: abs(item[1] - state["interval_mean"]))
+        return name if abs(days - state["interval_mean"]) <= days * self.interval_tolerance else None
+
+    def summarize(self, state: dict) -> dict:
+        next_date = self.next_expected_date(state)
+        return {
+            "is_recurring": self.is_recurring(state),
+            "cadence": self.cadence(state),
+            "expected_amount": round(state["amount_mean"], 2),
+            "next_expected_date": next_date.isoformat() if next_date else None,
+        }
+
+    def update_many(self, states: Dict[Tuple[int, str], dict], transactions_df: pd.DataFrame) -> Dict[Tuple[int, str], dict]:
+        """
+        Folds a batch of transactions into `states` (keyed by (user_id, merchant)) in date order.
+        transactions_df should have 'user_id', 'description', 'amount' and 'date' columns; only debits
+        (positive Plaid amounts) are considered. Returns the states touched by the batch.
+        """
+        charges = transactions_df[transactions_df['amount'] > 0]
+        distinct = charges['description'].drop_duplicates()
+        merchants = charges['description'].map(dict(zip(distinct, distinct.map(normalize_merchant))))
+        charges = charges.assign(merchant=merchants)
+        charges = charges[charges['merchant'] != ""].sort_values('date', kind='stable')
+
+        touched = {}
+        for user_id, merchant, amount, date in zip(charges['user_id'], charges['merchant'], charges['amount'], charges['date']):
+            key = (user_id, merchant)
+            date = pd.Timestamp(date)
+            if date.tzinfo is not None:
+                date = date.tz_convert('UTC').tz_localize(None) # States store naive UTC dates
+            states[key] = touched[key] = self.update(states.get(key), date.to_pydatetime(), amount)
+        return touched
+
+    def _ewm(self, mean: float, var: float, value: float) -> Tuple[float, float]:
+        # Incremental exponentially weighted mean/variance (West, 1979)
+        diff = value - mean
+        increment = self.smoothing * diff
+        return mean + increment, (1 - self.smoothing) * (var + diff * increment)
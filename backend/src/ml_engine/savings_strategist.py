@@ -1,4 +1,14 @@
-import pandas as pd
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from ..core.lazy_imports import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SAVINGS_RATE = 0.20 # Share of disposable income suggested for savings
+PRIORITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+DAYS_PER_MONTH = 30.44
 
 class SavingsStrategist:
     def __init__(self):
@@ -9,23 +19,84 @@ class SavingsStrategist:
         Analyzes user income, expenses, and savings goals to suggest optimal savings contributions.
         """
         print(f"Suggesting savings contribution for user {user_id}...")
-        
-        # Placeholder logic: simple calculation based on disposable income
-        # In a real scenario, this would involve more sophisticated forecasting and goal prioritization.
-        
-        total_income = income_data[income_data['user_id'] == user_id]['amount'].sum()
-        total_expenses = expense_data[expense_data['user_id'] == user_id]['amount'].sum()
-        
-        disposable_income = total_income - total_expenses
-        
+
+        user_summary, goal_allocations = self.allocate_savings(
+            income_data[income_data['user_id'] == user_id],
+            expense_data[expense_data['user_id'] == user_id],
+            goals_data[goals_data['user_id'] == user_id]
+        )
         suggested_amount = 0.0
-        if disposable_income > 0:
-            # Try to save 20% of disposable income, or what's needed for nearest goal
-            suggested_amount = disposable_income * 0.20
-        
-        # Prioritize goals
-        # closest_goal = goals_data[goals_data['user_id'] == user_id].sort_values(by='target_date').iloc[0]
-        # remaining_for_goal = closest_goal['target_amount'] - closest_goal['current_amount']
-        # suggested_amount = min(suggested_amount, remaining_for_goal)
-
-        return {"message": "Savings suggestion generated", "suggested_amount": round(max(0, suggested_amount), 2)}
+        if user_id in user_summary.index:
+            suggested_amount = user_summary.loc[user_id, 'suggested_amount']
+
+        allocations = [
+            {"name": row.name, "amount": float(row.allocated)}
+            for row in goal_allocations.itertuples(index=False) if row.allocated > 0
+        ]
+        return {"message": "Savings suggestion generated", "suggested_amount": round(max(0, suggested_amount), 2), "allocations": allocations}
+
+    def allocate_savings(self, income_data: pd.DataFrame, expense_data: pd.DataFrame, goals_data: pd.DataFrame,
+                         as_of: Optional[pd.Timestamp] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Splits every user's savings budget (SAVINGS_RATE of disposable income) across that user's goals
+        with vectorized array ops only.
+        income_data / expense_data: 'user_id', 'amount'
+        goals_data: Goal and/or Saving rows with 'user_id', 'name', 'target_amount', 'current_amount',
+        'target_date' and optionally 'priority' and 'status'.
+        Goals are ordered per user by priority then deadline. A first waterfall pass funds each goal's
+        monthly need (remaining / months left to its deadline); whatever budget is left then fills the
+        remaining gaps in the same order. Goals without a deadline only receive leftover budget.
+        Returns (user_summary indexed by user_id with 'disposable_income', 'savings_budget',
+        'suggested_amount'; goal_allocations with 'remaining', 'monthly_need', 'allocated').
+        """
+        as_of = pd.Timestamp.now(tz='UTC') if as_of is None else pd.Timestamp(as_of)
+        as_of = as_of.tz_localize('UTC') if as_of.tzinfo is None else as_of
+
+        # Placeholder logic: simple calculation based on disposable income
+        total_income = income_data.groupby('user_id')['amount'].sum()
+        total_expenses = expense_data.groupby('user_id')['amount'].sum()
+        disposable_income = total_income.sub(total_expenses, fill_value=0.0)
+        savings_budget = (disposable_income.clip(lower=0.0) * SAVINGS_RATE).rename('savings_budget')
+
+        goals = goals_data.copy()
+        if 'status' in goals:
+            goals = goals[goals['status'].fillna('active') == 'active']
+        goals['remaining'] = (goals['target_amount'] - goals['current_amount'].fillna(0.0)).clip(lower=0.0)
+        goals = goals[goals['remaining'] > 0]
+
+        priority = goals['priority'] if 'priority' in goals else pd.Series('medium', index=goals.index)
+        goals['priority_rank'] = priority.astype('string').str.lower().map(PRIORITY_RANK).fillna(PRIORITY_RANK['medium'])
+        goals['deadline'] = pd.to_datetime(goals['target_date'], utc=True)
+        months_left = np.ceil((goals['deadline'] - as_of).dt.days.to_numpy(dtype=float) / DAYS_PER_MONTH)
+        months_left = np.where(np.isnan(months_left), np.inf, np.maximum(months_left, 1.0))
+        goals['monthly_need'] = goals['remaining'].to_numpy() / months_left
+        goals = goals.sort_values(['user_id', 'priority_rank', 'deadline'], na_position='last', kind='stable')
+
+        budget = goals['user_id'].map(savings_budget).fillna(0.0).to_numpy()
+        by_user = goals.groupby('user_id', sort=False)
+
+        # Pass 1: fund monthly needs in priority/deadline order
+        need = goals['monthly_need'].to_numpy()
+        need_before = by_user['monthly_need'].cumsum().to_numpy() - need
+        first_pass = np.clip(budget - need_before, 0.0, need)
+
+        # Pass 2: spread leftover budget over the remaining gaps in the same order
+        goals['gap'] = goals['remaining'].to_numpy() - first_pass
+        leftover = budget - pd.Series(first_pass, index=goals.index).groupby(goals['user_id']).transform('sum').to_numpy()
+        gap = goals['gap'].to_numpy()
+        gap_before = goals.groupby('user_id', sort=False)['gap'].cumsum().to_numpy() - gap
+        second_pass = np.clip(leftover - gap_before, 0.0, gap)
+
+        goals['allocated'] = np.round(first_pass + second_pass, 2)
+        goal_allocations = goals.drop(columns=['gap', 'deadline', 'priority_rank']).reset_index(drop=True)
+
+        allocated_total = goal_allocations.groupby('user_id')['allocated'].sum()
+        users_with_goals = goals['user_id'].unique()
+        user_summary = pd.DataFrame({'disposable_income': disposable_income}).join(savings_budget)
+        # Users with open goals save what their goals can absorb; users without any keep the flat rate
+        user_summary['suggested_amount'] = np.where(
+            user_summary.index.isin(users_with_goals),
+            allocated_total.reindex(user_summary.index).fillna(0.0),
+            user_summary['savings_budget']
+        ).round(2)
+        return user_summary, goal_allocations
@@ -1,18 +1,64 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import LabelEncoder
-import joblib # For model persistence
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from ..core.lazy_imports import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+joblib = lazy_import("joblib") # For model persistence
+
+CATEGORIZER_MODEL_NAME = "transaction_categorizer"
+# Placeholder category for transactions nothing could categorize; never a real label
+UNCATEGORIZED = "Uncategorized"
+
+_NON_ALPHA_RE = re.compile(r"[^a-z\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_merchant(description: str) -> str:
+    """
+    Normalizes a raw transaction description into a merchant key.
+    Lowercases, drops digits/punctuation (store numbers, '#', '*') and collapses whitespace,
+    so 'STARBUCKS #1234' and 'Starbucks 5678' map to the same key.
+    """
+    if not description:
+        return ""
+    text = _NON_ALPHA_RE.sub(" ", str(description).lower())
+    return _WHITESPACE_RE.sub(" ", text).strip()
 
 class TransactionCategorizer:
-    def __init__(self):
+    def __init__(self, cache_size: int = 4096, incremental: bool = False, merchant_index=None):
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression, SGDClassifier
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import LabelEncoder
+
         self.model = None
         self.label_encoder = LabelEncoder()
-        self.pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(stop_words='english', max_features=1000)),
-            ('classifier', LogisticRegression(max_iter=1000))
-        ])
+        self.incremental = incremental
+        if incremental:
+            # Stateless hashing features + SGD so the model can be updated with partial_fit
+            # on new labels only, instead of refitting a vocabulary over the full history.
+            self.pipeline = Pipeline([
+                ('hashing', HashingVectorizer(stop_words='english', n_features=2**18, alternate_sign=False)),
+                ('classifier', SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42))
+            ])
+        else:
+            self.pipeline = Pipeline([
+                ('tfidf', TfidfVectorizer(stop_words='english', max_features=1000)),
+                ('classifier', LogisticRegression(max_iter=1000))
+            ])
+        # Latest transaction timestamp (created/updated) the model has been trained on
+        self.checkpoint: Optional[datetime] = None
+        # Bounded LRU cache: normalized merchant -> [(category, confidence), ...] sorted by confidence
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # Optional MerchantIndex consulted before the model; hits are returned with confidence 1.0
+        self.merchant_index = merchant_index
 
     def train(self, transactions_df: pd.DataFrame):
         """
@@ -23,26 +69,148 @@ class TransactionCategorizer:
         self.label_encoder.fit(transactions_df['category'])
         y_encoded = self.label_encoder.transform(transactions_df['category'])
 
-        # Train pipeline
-        self.pipeline.fit(transactions_df['description'], y_encoded)
+        # Train pipeline on the same normalized text used at inference time
+        self.pipeline.fit(transactions_df['description'].map(normalize_merchant), y_encoded)
         self.model = self.pipeline # The pipeline is our model
+        self.clear_cache()
+
+    def partial_fit(self, transactions_df: pd.DataFrame, categories: Optional[List[str]] = None):
+        """
+        Updates an incremental model in place with newly categorized/corrected transactions.
+        transactions_df should have 'description' and 'category' columns.
+        On the first call the category universe is taken from `categories` (or the batch itself);
+        later batches must only contain known categories, otherwise a full .train() is required.
+        """
+        if not self.incremental:
+            raise ValueError("partial_fit requires a categorizer created with incremental=True.")
+        if transactions_df.empty:
+            return
+
+        if self.model is None:
+            self.label_encoder.fit(categories if categories is not None else transactions_df['category'])
+        else:
+            unseen = set(transactions_df['category']) - set(self.label_encoder.classes_)
+            if unseen:
+                raise ValueError(f"Unseen categories {sorted(unseen)}; full retrain required.")
+
+        y_encoded = self.label_encoder.transform(transactions_df['category'])
+        features = self.pipeline.named_steps['hashing'].transform(transactions_df['description'].map(normalize_merchant))
+        self.pipeline.named_steps['classifier'].partial_fit(
+            features, y_encoded, classes=np.arange(len(self.label_encoder.classes_))
+        )
+        self.model = self.pipeline
+        self.clear_cache()
 
     def predict(self, description: str) -> str:
         """
         Predicts the category for a given transaction description.
         """
+        return self.predict_many([description])[0]
+
+    def predict_many(self, descriptions: List[str]) -> List[str]:
+        """
+        Predicts the most likely category for each description in a batch.
+        """
+        return [ranked[0][0] for ranked in self.predict_proba_many(descriptions, top_k=1)]
+
+    def predict_proba_many(self, descriptions: List[str], top_k: int = 3) -> List[List[Tuple[str, float]]]:
+        """
+        Returns the top_k (category, confidence) pairs for each description, best first.
+        Descriptions are normalized to merchant keys; exact merchant index hits and cached keys
+        skip the model, and all remaining unique keys are vectorized in a single transform call.
+        """
         if self.model is None:
             raise ValueError("Model not trained. Call .train() first.")
-        prediction_encoded = self.model.predict([description])
-        return self.label_encoder.inverse_transform(prediction_encoded)[0]
+
+        keys = [normalize_merchant(d) for d in descriptions]
+        ranked_by_key = {}
+        if self.merchant_index is not None:
+            unique_keys = list(dict.fromkeys(keys))
+            for key, category in zip(unique_keys, self.merchant_index.lookup_many(unique_keys)):
+                if category is not None:
+                    ranked_by_key[key] = [(category, 1.0)]
+        misses = []
+        for key in keys:
+            if key in ranked_by_key:
+                continue
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                ranked_by_key[key] = cached
+            else:
+                ranked_by_key[key] = None
+                misses.append(key)
+
+        if misses:
+            for key, ranked in zip(misses, self._rank_categories(misses)):
+                ranked_by_key[key] = ranked
+                self._cache_put(key, ranked)
+
+        return [ranked_by_key[key][:top_k] for key in keys]
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _rank_categories(self, texts: List[str]) -> List[List[Tuple[str, float]]]:
+        probabilities = self.model.predict_proba(texts)
+        categories = self.label_encoder.inverse_transform(self.model.classes_)
+        order = np.argsort(-probabilities, axis=1)
+        return [
+            [(categories[idx], round(float(row[idx]), 4)) for idx in row_order]
+            for row, row_order in zip(probabilities, order)
+        ]
+
+    def _cache_put(self, key: str, ranked: List[Tuple[str, float]]):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = ranked
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def to_artifacts(self) -> Tuple[dict, dict]:
+        """
+        Returns (artifacts, metadata) for ModelRegistry.register.
+        """
+        artifacts = {"model": self.model, "encoder": self.label_encoder}
+        metadata = {
+            "incremental": self.incremental,
+            "checkpoint": self.checkpoint.isoformat() if self.checkpoint else None
+        }
+        return artifacts, metadata
+
+    @classmethod
+    def from_artifacts(cls, artifacts: dict, metadata: dict) -> "TransactionCategorizer":
+        """
+        Rebuilds a categorizer from ModelRegistry.load output (usable as a ModelHandle loader).
+        """
+        categorizer = cls(incremental=metadata.get("incremental", False))
+        categorizer.model = categorizer.pipeline = artifacts["model"]
+        categorizer.label_encoder = artifacts["encoder"]
+        if metadata.get("checkpoint"):
+            categorizer.checkpoint = datetime.fromisoformat(metadata["checkpoint"])
+        return categorizer
 
     def save_model(self, path: str):
         joblib.dump(self.model, path + '_model.pkl')
         joblib.dump(self.label_encoder, path + '_encoder.pkl')
+        with open(path + '_meta.json', 'w') as f:
+            json.dump({
+                "incremental": self.incremental,
+                "checkpoint": self.checkpoint.isoformat() if self.checkpoint else None
+            }, f)
 
     def load_model(self, path: str):
         self.model = joblib.load(path + '_model.pkl')
         self.label_encoder = joblib.load(path + '_encoder.pkl')
+        if os.path.exists(path + '_meta.json'):
+            with open(path + '_meta.json') as f:
+                meta = json.load(f)
+            self.incremental = meta.get("incremental", False)
+            self.checkpoint = datetime.fromisoformat(meta["checkpoint"]) if meta.get("checkpoint") else None
+        if self.model is not None:
+            self.pipeline = self.model
+        self.clear_cache()
 
 # Example usage (in a script, not production code)
 if __name__ == "__main__":
@@ -65,4 +233,5 @@ if __name__ == "__main__":
 
     print(f"Predicted: {categorizer.predict('DUNKIN DONUTS')}")
     print(f"Predicted: {categorizer.predict('TRADER JOES')}")
-    print(f"Predicted: {categorizer.predict('GOOGLE PLAY')}")
\ No newline at end of file
+    print(f"Predicted: {categorizer.predict('GOOGLE PLAY')}")
+    print(f"Top-3 batch: {categorizer.predict_proba_many(['STARBUCKS #1234', 'UBER *TRIP', 'NETFLIX.COM'])}")
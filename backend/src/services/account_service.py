@@ -1,21 +1,40 @@
-from typing import Optional, List
+import asyncio
+import json
+import urllib3
+from typing import Dict, Optional, List
+from sqlalchemy import func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from ..db.models.account import Account
-from ..models.financial import AccountCreate, AccountRead, PlaidAccountData
+from ..db.models.plaid_item_cursor import PlaidItemCursor
+from ..db.upsert import upsert_rows
+from ..models.financial import AccountCreate, AccountRead
+from ..core.config import settings
 from ..core.exceptions import NotFoundException
-from plaid import PlaidApi, Environment
+from plaid import ApiException
+from plaid.model.accounts_get_request import AccountsGetRequest
 from plaid.model.transactions_sync_request import TransactionsSyncRequest
+from .data_ingestion_service import DataIngestionService
+from .plaid_client import PlaidClient, get_plaid_client
+from .plaid_parser import PlaidTransactionParser
+
+# Plaid error returned when an item's transactions change while a sync is paginating
+SYNC_MUTATION_ERROR = "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+MAX_SYNC_RESTARTS = 3
+# Prefix of the placeholder accounts stored for items linked before their real accounts were fetched
+PLACEHOLDER_ACCOUNT_PREFIX = "dummy_acc_"
 
 class AccountService:
-    def __init__(self, db_session: AsyncSession):
+    def __init__(self, db_session: AsyncSession, plaid_client: Optional[PlaidClient] = None):
         self.db_session = db_session
-        # Plaid client initialization (simplified)
-        # self.plaid_client = PlaidApi(
-        #     Environment.Sandbox,
-        #     client_id="YOUR_PLAID_CLIENT_ID",
-        #     secret="YOUR_PLAID_SECRET"
-        # )
+        self._plaid_client = plaid_client
+
+    @property
+    def plaid_client(self) -> PlaidClient:
+        # Falls back to the process-wide pooled client (Celery workers, scripts)
+        if self._plaid_client is None:
+            self._plaid_client = get_plaid_client()
+        return self._plaid_client
 
     async def create_user_account(self, user_id: int, account_in: AccountCreate) -> AccountRead:
         # This would likely involve exchanging public token via Plaid API first
@@ -45,20 +64,243 @@ class AccountService:
         accounts = result.scalars().all()
         return [AccountRead.model_validate(acc) for acc in accounts]
     
-    async def sync_transactions_for_account(self, account_id: int):
+    async def get_linked_user_ids(self) -> List[int]:
+        """
+        Returns the ids of users with at least one linked account.
+        """
+        result = await self.db_session.execute(select(Account.user_id).distinct().order_by(Account.user_id))
+        return list(result.scalars().all())
+
+    async def sync_transactions_for_account(self, account_id: int) -> Dict[str, int]:
         """
         Synchronizes transactions for a specific account using Plaid.
+        Plaid syncs per item, so this syncs every account linked through the same item.
         """
         db_account = await self.db_session.get(Account, account_id)
         if not db_account:
             raise NotFoundException(detail="Account not found.")
-        
-        # Placeholder for Plaid API call
-        # request = TransactionsSyncRequest(access_token=db_account.access_token)
-        # response = self.plaid_client.transactions_sync(request)
-        # new_transactions = response.get('added', [])
-        # For each new transaction, create a Transaction DB entry
         print(f"Syncing transactions for account: {db_account.name} (ID: {account_id})")
-        # Logic to save new transactions, update existing ones, etc.
+        return await self.sync_item(db_account.plaid_item_id)
+
+    async def sync_item(self, plaid_item_id: str) -> Dict[str, int]:
+        """
+        Pulls the item's transaction deltas since its stored cursor with /transactions/sync, writes them
+        page by page and stores the new cursor in the same database transaction, so every sync only
+        fetches changes made since the previous one and a failed sync never advances the cursor.
+        """
+        result = await self.db_session.execute(select(Account).where(Account.plaid_item_id == plaid_item_id))
+        accounts = result.scalars().all()
+        if not accounts:
+            raise NotFoundException(detail="No accounts linked to this Plaid item.")
+        cursor = await self.db_session.scalar(select(PlaidItemCursor.cursor).where(PlaidItemCursor.plaid_item_id == plaid_item_id))
+
+        counts = await self.sync_item_changes(DataIngestionService(self.db_session), plaid_item_id, accounts, cursor)
+        await self.db_session.commit()
+        return counts
+
+    async def sync_user_items(self, user_id: int, max_concurrency: Optional[int] = None,
+                              item_timeout: Optional[float] = None) -> Dict[str, dict]:
+        """
+        Syncs all of a user's Plaid items. Accounts are grouped by plaid_item_id so each item is synced
+        once; up to max_concurrency (settings.PLAID_SYNC_CONCURRENCY) items are synced at the same time,
+        their page writes taking turns on the session, and each item's Plaid requests are bounded by
+        item_timeout seconds. Everything is committed in one database transaction at the end. Failed or
+        timed-out items keep their old cursor, so their pages are fetched (and re-upserted) next sync.
+        Returns {plaid_item_id: counts} and {'error': message} for failed items.
+        """
+        max_concurrency = max_concurrency or settings.PLAID_SYNC_CONCURRENCY
+        item_timeout = item_timeout or settings.PLAID_SYNC_ITEM_TIMEOUT_SECONDS
+        result = await self.db_session.execute(select(Account).where(Account.user_id == user_id).order_by(Account.id))
+        items: Dict[str, List[Account]] = {}
+        for account in result.scalars().all():
+            items.setdefault(account.plaid_item_id, []).append(account)
+        result = await self.db_session.execute(
+            select(PlaidItemCursor.plaid_item_id, PlaidItemCursor.cursor).where(PlaidItemCursor.plaid_item_id.in_(list(items)))
+        )
+        cursors = dict(result.all())
+        print(f"Syncing {len(items)} Plaid items for user {user_id} ({max_concurrency} at a time)...")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        write_lock = asyncio.Lock()
+        ingestion = DataIngestionService(self.db_session)
+
+        async def _sync(plaid_item_id: str, accounts: List[Account]) -> Dict[str, int]:
+            async with semaphore:
+                try:
+                    return await self.sync_item_changes(
+                        ingestion, plaid_item_id, accounts, cursors.get(plaid_item_id), timeout=item_timeout, write_lock=write_lock
+                    )
+                except (asyncio.TimeoutError, urllib3.exceptions.TimeoutError):
+                    raise TimeoutError(f"timed out after {item_timeout}s")
+
+        synced = await asyncio.gather(*(_sync(item_id, accounts) for item_id, accounts in items.items()), return_exceptions=True)
+
+        summary = {}
+        for plaid_item_id, counts in zip(items, synced):
+            if isinstance(counts, Exception):
+                print(f"Error syncing Plaid item {plaid_item_id} for user {user_id}: {counts}")
+                summary[plaid_item_id] = {"error": str(counts) or type(counts).__name__}
+                continue
+            summary[plaid_item_id] = counts
         await self.db_session.commit()
-        print("Transactions synced.")
\ No newline at end of file
+        return summary
+
+    async def link_plaid_accounts(self, user_id: int, plaid_item_id: str, access_token: str, plaid_accounts: List[dict]) -> Dict[str, int]:
+        """
+        Creates or refreshes the item's Account rows from raw Plaid account objects (/accounts/get, or the
+        'accounts' of /transactions/sync pages). Placeholder accounts stored before the item's real
+        accounts were known are reassigned to the first new real accounts, keeping their transactions.
+        Does not commit; returns {plaid_account_id: account id} for all of the item's accounts.
+        """
+        linked = await self._item_account_ids(plaid_item_id)
+        new_ids = [account["account_id"] for account in plaid_accounts if account["account_id"] not in linked]
+        placeholders = [plaid_account_id for plaid_account_id in linked if plaid_account_id.startswith(PLACEHOLDER_ACCOUNT_PREFIX)]
+        for placeholder, plaid_account_id in zip(placeholders, new_ids):
+            await self.db_session.execute(
+                update(Account).where(Account.id == linked[placeholder]).values(plaid_account_id=plaid_account_id)
+            )
+        if plaid_accounts:
+            await upsert_rows(
+                self.db_session, Account.__table__,
+                [_account_row(user_id, plaid_item_id, access_token, account) for account in plaid_accounts],
+                index_elements=["plaid_account_id"],
+                update_columns=["access_token", "name", "official_name", "type", "subtype",
+                                "current_balance", "available_balance", "iso_currency_code"],
+                extra_set={"updated_at": func.now()}
+            )
+        return await self._item_account_ids(plaid_item_id)
+
+    async def _item_account_ids(self, plaid_item_id: str) -> Dict[str, int]:
+        result = await self.db_session.execute(
+            select(Account.plaid_account_id, Account.id).where(Account.plaid_item_id == plaid_item_id).order_by(Account.id)
+        )
+        return dict(result.all())
+
+    async def sync_item_changes(self, ingestion: DataIngestionService, plaid_item_id: str, accounts: List[Account],
+                                cursor: Optional[str] = None, timeout: Optional[float] = None,
+                                write_lock: Optional[asyncio.Lock] = None) -> Dict[str, int]:
+        """
+        Pages through /transactions/sync from `cursor` (None = full history) until has_more is false and
+        writes each page as it is parsed: rows are re-chunked into INGESTION_BATCH_SIZE batches and
+        upserted on plaid_transaction_id, so only about one page and one batch are held in memory, even
+        for the first sync's multi-year backfill. The item's accounts are linked from the pages before
+        their rows are written; /accounts/get is called only when rows reference an account that is
+        neither linked nor listed there. The cursor is stored after the last page, and only if every row
+        was mapped to an account. If Plaid reports the item changed mid-pagination, the loop restarts
+        from the original cursor as Plaid requires and re-upserts the same rows (unchanged re-deliveries
+        are skipped). timeout (seconds) bounds the time spent in Plaid requests; each is sent with the
+        time remaining. Database writes are serialized with write_lock, so items syncing concurrently
+        can share the session. Does not commit.
+        Returns {'inserted', 'updated', 'removed', 'skipped', 'unmapped'} counts.
+        """
+        user_id, access_token = accounts[0].user_id, accounts[0].access_token
+        write_lock = write_lock or asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        request_seconds = 0.0
+
+        async def _request(send):
+            # Only time spent waiting on Plaid counts against the timeout, not writing the pages
+            nonlocal request_seconds
+            remaining = None
+            if timeout is not None:
+                remaining = timeout - request_seconds
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+            start = loop.time()
+            try:
+                return await send(remaining)
+            finally:
+                request_seconds += loop.time() - start
+
+        counts = {"inserted": 0, "updated": 0, "removed": 0, "skipped": 0, "unmapped": 0}
+        pages = 0
+        for attempt in range(MAX_SYNC_RESTARTS + 1):
+            parser = PlaidTransactionParser(settings.INGESTION_BATCH_SIZE)
+            listed, linked, next_cursor, looked_up = {}, set(), cursor, False
+            counts["unmapped"] = 0
+            async with write_lock:
+                account_ids = await self._item_account_ids(plaid_item_id)
+            try:
+                has_more = True
+                while has_more:
+                    page = await _request(lambda remaining: self._transactions_sync_page(access_token, next_cursor, remaining))
+                    next_cursor, has_more = page["next_cursor"], page["has_more"]
+                    pages += 1
+                    listed.update((account["account_id"], account) for account in page.get("accounts", []))
+                    removed_ids = {tx["transaction_id"] for tx in page.get("removed", []) if tx.get("transaction_id")}
+                    batches = parser.feed(page.get("added", []) + page.get("modified", []))
+                    if removed_ids or not has_more:
+                        # Buffered rows of earlier pages are written before this page's removals, which win
+                        batches.append(parser.flush())
+
+                    referenced = {plaid_account_id for batch in batches for plaid_account_id in batch['plaid_account_id'].dropna()}
+                    if not looked_up and referenced - set(account_ids) - set(listed):
+                        response = await _request(
+                            lambda remaining: self.plaid_client.accounts_get(AccountsGetRequest(access_token=access_token), remaining)
+                        )
+                        listed.update((account["account_id"], account) for account in response.get("accounts", []))
+                        looked_up = True
+
+                    async with write_lock:
+                        if set(listed) - linked:
+                            account_ids = await self.link_plaid_accounts(user_id, plaid_item_id, access_token, list(listed.values()))
+                            linked.update(listed)
+                        for i, batch in enumerate(batches):
+                            batch_removed_ids = removed_ids if i == len(batches) - 1 else set()
+                            if batch.empty and not batch_removed_ids:
+                                continue
+                            batch_counts = await ingestion.apply_item_changes(user_id, account_ids, batch, batch_removed_ids)
+                            for key, value in batch_counts.items():
+                                counts[key] += value
+            except ApiException as e:
+                if _plaid_error_code(e) != SYNC_MUTATION_ERROR or attempt == MAX_SYNC_RESTARTS:
+                    raise
+                print("Plaid transactions changed during pagination; restarting sync from the original cursor.")
+                continue
+            counts["skipped"] += parser.skipped
+            async with write_lock:
+                if counts["unmapped"]:
+                    # Advancing past them would lose these transactions for good; they are fetched again next sync
+                    print(f"{counts['unmapped']} transactions of item {plaid_item_id} belong to accounts Plaid did not return; keeping the old cursor.")
+                else:
+                    await self.save_cursor(plaid_item_id, user_id, next_cursor)
+            print(f"Transactions synced for item {plaid_item_id} ({pages} pages): {counts}")
+            return counts
+
+    async def save_cursor(self, plaid_item_id: str, user_id: int, cursor: str):
+        """
+        Stores the item's next_cursor. Does not commit.
+        """
+        await upsert_rows(
+            self.db_session, PlaidItemCursor.__table__, [{"plaid_item_id": plaid_item_id, "user_id": user_id, "cursor": cursor}],
+            index_elements=["plaid_item_id"], update_columns=["cursor"], extra_set={"updated_at": func.now()}
+        )
+
+    async def _transactions_sync_page(self, access_token: str, cursor: Optional[str], timeout: Optional[float] = None) -> dict:
+        request = TransactionsSyncRequest(access_token=access_token, count=settings.PLAID_SYNC_PAGE_SIZE)
+        if cursor:
+            request.cursor = cursor
+        # Raw JSON: no plaid model object is built per transaction before the columnar parser runs
+        return await self.plaid_client.transactions_sync(request, timeout)
+
+def _account_row(user_id: int, plaid_item_id: str, access_token: str, account: dict) -> dict:
+    balances = account.get("balances") or {}
+    return {
+        "user_id": user_id,
+        "plaid_account_id": account["account_id"],
+        "plaid_item_id": plaid_item_id,
+        "access_token": access_token,
+        "name": account.get("name") or account.get("official_name") or account["account_id"],
+        "official_name": account.get("official_name"),
+        "type": account.get("type") or "other",
+        "subtype": account.get("subtype"),
+        "current_balance": balances.get("current"),
+        "available_balance": balances.get("available"),
+        "iso_currency_code": balances.get("iso_currency_code"),
+    }
+
+def _plaid_error_code(error: ApiException) -> Optional[str]:
+    try:
+        return json.loads(error.body).get("error_code")
+    except (TypeError, ValueError):
+        return None
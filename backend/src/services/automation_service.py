@@ -1,10 +1,13 @@
+from __future__ import annotations
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
 from ..ml_engine.budget_optimizer import BudgetOptimizer
 from ..ml_engine.savings_strategist import SavingsStrategist
 from ..services.notification_service import NotificationService
 from ..db.models.user import User
-import pandas as pd
+from ..core.lazy_imports import lazy_import
+pd = lazy_import("pandas")
 
 class AutomationService:
     def __init__(self, db_session: AsyncSession):
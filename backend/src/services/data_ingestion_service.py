@@ -1,43 +1,259 @@
-import pandas as pd
+from __future__ import annotations
+
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..db.models.transaction import Transaction
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Set, Union
+from ..db.models.transaction import Transaction, CATEGORY_SOURCE_MODEL, CATEGORY_SOURCE_PLAID, CATEGORY_SOURCE_USER
 from ..db.models.account import Account
-from datetime import datetime
+from ..db.models.recurring_charge_state import RecurringChargeState
+from ..db.upsert import upsert_rows
+from ..core.config import settings
+from ..ml_engine.model_registry import get_model_handle
+from ..ml_engine.merchant_index import MerchantIndex, MERCHANT_INDEX_MODEL_NAME
+from ..ml_engine.transaction_categorizer import TransactionCategorizer, CATEGORIZER_MODEL_NAME, normalize_merchant
+from ..ml_engine.recurring_detector import RecurringDetector
+from .rollup_service import RollupService, UNCATEGORIZED
+from .plaid_parser import PlaidTransactionParser
+from datetime import timezone
+from ..core.lazy_imports import lazy_import
+pd = lazy_import("pandas")
+
+# Columns of the frames handed to the rollup and recurring-charge updates
+TRANSACTION_FRAME_COLUMNS = ['user_id', 'account_id', 'description', 'amount', 'date', 'category', 'type']
+# Columns written to the transactions table by the Plaid upsert
+TRANSACTION_COLUMNS = ['plaid_transaction_id', 'account_id', 'description', 'amount', 'date', 'category', 'type']
+
+def _latest_registered(name: str, loader):
+    """Returns the process-wide latest version of a registered model, or None if none is published yet."""
+    try:
+        return get_model_handle(
+            settings.MODEL_REGISTRY_DIR, name, loader, poll_interval=settings.MODEL_REFRESH_INTERVAL_SECONDS
+        ).get()
+    except FileNotFoundError:
+        return None
+
+def categorize_descriptions(descriptions: List[str], merchant_index: Optional[MerchantIndex] = None,
+                            categorizer: Optional[TransactionCategorizer] = None) -> List[str]:
+    """
+    Categorizes a batch of descriptions. The exact-match merchant index is consulted first; only misses
+    are sent, as one batch, to the ML categorizer. Models default to the latest registered versions.
+    """
+    merchant_index = merchant_index or _latest_registered(MERCHANT_INDEX_MODEL_NAME, MerchantIndex.from_artifacts)
+    categorizer = categorizer or _latest_registered(CATEGORIZER_MODEL_NAME, TransactionCategorizer.from_artifacts)
+
+    categories = merchant_index.lookup_many(descriptions) if merchant_index else [None] * len(descriptions)
+    miss_positions = [i for i, category in enumerate(categories) if category is None]
+    if miss_positions and categorizer is not None and categorizer.model is not None:
+        predicted = categorizer.predict_many([descriptions[i] for i in miss_positions])
+        for i, category in zip(miss_positions, predicted):
+            categories[i] = category
+
+    if merchant_index:
+        print(f"Merchant index stats: {merchant_index.stats()}")
+    return [category or UNCATEGORIZED for category in categories]
+
+async def _iterate_async(items: Iterable):
+    for item in items:
+        yield item
 
 class DataIngestionService:
-    def __init__(self, db_session: AsyncSession):
+    def __init__(self, db_session: AsyncSession, merchant_index: Optional[MerchantIndex] = None,
+                 categorizer: Optional[TransactionCategorizer] = None, recurring_detector: Optional[RecurringDetector] = None):
         self.db_session = db_session
+        self.merchant_index = merchant_index
+        self.categorizer = categorizer
+        self.recurring_detector = recurring_detector or RecurringDetector()
 
-    async def ingest_transactions_from_plaid(self, user_id: int, account_id: int, transactions_data: list):
+    async def ingest_transactions_from_plaid(self, user_id: int, account_id: int, transactions_data: list) -> Dict[str, int]:
         """
         Ingests raw transaction data from Plaid and stores it in the database.
-        Performs basic data cleaning and transformation.
-        """
-        print(f"Ingesting {len(transactions_data)} transactions for account {account_id}...")
-        new_transactions = []
-        for tx_data in transactions_data:
-            # Basic validation and transformation
-            try:
-                tx = Transaction(
-                    user_id=user_id,
-                    account_id=account_id,
-                    plaid_transaction_id=tx_data.get('transaction_id'),
-                    description=tx_data.get('name', 'N/A'),
-                    amount=tx_data.get('amount'), # Plaid amounts are usually positive for debits, negative for credits
-                    date=datetime.strptime(tx_data.get('date'), '%Y-%m-%d'),
-                    category=tx_data.get('personal_finance_category', {}).get('primary') or tx_data.get('category', ['Uncategorized'])[0],
-                    type='debit' if tx_data.get('amount', 0) > 0 else 'credit' # Adjust based on Plaid's convention
-                )
-                new_transactions.append(tx)
-            except Exception as e:
-                print(f"Skipping invalid transaction data: {tx_data} - Error: {e}")
-
-        if new_transactions:
-            self.db_session.add_all(new_transactions)
+        Performs basic data cleaning and transformation. Re-delivered transactions are deduplicated
+        on plaid_transaction_id (see ingest_plaid_changes).
+        """
+        return await self.ingest_plaid_changes(user_id, account_id, transactions_data)
+
+    async def ingest_plaid_changes(self, user_id: int, account_id: int, added: list, modified: Optional[list] = None,
+                                   removed: Optional[list] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Applies one page of Plaid transaction changes in a single database transaction:
+        added/modified transactions are written with bulk INSERT ... ON CONFLICT (plaid_transaction_id)
+        DO UPDATE in batches of batch_size (settings.INGESTION_BATCH_SIZE) and removed ones
+        ({'transaction_id': ...}) are deleted. The existing versions of the batch's rows are loaded up
+        front so that unchanged re-deliveries are skipped, stored (possibly user-corrected) categories
+        are kept when Plaid sends none (user corrections are always kept), and the daily rollup is
+        corrected for every update and removal. Each row's category_source records whether its category
+        came from Plaid, the user or the categorizer.
+        Recurring-charge states only fold in new transactions.
+        Returns {'inserted', 'updated', 'removed', 'skipped'} counts.
+        """
+        batch_size = batch_size or settings.INGESTION_BATCH_SIZE
+        modified, removed = modified or [], removed or []
+        print(f"Ingesting {len(added)} added, {len(modified)} modified and {len(removed)} removed transactions for account {account_id}...")
+        parser = PlaidTransactionParser(batch_size)
+        removed_ids = {tx.get('transaction_id') for tx in removed} - {None}
+        parsed = parser.parse_page(list(added) + list(modified)).assign(account_id=account_id)
+        counts = await self._apply_changes(user_id, parsed, removed_ids, batch_size)
+        counts["skipped"] += parser.skipped
+        await self.db_session.commit()
+        print(f"Plaid transactions ingested: {counts}")
+        return counts
+
+    async def ingest_plaid_stream(self, user_id: int, account_id: int, pages: Union[Iterable[list], AsyncIterable[list]],
+                                  batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Ingests a long stream of pages of added Plaid transactions (e.g. a multi-year backfill) in
+        constant memory: pages are parsed as they arrive and written and committed in fixed-size
+        batches, so at most one page and one batch are held at a time.
+        Returns the summed {'inserted', 'updated', 'removed', 'skipped'} counts.
+        """
+        batch_size = batch_size or settings.INGESTION_BATCH_SIZE
+        parser = PlaidTransactionParser(batch_size)
+        counts = {"inserted": 0, "updated": 0, "removed": 0, "skipped": 0}
+        batches = parser.abatches(pages if hasattr(pages, '__aiter__') else _iterate_async(pages))
+        async for batch in batches:
+            for key, value in (await self._apply_changes(user_id, batch.assign(account_id=account_id), set(), batch_size)).items():
+                counts[key] += value
             await self.db_session.commit()
-            print(f"Successfully ingested {len(new_transactions)} new transactions.")
-        else:
-            print("No valid transactions to ingest.")
+        counts["skipped"] += parser.skipped
+        print(f"Plaid transaction stream for account {account_id} ingested: {counts}")
+        return counts
+
+    async def apply_item_changes(self, user_id: int, account_ids: Dict[str, int], parsed: pd.DataFrame, removed_ids: Set[str],
+                                 batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Applies a batch of a Plaid item's changes (see AccountService.sync_item_changes): parsed
+        rows are mapped from their Plaid account to our account ids (account_ids: plaid_account_id -> id)
+        and written like ingest_plaid_changes. Rows of Plaid accounts missing from account_ids are not
+        written and are counted as 'unmapped'; callers must not advance the item's cursor past them.
+        Does not commit, so callers can store the item's sync cursor in the same transaction.
+        """
+        mapped = parsed.assign(account_id=parsed['plaid_account_id'].map(account_ids))
+        unmapped = mapped['account_id'].isna()
+        counts = await self._apply_changes(user_id, mapped[~unmapped], removed_ids, batch_size or settings.INGESTION_BATCH_SIZE)
+        counts["unmapped"] = int(unmapped.sum())
+        return counts
+
+    async def _apply_changes(self, user_id: int, parsed: pd.DataFrame, removed_ids: Set[str], batch_size: int) -> Dict[str, int]:
+        """
+        Writes a parsed batch (see PlaidTransactionParser) with an 'account_id' column and deletes
+        removed_ids. Does not commit.
+        """
+        counts = {"inserted": 0, "updated": 0, "removed": 0, "skipped": 0}
+        # Later versions of a transaction in the same page win, and a removal beats both
+        changes = parsed[~parsed['plaid_transaction_id'].isin(removed_ids)]
+        changes = changes.drop_duplicates('plaid_transaction_id', keep='last')
+        counts["skipped"] += len(parsed) - len(changes)
+        rows = changes[TRANSACTION_COLUMNS].assign(user_id=user_id, account_id=changes['account_id'].astype(int)).to_dict('records')
+
+        inserted, updated, previous = [], [], []
+        existing = await self._load_by_plaid_ids([row['plaid_transaction_id'] for row in rows], batch_size)
+        for row in rows:
+            row['date'] = row['date'].to_pydatetime()
+            row['category_source'] = CATEGORY_SOURCE_PLAID if row['category'] else None
+            old = existing.get(row['plaid_transaction_id'])
+            if old is None:
+                inserted.append(row)
+                continue
+            if not row['category'] or old['category_source'] == CATEGORY_SOURCE_USER:
+                row['category'], row['category_source'] = old['category'], old['category_source']
+            if all(row[column] == old[column] for column in ('account_id', 'description', 'amount', 'category', 'category_source', 'type')) \
+                    and row['date'].date() == old['date'].date():
+                counts["skipped"] += 1 # Unchanged re-delivery
+                continue
+            updated.append(row)
+            previous.append(old)
+
+        uncategorized = [row for row in inserted if not row['category']]
+        if uncategorized:
+            categories = self.categorize_descriptions([row['description'] for row in uncategorized])
+            for row, category in zip(uncategorized, categories):
+                row['category'], row['category_source'] = category, CATEGORY_SOURCE_MODEL
+
+        await upsert_rows(
+            self.db_session, Transaction.__table__, inserted + updated, index_elements=["plaid_transaction_id"],
+            update_columns=["account_id", "description", "amount", "date", "category", "category_source", "type"],
+            batch_size=batch_size, extra_set={"updated_at": func.now()}
+        )
+        removed_rows = list((await self._load_by_plaid_ids(list(removed_ids), batch_size)).values())
+        removed_list = [row['plaid_transaction_id'] for row in removed_rows]
+        for start in range(0, len(removed_list), batch_size):
+            await self.db_session.execute(
+                delete(Transaction).where(Transaction.plaid_transaction_id.in_(removed_list[start:start + batch_size]))
+            )
+        counts["skipped"] += len(removed_ids) - len(removed_rows) # Removals of transactions we never stored
+        counts.update(inserted=len(inserted), updated=len(updated), removed=len(removed_rows))
+
+        rollup = RollupService(self.db_session)
+        if previous or removed_rows:
+            await rollup.retract_transactions(pd.DataFrame(previous + removed_rows, columns=TRANSACTION_FRAME_COLUMNS))
+        if inserted or updated:
+            await rollup.apply_transactions(pd.DataFrame(inserted + updated, columns=TRANSACTION_FRAME_COLUMNS))
+        if inserted:
+            await self.update_recurring_charges(user_id, pd.DataFrame(inserted, columns=TRANSACTION_FRAME_COLUMNS))
+        return counts
+
+    async def _load_by_plaid_ids(self, plaid_ids: List[str], batch_size: int) -> Dict[str, dict]:
+        """
+        Loads the stored versions of the given Plaid transactions, keyed by plaid_transaction_id.
+        """
+        existing = {}
+        for start in range(0, len(plaid_ids), batch_size):
+            result = await self.db_session.execute(
+                select(*(Transaction.__table__.c[column] for column in ['plaid_transaction_id', 'category_source', *TRANSACTION_FRAME_COLUMNS]))
+                .where(Transaction.plaid_transaction_id.in_(plaid_ids[start:start + batch_size]))
+            )
+            existing.update({row['plaid_transaction_id']: dict(row) for row in result.mappings()})
+        return existing
+
+    async def update_recurring_charges(self, user_id: int, transactions_df: pd.DataFrame) -> int:
+        """
+        Folds newly ingested transactions ('description', 'amount', 'date') into the user's
+        per-merchant recurring-charge states. Only the states of merchants present in the batch are
+        loaded and written back, and each transaction is an O(1) state update.
+        Does not commit; returns the number of states written.
+        """
+        merchants = {normalize_merchant(d) for d in transactions_df['description']} - {""}
+        if not merchants:
+            return 0
+
+        result = await self.db_session.execute(
+            select(RecurringChargeState.merchant, RecurringChargeState.state)
+            .where(RecurringChargeState.user_id == user_id, RecurringChargeState.merchant.in_(merchants))
+        )
+        states = {(user_id, merchant): state for merchant, state in result.all()}
+        touched = self.recurring_detector.update_many(states, transactions_df)
+
+        rows = []
+        for (_, merchant), state in touched.items():
+            next_date = self.recurring_detector.next_expected_date(state)
+            rows.append({
+                "user_id": user_id,
+                "merchant": merchant,
+                "state": state,
+                "is_recurring": self.recurring_detector.is_recurring(state),
+                "next_expected_date": next_date.replace(tzinfo=timezone.utc) if next_date else None,
+            })
+        return await upsert_rows(
+            self.db_session, RecurringChargeState.__table__, rows,
+            index_elements=["user_id", "merchant"], update_columns=["state", "is_recurring", "next_expected_date"]
+        )
+
+    async def get_recurring_charges(self, user_id: int) -> List[dict]:
+        """
+        Returns the user's detected recurring charges from the persisted states, without touching transactions.
+        """
+        result = await self.db_session.execute(
+            select(RecurringChargeState.merchant, RecurringChargeState.state)
+            .where(RecurringChargeState.user_id == user_id, RecurringChargeState.is_recurring.is_(True))
+            .order_by(RecurringChargeState.next_expected_date)
+        )
+        return [{"merchant": merchant, **self.recurring_detector.summarize(state)} for merchant, state in result.all()]
+
+    def categorize_descriptions(self, descriptions: List[str]) -> List[str]:
+        """
+        Categorizes descriptions that arrived without a Plaid category.
+        """
+        return categorize_descriptions(descriptions, self.merchant_index, self.categorizer)
 
     async def update_account_balances(self, account_id: int, current_balance: float, available_balance: float):
         """
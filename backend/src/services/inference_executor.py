@@ -0,0 +1,138 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+# Worker-side entry points. They import the ML stack lazily so the API process that owns the
+# executor never loads pandas/scikit-learn/statsmodels itself; each worker loads models once
+# (in _init_worker) and keeps them in process-wide ModelHandles that pick up new registry versions
+# every MODEL_REFRESH_INTERVAL_SECONDS.
+
+def _init_worker():
+    from ..ml_engine.behavior_analyzer import BehaviorAnalyzer, BEHAVIOR_SEGMENTS_MODEL_NAME
+    from .data_ingestion_service import _latest_registered, categorize_descriptions
+
+    # Pre-warm: map the latest artifacts and run one prediction so the first request pays nothing
+    categorize_descriptions(["warmup"])
+    _latest_registered(BEHAVIOR_SEGMENTS_MODEL_NAME, BehaviorAnalyzer.from_artifacts)
+
+def _worker_ready() -> bool:
+    return True
+
+def _categorize_batch(descriptions: List[str]) -> List[str]:
+    from .data_ingestion_service import categorize_descriptions
+    return [str(category) for category in categorize_descriptions(descriptions)]
+
+def _forecast_cash_flows(transactions: list, steps: int, method: str) -> Dict[int, list]:
+    import pandas as pd
+    from ..ml_engine.forecasting import FinancialForecaster
+    df = pd.DataFrame(transactions)
+    df['date'] = pd.to_datetime(df['date'], utc=True)
+    return FinancialForecaster().forecast_cash_flows(df, steps=steps, max_workers=1, method=method)
+
+def _assign_segments(transactions: list) -> Dict[int, int]:
+    import pandas as pd
+    from ..ml_engine.behavior_analyzer import BehaviorAnalyzer, BEHAVIOR_SEGMENTS_MODEL_NAME
+    from .data_ingestion_service import _latest_registered
+    analyzer = _latest_registered(BEHAVIOR_SEGMENTS_MODEL_NAME, BehaviorAnalyzer.from_artifacts)
+    if analyzer is None:
+        return {}
+    return {int(user_id): int(segment) for user_id, segment in analyzer.assign_segments(pd.DataFrame(transactions)).items()}
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound model inference in a pool of pre-warmed worker processes so sklearn/statsmodels
+    never block the API event loop. Single-description categorize() calls that arrive within
+    batch_window seconds of each other (or until max_batch_size is reached) are coalesced into one
+    vectorized predict in a worker.
+    """
+    def __init__(self, max_workers: int = 2, batch_window: float = 0.005, max_batch_size: int = 256):
+        self.max_workers = max_workers
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches: Set[asyncio.Future] = set() # In-flight micro-batch worker calls
+
+    async def start(self):
+        """
+        Spawns every worker up front and waits until each has loaded its models.
+        """
+        # spawn, not fork: the API process has a running event loop and DB pool that must not be inherited
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        await asyncio.gather(*(self._run(_worker_ready) for _ in range(self.max_workers)))
+        print(f"Inference executor started with {self.max_workers} workers.")
+
+    async def shutdown(self):
+        """
+        Sends the pending micro-batch and waits for every in-flight batch before stopping the workers,
+        so no categorize() caller is left waiting on a pool that no longer exists.
+        """
+        self._flush()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def categorize(self, description: str) -> str:
+        """
+        Categorizes one description; concurrent calls are micro-batched into a single worker call.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((description, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    async def categorize_many(self, descriptions: List[str]) -> List[str]:
+        return await self._run(_categorize_batch, list(descriptions))
+
+    async def forecast_cash_flows(self, transactions: list, steps: int = 30, method: str = "holt") -> Dict[int, list]:
+        """
+        transactions: records with 'user_id', 'date', 'amount', 'type'.
+        """
+        return await self._run(_forecast_cash_flows, transactions, steps, method)
+
+    async def assign_segments(self, transactions: list) -> Dict[int, int]:
+        """
+        transactions: records with 'user_id', 'category', 'amount'. Returns {} until a population
+        segmentation model has been registered.
+        """
+        return await self._run(_assign_segments, transactions)
+
+    async def _run(self, fn, *args):
+        if self._pool is None:
+            raise RuntimeError("Inference executor is not started.")
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        def _resolve(task: asyncio.Future):
+            self._batches.discard(task)
+            for i, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result()[i])
+
+        task = asyncio.ensure_future(self._run(_categorize_batch, [description for description, _ in batch]))
+        self._batches.add(task)
+        task.add_done_callback(_resolve)
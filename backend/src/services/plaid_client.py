@@ -0,0 +1,87 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import plaid
+from plaid.api import plaid_api
+
+from ..core.config import settings
+
+def plaid_host() -> str:
+    """
+    Plaid API base URL: PLAID_HOST when set (e.g. a local fake server), otherwise the PLAID_ENV environment.
+    """
+    return settings.PLAID_HOST or getattr(plaid.Environment, settings.PLAID_ENV.capitalize())
+
+class PlaidClient:
+    """
+    Long-lived async facade over the generated (blocking) Plaid client.
+    One instance holds a keep-alive urllib3 connection pool of pool_size connections to Plaid and a
+    dedicated thread pool of the same size that runs the blocking calls, so Plaid latency never blocks
+    the event loop and requests reuse warm TLS connections instead of handshaking every time.
+    Create it once per process (the API lifespan hook, or get_plaid_client() in workers).
+    """
+    def __init__(self, host: Optional[str] = None, pool_size: Optional[int] = None):
+        self.pool_size = pool_size or settings.PLAID_POOL_SIZE
+        configuration = plaid.Configuration(
+            host=host or plaid_host(),
+            api_key={"clientId": settings.PLAID_CLIENT_ID, "secret": settings.PLAID_SECRET}
+        )
+        configuration.connection_pool_maxsize = self.pool_size
+        self.api_client = plaid.ApiClient(configuration)
+        self.api = plaid_api.PlaidApi(self.api_client)
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="plaid")
+
+    async def call(self, method: str, request, timeout: Optional[float] = None, **kwargs):
+        """
+        Runs a PlaidApi method (e.g. 'accounts_get') on the client's thread pool.
+        timeout (seconds) is enforced by the HTTP request itself, so a slow call frees its pool
+        thread and connection instead of blocking them after the caller gave up.
+        """
+        if timeout is not None:
+            kwargs["_request_timeout"] = timeout
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: getattr(self.api, method)(request, **kwargs))
+
+    async def call_raw(self, method: str, request, timeout: Optional[float] = None) -> dict:
+        """
+        Like call(), but returns the decoded JSON body without building plaid model objects; used for
+        large payloads such as /transactions/sync pages.
+        """
+        response = await self.call(method, request, timeout, _preload_content=False)
+        return json.loads(response.data)
+
+    async def transactions_sync(self, request, timeout: Optional[float] = None) -> dict:
+        return await self.call_raw("transactions_sync", request, timeout)
+
+    async def accounts_get(self, request, timeout: Optional[float] = None) -> dict:
+        return await self.call_raw("accounts_get", request, timeout)
+
+    async def item_public_token_exchange(self, request):
+        return await self.call("item_public_token_exchange", request)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.api_client.close()
+
+_shared_client: Optional[PlaidClient] = None
+_shared_lock = threading.Lock()
+
+def get_plaid_client() -> PlaidClient:
+    """
+    Returns the process-wide PlaidClient, creating it on first use.
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = PlaidClient()
+        return _shared_client
+
+def close_plaid_client():
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+            _shared_client = None
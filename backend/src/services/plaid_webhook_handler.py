@@ -1,18 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..db.models.account import Account
 from ..core.exceptions import NotFoundException
-from plaid import PlaidApi, Environment
+from typing import Optional
+from plaid.model.accounts_get_request import AccountsGetRequest
 from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from ..core.config import settings
+from .account_service import AccountService
+from .plaid_client import PlaidClient, get_plaid_client
 
 class PlaidWebhookHandler:
-    def __init__(self, db_session: AsyncSession):
+    def __init__(self, db_session: AsyncSession, plaid_client: Optional[PlaidClient] = None):
         self.db_session = db_session
-        self.plaid_client = PlaidApi(
-            Environment[settings.PLAID_ENV.upper()],
-            client_id=settings.PLAID_CLIENT_ID,
-            secret=settings.PLAID_SECRET
-        )
+        # Shared pooled client (app.state.plaid_client in the API); never one per request
+        self.plaid_client = plaid_client or get_plaid_client()
 
     async def exchange_public_token(self, public_token: str, user_id: int):
         """
@@ -27,26 +25,13 @@ class PlaidWebhookHandler:
             access_token = exchange_response.access_token
             item_id = exchange_response.item_id
 
-            # Normally, you'd fetch initial accounts/transactions here too
-            # For MVP, just store access token and item_id for a dummy account
-            # In a real app, this would involve more detailed Plaid API calls
-
-            # Create a dummy account record, this needs to be properly linked/updated
-            # with actual Plaid account data (fetched via /accounts/get)
-            # This is a simplification:
-            db_account = Account(
-                user_id=user_id,
-                plaid_account_id=f"dummy_acc_{item_id}", # Needs actual account ID from Plaid /accounts/get
-                plaid_item_id=item_id,
-                access_token=access_token, # Store encrypted in production
-                name=f"Plaid Linked Account ({item_id[-4:]})",
-                type="depository",
-                iso_currency_code="USD"
+            # Link the item's real accounts so transaction syncs can map their transactions
+            accounts_response = await self.plaid_client.accounts_get(AccountsGetRequest(access_token=access_token))
+            account_ids = await AccountService(self.db_session, self.plaid_client).link_plaid_accounts(
+                user_id, item_id, access_token, accounts_response.get("accounts", [])
             )
-            self.db_session.add(db_account)
             await self.db_session.commit()
-            await self.db_session.refresh(db_account)
-            print(f"Public token exchanged and item {item_id} linked for user {user_id}.")
+            print(f"Public token exchanged and item {item_id} linked with {len(account_ids)} accounts for user {user_id}.")
 
         except Exception as e:
             print(f"Error exchanging public token: {e}")
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from sqlalchemy import select, delete, func, literal, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Sequence
+from datetime import date
+from ..db.models.daily_rollup import DailyUserCategoryRollup
+from ..db.models.transaction import Transaction
+from ..db.upsert import accumulate_rows, dialect_insert
+from ..ml_engine.transaction_categorizer import UNCATEGORIZED
+from ..core.lazy_imports import lazy_import
+pd = lazy_import("pandas")
+
+def utc_day_column(dialect_name: str):
+    """
+    Calendar day of Transaction.date in UTC, the day build_rollup_rows buckets ingested batches by.
+    PostgreSQL would otherwise take it in the session's TimeZone; SQLite stores UTC values as is.
+    """
+    date = Transaction.date
+    if dialect_name == "postgresql":
+        # A literal rather than a bound parameter, so GROUP BY repeats the exact select expression
+        date = func.timezone(literal_column("'UTC'"), date)
+    return func.date(date)
+
+class RollupService:
+    """
+    Maintains and reads the daily_user_category_rollup table: per-user, per-day, per-category and
+    per-type amount totals and transaction counts. Ingestion folds each new batch in with atomic
+    increments, so models can read a few rows per user-day instead of every raw transaction.
+    """
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    def build_rollup_rows(self, transactions_df: pd.DataFrame) -> List[dict]:
+        """
+        Aggregates a batch of transactions ('user_id', 'date', 'category', 'type', 'amount') into rollup rows.
+        """
+        if transactions_df.empty:
+            return []
+        keys = pd.DataFrame({
+            'user_id': transactions_df['user_id'],
+            'day': pd.to_datetime(transactions_df['date']).dt.date,
+            'category': transactions_df['category'].fillna(UNCATEGORIZED),
+            'type': transactions_df['type'],
+        })
+        rollup = transactions_df['amount'].astype(float).groupby([keys[c] for c in keys.columns]).agg(['sum', 'count'])
+        rollup = rollup.rename(columns={'sum': 'amount_total', 'count': 'transaction_count'}).reset_index()
+        return rollup.to_dict('records')
+
+    async def apply_transactions(self, transactions_df: pd.DataFrame) -> int:
+        """
+        Adds a batch of newly ingested transactions to the rollup. Does not commit, so the rollup
+        is updated in the same database transaction as the rows it summarizes.
+        """
+        return await accumulate_rows(
+            self.db_session, DailyUserCategoryRollup.__table__, self.build_rollup_rows(transactions_df),
+            index_elements=["user_id", "day", "category", "type"], sum_columns=["amount_total", "transaction_count"]
+        )
+
+    async def retract_transactions(self, transactions_df: pd.DataFrame) -> int:
+        """
+        Subtracts the previous version of modified or removed transactions from the rollup, then
+        drops the rows it emptied. Does not commit.
+        """
+        rows = self.build_rollup_rows(transactions_df)
+        for row in rows:
+            row['amount_total'], row['transaction_count'] = -row['amount_total'], -row['transaction_count']
+        written = await accumulate_rows(
+            self.db_session, DailyUserCategoryRollup.__table__, rows,
+            index_elements=["user_id", "day", "category", "type"], sum_columns=["amount_total", "transaction_count"]
+        )
+        if rows:
+            await self.db_session.execute(
+                delete(DailyUserCategoryRollup).where(
+                    DailyUserCategoryRollup.user_id.in_({row['user_id'] for row in rows}),
+                    DailyUserCategoryRollup.transaction_count <= 0
+                )
+            )
+        return written
+
+    async def rebuild(self, user_ids: Optional[Sequence[int]] = None):
+        """
+        Recomputes the rollup from the transactions table with one INSERT ... SELECT ... GROUP BY
+        (for all users or the given ones). Used to backfill history; does not commit.
+        """
+        day = utc_day_column(self.db_session.bind.dialect.name)
+        category = func.coalesce(Transaction.category, literal(UNCATEGORIZED))
+        source = (
+            select(Transaction.user_id, day, category, Transaction.type, func.sum(Transaction.amount), func.count())
+            .group_by(Transaction.user_id, day, category, Transaction.type)
+        )
+        clear = delete(DailyUserCategoryRollup)
+        if user_ids is not None:
+            source = source.where(Transaction.user_id.in_(user_ids))
+            clear = clear.where(DailyUserCategoryRollup.user_id.in_(user_ids))
+        await self.db_session.execute(clear)
+        await self.db_session.execute(
+            dialect_insert(self.db_session, DailyUserCategoryRollup.__table__).from_select(
+                ["user_id", "day", "category", "type", "amount_total", "transaction_count"], source
+            )
+        )
+
+    async def load(self, user_ids: Optional[Sequence[int]] = None, start: Optional[date] = None, end: Optional[date] = None,
+                   types: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Loads rollup rows as a long-format frame with 'user_id', 'date', 'category', 'type', 'amount'
+        and 'count' columns. 'amount' is the day's total, so the frame can be passed straight to
+        BehaviorAnalyzer, build_daily_cash_flows, SavingsStrategist and (using 'count' for averages)
+        BudgetOptimizer. `end` is exclusive.
+        """
+        rollup = DailyUserCategoryRollup
+        stmt = select(rollup.user_id, rollup.day, rollup.category, rollup.type, rollup.amount_total, rollup.transaction_count)
+        if user_ids is not None:
+            stmt = stmt.where(rollup.user_id.in_(user_ids))
+        if start is not None:
+            stmt = stmt.where(rollup.day >= start)
+        if end is not None:
+            stmt = stmt.where(rollup.day < end)
+        if types is not None:
+            stmt = stmt.where(rollup.type.in_(types))
+        result = await self.db_session.execute(stmt)
+        df = pd.DataFrame(result.all(), columns=['user_id', 'date', 'category', 'type', 'amount', 'count'])
+        df['date'] = pd.to_datetime(df['date'], utc=True)
+        return df
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select, func, extract, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models.transaction import Transaction, TRUSTED_CATEGORY_SOURCES
+from ..ml_engine.transaction_categorizer import UNCATEGORIZED
+from ..core.lazy_imports import lazy_import
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+ds = lazy_import("pyarrow.dataset")
+pq = lazy_import("pyarrow.parquet")
+
+MANIFEST_FILE = "_manifest.json"
+PARTITION_FILE = "part.parquet"
+# Bumped when the partition schema changes, so every partition is rewritten once by the next export
+SNAPSHOT_VERSION = 2
+
+SNAPSHOT_COLUMNS = ["id", "user_id", "account_id", "description", "amount", "date", "category", "category_source", "type", "labeled_at"]
+
+def snapshot_schema():
+    """
+    Compact on-disk schema: 32-bit ids, dictionary-encoded strings, UTC microsecond timestamps.
+    Built on demand so importing this module does not load pyarrow.
+    """
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int32()),
+        ("account_id", pa.int32()),
+        ("description", pa.dictionary(pa.int32(), pa.string())),
+        ("amount", pa.float64()),
+        ("date", pa.timestamp("us", tz="UTC")),
+        ("category", pa.dictionary(pa.int32(), pa.string())),
+        ("category_source", pa.dictionary(pa.int8(), pa.string())),
+        ("type", pa.dictionary(pa.int8(), pa.string())),
+        ("labeled_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+def utc_month_columns(dialect_name: str):
+    """
+    Year and month of Transaction.date in UTC, matching the UTC bounds partitions are written with.
+    PostgreSQL would otherwise extract them in the session's TimeZone; SQLite stores UTC values as is.
+    """
+    date = Transaction.date
+    if dialect_name == "postgresql":
+        # A literal rather than a bound parameter, so GROUP BY repeats the exact select expression
+        date = func.timezone(literal_column("'UTC'"), date)
+    return extract('year', date), extract('month', date)
+
+class TransactionSnapshotExporter:
+    """
+    Exports the transactions table into month-partitioned Parquet files:
+    <root_dir>/month=YYYY-MM/part.parquet plus a _manifest.json with each partition's row count and
+    last-modified watermark. A run only (re)writes months that are new or whose count/watermark changed,
+    so closed months are written once. Partitions are streamed from a server-side cursor in chunks
+    and published with an atomic rename.
+    """
+    def __init__(self, db_session: AsyncSession, root_dir: str, chunk_size: int = 50_000):
+        self.db_session = db_session
+        self.root_dir = os.path.abspath(root_dir)
+        self.chunk_size = chunk_size
+
+    async def export(self) -> List[str]:
+        """
+        Brings the snapshot up to date. Returns the months that were written.
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+        manifest = self._read_manifest()
+        labeled_at = func.coalesce(Transaction.updated_at, Transaction.created_at)
+        year, month = utc_month_columns(self.db_session.bind.dialect.name)
+        result = await self.db_session.execute(
+            select(year, month, func.count(), func.max(labeled_at)).group_by(year, month)
+        )
+
+        written = []
+        for year_value, month_value, rows, watermark in result.all():
+            key = f"{int(year_value):04d}-{int(month_value):02d}"
+            partition = {"rows": rows, "watermark": pd.Timestamp(watermark).isoformat() if watermark is not None else None,
+                         "version": SNAPSHOT_VERSION}
+            if manifest.get(key) == partition:
+                continue
+            await self._write_partition(key)
+            manifest[key] = partition
+            self._write_manifest(manifest) # Persist progress after every partition
+            written.append(key)
+
+        print(f"Transaction snapshot up to date ({len(manifest)} partitions, {len(written)} written).")
+        return written
+
+    async def _write_partition(self, key: str):
+        start = pd.Timestamp(key + "-01", tz="UTC")
+        end = start + pd.offsets.MonthBegin(1)
+        stmt = (
+            select(
+                Transaction.id, Transaction.user_id, Transaction.account_id, Transaction.description,
+                Transaction.amount, Transaction.date, Transaction.category, Transaction.category_source, Transaction.type,
+                func.coalesce(Transaction.updated_at, Transaction.created_at)
+            )
+            .where(Transaction.date >= start.to_pydatetime(), Transaction.date < end.to_pydatetime())
+            .execution_options(yield_per=self.chunk_size)
+        )
+
+        partition_dir = os.path.join(self.root_dir, f"month={key}")
+        os.makedirs(partition_dir, exist_ok=True)
+        tmp_path = os.path.join(partition_dir, f".{uuid.uuid4().hex}.tmp")
+        try:
+            schema = snapshot_schema()
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                result = await self.db_session.stream(stmt)
+                async for rows in result.partitions():
+                    chunk = pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS)
+                    for column in ("date", "labeled_at"):
+                        chunk[column] = pd.to_datetime(chunk[column], utc=True)
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            os.replace(tmp_path, os.path.join(partition_dir, PARTITION_FILE))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _read_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.root_dir, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_manifest(self, manifest: Dict[str, dict]):
+        tmp_path = os.path.join(self.root_dir, f".{MANIFEST_FILE}-{uuid.uuid4().hex}")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.root_dir, MANIFEST_FILE))
+
+def snapshot_exists(root_dir: str) -> bool:
+    return os.path.exists(os.path.join(root_dir, MANIFEST_FILE))
+
+def read_transaction_snapshot(root_dir: str, columns: Optional[Sequence[str]] = None, labeled_only: bool = False,
+                              labeled_after: Optional[datetime] = None, trusted_only: bool = False) -> pd.DataFrame:
+    """
+    Reads the Parquet snapshot with column pruning (only `columns` are decoded) and predicate pushdown.
+    labeled_only keeps rows with a category; labeled_after keeps rows labeled or corrected after a checkpoint;
+    trusted_only keeps rows categorized by Plaid or the user (not by the categorizer, nor the Uncategorized placeholder).
+    Dictionary-encoded strings come back as pandas categoricals.
+    """
+    columns = list(columns) if columns is not None else SNAPSHOT_COLUMNS
+    if not snapshot_exists(root_dir):
+        return pd.DataFrame(columns=columns)
+
+    predicate = None
+    if labeled_only:
+        predicate = pc.field("category").is_valid()
+    if trusted_only:
+        trusted = pc.field("category_source").isin(list(TRUSTED_CATEGORY_SOURCES)) & (pc.field("category") != UNCATEGORIZED)
+        predicate = trusted if predicate is None else predicate & trusted
+    if labeled_after is not None:
+        labeled_after = pd.Timestamp(labeled_after)
+        labeled_after = labeled_after.tz_localize("UTC") if labeled_after.tzinfo is None else labeled_after
+        after = pc.field("labeled_at") > pa.scalar(labeled_after.to_pydatetime(), type=pa.timestamp("us", tz="UTC"))
+        predicate = after if predicate is None else predicate & after
+
+    dataset = ds.dataset(root_dir, format="parquet", schema=snapshot_schema(), partitioning="hive")
+    return dataset.to_table(columns=columns, filter=predicate).to_pandas()
@@ -1,14 +1,32 @@
-from celery import Celery
+from __future__ import annotations
+
+from celery import Celery, chain
 from ..core.config import settings
-from ..ml_engine.transaction_categorizer import TransactionCategorizer
-from ..ml_engine.behavior_analyzer import BehaviorAnalyzer
+from ..ml_engine.transaction_categorizer import TransactionCategorizer, CATEGORIZER_MODEL_NAME
+from ..ml_engine.merchant_index import MerchantIndex, MERCHANT_INDEX_MODEL_NAME
+from ..ml_engine.behavior_analyzer import BehaviorAnalyzer, BEHAVIOR_SEGMENTS_MODEL_NAME
+from ..ml_engine.model_registry import ModelRegistry
+from ..ml_engine.investment_advisor import InvestmentAdvisor, REBALANCE_DRIFT_THRESHOLD
+from ..ml_engine.forecasting import FinancialForecaster, build_daily_cash_flows, state_last_observation_date, MIN_TRANSACTIONS_FOR_FORECAST
 from ..db.session import async_session_factory
 from sqlalchemy.future import select
-from ..db.models.transaction import Transaction # Assuming a Transaction model
-from ..db.models.user import User # Assuming a User model
+from sqlalchemy import func
+from ..db.models.transaction import Transaction, TRUSTED_CATEGORY_SOURCES
+from ..db.models.user_segment import UserSegment
+from ..db.models.forecaster_state import ForecasterState
+from ..db.models.investment import Investment
+from ..db.models.daily_rollup import DailyUserCategoryRollup
+from ..services.rollup_service import RollupService, UNCATEGORIZED
+from ..services.snapshot_service import TransactionSnapshotExporter, read_transaction_snapshot, snapshot_exists
+from ..db.upsert import upsert_rows
 import asyncio
-import pandas as pd
-import os
+from datetime import datetime
+from typing import Optional
+from ..core.lazy_imports import lazy_import
+pd = lazy_import("pandas")
+
+# Rows the categorizer may learn from: categorized by Plaid or the user, never its own predictions or the placeholder
+TRUSTED_LABEL_FILTER = (Transaction.category_source.in_(TRUSTED_CATEGORY_SOURCES), Transaction.category != UNCATEGORIZED)
 
 celery_app = Celery(
     "fingenius_tasks",
@@ -17,33 +35,172 @@ celery_app = Celery(
 )
 
 @celery_app.task
-def train_transaction_categorizer_task():
+def export_transaction_snapshot_task():
+    """
+    Celery task to bring the month-partitioned Parquet snapshot of transactions up to date.
+    Only new or changed months are rewritten; training tasks read the snapshot instead of Postgres.
+    """
+    async def _export():
+        async with async_session_factory() as session:
+            await TransactionSnapshotExporter(session, settings.SNAPSHOT_DIR).export()
+
+    asyncio.run(_export())
+
+@celery_app.task
+def train_transaction_categorizer_task(incremental: bool = True, streaming: bool = False, chunk_size: int = 10_000):
     """
     Celery task to train or retrain the transaction categorization model.
     Should be triggered periodically or on significant user corrections.
+    In incremental mode only transactions categorized or corrected since the model's
+    checkpoint are consumed and the existing model is updated in place; a full refit
+    happens when no incremental model exists yet or new categories appear.
+    Training data is read from the Parquet snapshot (see export_transaction_snapshot_task),
+    decoding only the description, category and labeled_at columns of rows categorized by Plaid or the user. With streaming=True the data
+    is instead pulled from Postgres through a server-side cursor in chunk_size batches, each fed to
+    partial_fit, so peak memory does not grow with the size of the transactions table.
     """
-    async def _train():
-        async with async_session_factory() as session:
-            print("Fetching transaction data for categorizer training...")
-            # Fetch transactions with known categories from DB
-            # This would ideally be a dedicated dataset or user-corrected transactions
-            result = await session.execute(select(Transaction.description, Transaction.category).filter(Transaction.category.isnot(None)))
-            transactions_data = result.all()
-            
-            if not transactions_data:
-                print("No data available for categorizer training.")
+    registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+    training_columns = ['description', 'category', 'labeled_at']
+
+    categorizer = None
+    if (incremental or streaming) and registry.latest_version(CATEGORIZER_MODEL_NAME):
+        # Loaded without mmap: partial_fit updates the coefficients in place
+        artifacts, metadata = registry.load(CATEGORIZER_MODEL_NAME, mmap_mode=None)
+        categorizer = TransactionCategorizer.from_artifacts(artifacts, metadata)
+        if not categorizer.incremental or categorizer.checkpoint is None:
+            categorizer = None
+
+    if streaming:
+        asyncio.run(_train_categorizer_streaming(registry, categorizer if incremental else None, chunk_size))
+        return
+
+    if not snapshot_exists(settings.SNAPSHOT_DIR):
+        print("No transaction snapshot available; run export_transaction_snapshot_task first.")
+        return
+
+    if categorizer is not None:
+        print(f"Reading transactions labeled since {categorizer.checkpoint.isoformat()}...")
+        # created_at/updated_at (labeled_at) tell us when a label was assigned or corrected
+        df = read_transaction_snapshot(
+            settings.SNAPSHOT_DIR, training_columns, labeled_only=True, trusted_only=True, labeled_after=categorizer.checkpoint
+        )
+        if df.empty:
+            print("No newly categorized transactions since last checkpoint.")
+            return
+
+        try:
+            categorizer.partial_fit(df)
+            categorizer.checkpoint = df['labeled_at'].max().to_pydatetime()
+            registry.register(CATEGORIZER_MODEL_NAME, *categorizer.to_artifacts())
+            registry.prune(CATEGORIZER_MODEL_NAME)
+            print(f"Transaction categorizer incrementally updated with {len(df)} transactions.")
+            return
+        except ValueError as e:
+            print(f"Incremental update not possible ({e}); falling back to full retrain.")
+
+    print("Reading transaction snapshot for categorizer training...")
+    # Transactions categorized by Plaid or the user; the categorizer's own predictions are never fed back
+    df = read_transaction_snapshot(settings.SNAPSHOT_DIR, training_columns, labeled_only=True, trusted_only=True)
+
+    if df.empty:
+        print("No data available for categorizer training.")
+        return
+
+    categorizer = TransactionCategorizer(incremental=incremental)
+    categorizer.train(df)
+    categorizer.checkpoint = df['labeled_at'].max().to_pydatetime()
+    registry.register(CATEGORIZER_MODEL_NAME, *categorizer.to_artifacts())
+    registry.prune(CATEGORIZER_MODEL_NAME)
+    print("Transaction categorizer model trained and saved.")
+
+async def _stream_labeled_transactions(session, chunk_size: int, labeled_after: Optional[datetime] = None):
+    """
+    Streams transactions categorized by Plaid or the user ('description', 'category', 'labeled_at') with a
+    server-side cursor, yielding DataFrames of at most chunk_size rows.
+    """
+    # created_at/updated_at tell us when a label was assigned or corrected
+    labeled_at = func.coalesce(Transaction.updated_at, Transaction.created_at)
+    stmt = (
+        select(Transaction.description, Transaction.category, labeled_at)
+        .filter(*TRUSTED_LABEL_FILTER)
+        .execution_options(yield_per=chunk_size)
+    )
+    if labeled_after is not None:
+        stmt = stmt.filter(labeled_at > labeled_after)
+    result = await session.stream(stmt)
+    try:
+        async for rows in result.partitions():
+            yield pd.DataFrame(rows, columns=['description', 'category', 'labeled_at'])
+    finally:
+        await result.close() # Release the server-side cursor even if the consumer stops early
+
+async def _train_categorizer_streaming(registry: ModelRegistry, categorizer: Optional[TransactionCategorizer], chunk_size: int):
+    """
+    Out-of-core categorizer training: every streamed chunk is passed to partial_fit and dropped, so only
+    one chunk is held in memory at a time. Updates `categorizer` with labels since its checkpoint when
+    given, otherwise (or when new categories appear) trains a fresh incremental model in one pass.
+    """
+    async with async_session_factory() as session:
+        if categorizer is not None:
+            print(f"Streaming transactions labeled since {categorizer.checkpoint.isoformat()}...")
+            updated, checkpoint = 0, categorizer.checkpoint
+            chunks = _stream_labeled_transactions(session, chunk_size, labeled_after=categorizer.checkpoint)
+            try:
+                async for chunk in chunks:
+                    categorizer.partial_fit(chunk)
+                    updated += len(chunk)
+                    checkpoint = max(checkpoint, pd.Timestamp(chunk['labeled_at'].max()).to_pydatetime())
+            except ValueError as e:
+                await chunks.aclose()
+                print(f"Incremental update not possible ({e}); falling back to full retrain.")
+            else:
+                if not updated:
+                    print("No newly categorized transactions since last checkpoint.")
+                    return
+                categorizer.checkpoint = checkpoint
+                registry.register(CATEGORIZER_MODEL_NAME, *categorizer.to_artifacts())
+                registry.prune(CATEGORIZER_MODEL_NAME)
+                print(f"Transaction categorizer incrementally updated with {updated} streamed transactions.")
                 return
 
-            df = pd.DataFrame(transactions_data, columns=['description', 'category'])
-            categorizer = TransactionCategorizer()
-            categorizer.train(df)
-            
-            model_dir = "./backend/models"
-            os.makedirs(model_dir, exist_ok=True)
-            categorizer.save_model(os.path.join(model_dir, "transaction_categorizer"))
-            print("Transaction categorizer model trained and saved.")
+        # The category universe must be known up front for partial_fit
+        result = await session.execute(select(Transaction.category).filter(*TRUSTED_LABEL_FILTER).distinct())
+        categories = sorted(result.scalars().all())
+        if not categories:
+            print("No data available for categorizer training.")
+            return
+
+        print(f"Streaming categorizer training over {len(categories)} categories in chunks of {chunk_size}...")
+        categorizer = TransactionCategorizer(incremental=True)
+        trained, checkpoint = 0, None
+        async for chunk in _stream_labeled_transactions(session, chunk_size):
+            categorizer.partial_fit(chunk, categories=categories)
+            trained += len(chunk)
+            chunk_checkpoint = pd.Timestamp(chunk['labeled_at'].max()).to_pydatetime()
+            checkpoint = chunk_checkpoint if checkpoint is None else max(checkpoint, chunk_checkpoint)
 
-    asyncio.run(_train())
+    categorizer.checkpoint = checkpoint
+    registry.register(CATEGORIZER_MODEL_NAME, *categorizer.to_artifacts())
+    registry.prune(CATEGORIZER_MODEL_NAME)
+    print(f"Transaction categorizer trained on {trained} streamed transactions and saved.")
+
+@celery_app.task
+def rebuild_merchant_index_task():
+    """
+    Celery task to rebuild the exact-match merchant -> category index from labeled history.
+    Only categories from Plaid or the user are used, never the categorizer's own predictions.
+    Only the description and category columns of the snapshot are read; rows are pre-aggregated
+    per (description, category) so each distinct description is normalized once.
+    """
+    print("Rebuilding merchant index...")
+    df = read_transaction_snapshot(settings.SNAPSHOT_DIR, ['description', 'category'], labeled_only=True, trusted_only=True)
+    counts = df.groupby(['description', 'category'], observed=True).size().rename('count').reset_index()
+
+    merchant_index = MerchantIndex()
+    merchant_index.build(counts.astype({'description': str, 'category': str}))
+    registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+    registry.register(MERCHANT_INDEX_MODEL_NAME, *merchant_index.to_artifacts())
+    registry.prune(MERCHANT_INDEX_MODEL_NAME)
 
 @celery_app.task
 def analyze_user_behavior_task(user_id: int):
@@ -53,20 +210,13 @@ def analyze_user_behavior_task(user_id: int):
     async def _analyze():
         async with async_session_factory() as session:
             print(f"Analyzing behavior for user {user_id}...")
-            # Fetch user's transaction history
-            result = await session.execute(
-                select(Transaction.category, Transaction.amount, Transaction.date)
-                .filter(Transaction.user_id == user_id)
-            )
-            user_transactions = result.all()
+            # Fetch user's daily per-category totals instead of every raw transaction
+            df = await RollupService(session).load(user_ids=[user_id])
             
-            if not user_transactions:
+            if df.empty:
                 print(f"No transaction data for user {user_id} to analyze.")
                 return
 
-            df = pd.DataFrame(user_transactions, columns=['category', 'amount', 'date'])
-            df['user_id'] = user_id # Add user_id column for the analyzer
-            
             analyzer = BehaviorAnalyzer()
             # This would typically save insights to the DB or trigger other automations
             insights = analyzer.analyze_spending_patterns(df)
@@ -74,20 +224,236 @@ def analyze_user_behavior_task(user_id: int):
 
     asyncio.run(_analyze())
 
+async def _stream_user_spend_chunks(session, users_per_chunk: int):
+    """
+    Streams per-user, per-category debit totals from the daily rollup with a server-side cursor and
+    yields long-format DataFrames ('user_id', 'category', 'amount') holding complete users only.
+    """
+    rollup = DailyUserCategoryRollup
+    stmt = (
+        select(rollup.user_id, rollup.category, func.sum(rollup.amount_total))
+        .filter(rollup.type == 'debit', rollup.category != UNCATEGORIZED)
+        .group_by(rollup.user_id, rollup.category)
+        .order_by(rollup.user_id)
+        .execution_options(yield_per=users_per_chunk)
+    )
+    result = await session.stream(stmt)
+    buffered = []
+    buffered_users = 0
+    last_user_id = None
+    async for partition in result.partitions():
+        for user_id, category, amount in partition:
+            if user_id != last_user_id:
+                if buffered_users >= users_per_chunk:
+                    yield pd.DataFrame(buffered, columns=['user_id', 'category', 'amount'])
+                    buffered, buffered_users = [], 0
+                buffered_users += 1
+                last_user_id = user_id
+            buffered.append((user_id, category, amount))
+    if buffered:
+        yield pd.DataFrame(buffered, columns=['user_id', 'category', 'amount'])
+
+@celery_app.task
+def segment_population_task(n_clusters: int = 5, users_per_chunk: int = 5000):
+    """
+    Celery task to fit spending segments over the whole user population.
+    Per-user category spend vectors are streamed from the database in chunks and fed to
+    MiniBatchKMeans incrementally; the scaler and centroids are published to the model registry
+    so assigning a user to a segment is a cheap transform + nearest-centroid lookup.
+    """
+    async def _segment():
+        async with async_session_factory() as session:
+            result = await session.execute(
+                select(DailyUserCategoryRollup.category).filter(DailyUserCategoryRollup.category != UNCATEGORIZED).distinct()
+            )
+            categories = result.scalars().all()
+            if not categories:
+                print("No categorized transactions available for population segmentation.")
+                return
+
+            analyzer = BehaviorAnalyzer()
+            analyzer.start_population_fit(categories, n_clusters=n_clusters, batch_size=users_per_chunk)
+            print(f"Fitting population segments over {len(categories)} categories...")
+            async for chunk in _stream_user_spend_chunks(session, users_per_chunk):
+                analyzer.update_population_scaler(chunk)
+            async for chunk in _stream_user_spend_chunks(session, users_per_chunk):
+                analyzer.update_population_segments(chunk)
+            try:
+                analyzer.finish_population_fit()
+            except ValueError as e:
+                print(f"Population segmentation skipped: {e}")
+                return
+
+            registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+            registry.register(BEHAVIOR_SEGMENTS_MODEL_NAME, *analyzer.to_artifacts())
+            registry.prune(BEHAVIOR_SEGMENTS_MODEL_NAME)
+            print("Population segmentation model trained and saved.")
+
+    asyncio.run(_segment())
+
+@celery_app.task
+def assign_user_segments_task(users_per_chunk: int = 5000):
+    """
+    Celery task to assign every user to a segment of the latest population model.
+    Spend vectors are streamed in chunks, each chunk is assigned with one vectorized predict and
+    written back with a bulk upsert into user_segments.
+    """
+    async def _assign():
+        registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+        if registry.latest_version(BEHAVIOR_SEGMENTS_MODEL_NAME) is None:
+            print("No population segmentation model available; run segment_population_task first.")
+            return
+        artifacts, metadata = registry.load(BEHAVIOR_SEGMENTS_MODEL_NAME)
+        analyzer = BehaviorAnalyzer.from_artifacts(artifacts, metadata)
+
+        async with async_session_factory() as session:
+            assigned = 0
+            async for chunk in _stream_user_spend_chunks(session, users_per_chunk):
+                segments = analyzer.assign_segments(chunk)
+                rows = [
+                    {"user_id": user_id, "segment": segment, "model_version": metadata["version"]}
+                    for user_id, segment in segments.items()
+                ]
+                assigned += await upsert_rows(
+                    session, UserSegment.__table__, rows,
+                    index_elements=["user_id"], update_columns=["segment", "model_version"],
+                    extra_set={"assigned_at": func.now()}
+                )
+            await session.commit()
+            print(f"Assigned segments for {assigned} users (model version {metadata['version']}).")
+
+    asyncio.run(_assign())
+
+@celery_app.task
+def update_cash_flow_forecasts_task(users_per_chunk: int = 1000, max_history_days: int = 365, refit_interval_days: int = 30):
+    """
+    Celery task to bring every user's persisted cash-flow forecaster up to yesterday.
+    Users with a stored state only have the days since their last folded observation fetched and
+    appended to the existing fit; ARIMA parameters are re-estimated only on the refit schedule or
+    when drift is detected. Users without a state get a full fit over the trailing history window.
+    """
+    async def _update():
+        forecaster = FinancialForecaster()
+        today = pd.Timestamp.now(tz='UTC').normalize()
+        through = today - pd.Timedelta(days=1)
+        window_start = today - pd.Timedelta(days=max_history_days)
+
+        async with async_session_factory() as session:
+            rollup_service = RollupService(session)
+            result = await session.execute(
+                select(DailyUserCategoryRollup.user_id).distinct().order_by(DailyUserCategoryRollup.user_id)
+            )
+            user_ids = result.scalars().all()
+            updated = refitted = 0
+
+            for start in range(0, len(user_ids), users_per_chunk):
+                chunk_ids = user_ids[start:start + users_per_chunk]
+                result = await session.execute(
+                    select(ForecasterState.user_id, ForecasterState.state).where(ForecasterState.user_id.in_(chunk_ids))
+                )
+                states = dict(result.all())
+                if len(states) == len(chunk_ids):
+                    since = min(state_last_observation_date(state) for state in states.values()) + pd.Timedelta(days=1)
+                else:
+                    since = window_start
+
+                df = await rollup_service.load(user_ids=chunk_ids, start=since.date(), end=today.date())
+                daily_cash_flows = build_daily_cash_flows(df)
+                transaction_counts = df.groupby('user_id')['count'].sum()
+
+                rows = []
+                for user_id in chunk_ids:
+                    daily = daily_cash_flows.get(user_id, pd.Series(dtype=float, index=pd.DatetimeIndex([], tz='UTC')))
+                    try:
+                        if user_id in states:
+                            state, did_refit = forecaster.update_state(
+                                user_id, states[user_id], daily, through=through,
+                                refit_interval_days=refit_interval_days, max_history_days=max_history_days
+                            )
+                        elif transaction_counts.get(user_id, 0) >= MIN_TRANSACTIONS_FOR_FORECAST:
+                            daily = daily.reindex(pd.date_range(daily.index[0], through, freq='D'), fill_value=0.0)
+                            state = forecaster.fit_state(user_id, daily, max_history_days=max_history_days)
+                            did_refit = True
+                        else:
+                            continue
+                    except Exception as e:
+                        print(f"Error updating forecaster for user {user_id}: {e}")
+                        continue
+                    finally:
+                        forecaster.models.pop(user_id, None) # Keep worker memory flat across chunks
+
+                    updated += 1
+                    refitted += int(did_refit)
+                    rows.append({
+                        "user_id": user_id,
+                        "state": state,
+                        "last_observation_date": state_last_observation_date(state).to_pydatetime(),
+                        "last_full_fit_at": datetime.fromisoformat(state["last_full_fit_at"]),
+                    })
+
+                await upsert_rows(
+                    session, ForecasterState.__table__, rows,
+                    index_elements=["user_id"], update_columns=["state", "last_observation_date", "last_full_fit_at"]
+                )
+                await session.commit()
+
+            print(f"Updated {updated} cash-flow forecasters ({refitted} full re-estimations).")
+
+    asyncio.run(_update())
+
+@celery_app.task
+def rebalancing_drift_task(threshold: float = REBALANCE_DRIFT_THRESHOLD):
+    """
+    Celery task to find users whose holdings drifted away from their target allocation.
+    Holdings of all users are aggregated per (user, type) in one query and compared against the
+    target weights in a single vectorized pass; only users beyond the threshold get a suggestion.
+    """
+    async def _drift():
+        async with async_session_factory() as session:
+            result = await session.execute(
+                select(Investment.user_id, Investment.type, func.sum(Investment.current_value))
+                .group_by(Investment.user_id, Investment.type)
+            )
+            holdings_df = pd.DataFrame(result.all(), columns=['user_id', 'type', 'current_value'])
+
+        if holdings_df.empty:
+            print("No investment holdings to check for rebalancing.")
+            return {}
+        advisor = InvestmentAdvisor()
+        suggestions = advisor.format_rebalance_suggestions(advisor.compute_rebalancing_drift(holdings_df, threshold=threshold))
+        print(f"Rebalancing suggested for {len(suggestions)} of {holdings_df['user_id'].nunique()} users.")
+        return suggestions
+
+    return asyncio.run(_drift())
+
+@celery_app.task
+def rebuild_daily_rollup_task():
+    """
+    Celery task to recompute daily_user_category_rollup from the transactions table.
+    Ingestion keeps the rollup current incrementally; this backfills history and repairs drift.
+    """
+    async def _rebuild():
+        async with async_session_factory() as session:
+            await RollupService(session).rebuild()
+            await session.commit()
+            print("Daily user/category rollup rebuilt.")
+
+    asyncio.run(_rebuild())
+
 @celery_app.task
 def periodic_ml_tasks():
     """
     A meta-task to trigger various ML-related background jobs periodically.
     """
     print("Running periodic ML tasks...")
-    train_transaction_categorizer_task.delay()
-    
-    async def _get_all_users():
-        async with async_session_factory() as session:
-            result = await session.execute(select(User.id))
-            user_ids = result.scalars().all()
-            for user_id in user_ids:
-                analyze_user_behavior_task.delay(user_id) # Trigger individual user analysis
-    
-    asyncio.run(_get_all_users())
+    # Training reads the Parquet snapshot, so refresh it first
+    chain(
+        export_transaction_snapshot_task.si(),
+        train_transaction_categorizer_task.si(),
+        rebuild_merchant_index_task.si()
+    ).delay()
+    # One streamed population fit replaces per-user KMeans runs over single-row pivots
+    chain(segment_population_task.si(), assign_user_segments_task.si()).delay()
+    update_cash_flow_forecasts_task.delay()
+    rebalancing_drift_task.delay()
     print("Periodic ML tasks initiated.")
\ No newline at end of file
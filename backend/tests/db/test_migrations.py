@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.src.db.session import Base
+from backend.src.db.migrations import add_missing_transaction_columns, ensure_plaid_transaction_unique_index, PLAID_TRANSACTION_INDEX
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.db.models.daily_rollup import DailyUserCategoryRollup
+
+@pytest.fixture(name="db_session")
+async def create_db_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Recreate the schema older deployments have: a plain, non-unique index on plaid_transaction_id
+        await conn.execute(text(f"DROP INDEX {PLAID_TRANSACTION_INDEX}"))
+        await conn.execute(text(f"CREATE INDEX {PLAID_TRANSACTION_INDEX} ON transactions (plaid_transaction_id)"))
+
+    async with async_session() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+@pytest.mark.asyncio
+async def test_dedupes_then_creates_unique_index(db_session: AsyncSession):
+    user = User(username="dupes", email="dupes@example.com", hashed_password="pass")
+    db_session.add(user)
+    await db_session.commit()
+    account = Account(user_id=user.id, plaid_account_id="acc", plaid_item_id="item", access_token="token", name="Checking", type="depository")
+    db_session.add(account)
+    await db_session.commit()
+
+    day = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    for plaid_id, amount in [("t1", 10.0), ("t1", 12.0), ("t2", 5.0), (None, 7.0), (None, 8.0)]:
+        db_session.add(Transaction(user_id=user.id, account_id=account.id, plaid_transaction_id=plaid_id,
+                                   description="Shop", amount=amount, date=day, category="Shopping", type="debit"))
+    await db_session.commit()
+
+    assert await ensure_plaid_transaction_unique_index(db_session) == 1
+    remaining = await db_session.execute(select(Transaction.plaid_transaction_id, Transaction.amount).order_by(Transaction.id))
+    assert remaining.all() == [("t1", 12.0), ("t2", 5.0), (None, 7.0), (None, 8.0)]
+    rollup = (await db_session.execute(select(DailyUserCategoryRollup))).scalar_one()
+    assert (rollup.amount_total, rollup.transaction_count) == (32.0, 4)
+
+    indexes = (await db_session.execute(text("PRAGMA index_list('transactions')"))).all()
+    assert any(row[1] == PLAID_TRANSACTION_INDEX and row[2] == 1 for row in indexes)
+    assert await ensure_plaid_transaction_unique_index(db_session) == 0
+
+@pytest.mark.asyncio
+async def test_adds_missing_transaction_columns(db_session: AsyncSession):
+    await db_session.execute(text("ALTER TABLE transactions DROP COLUMN category_source"))
+    await db_session.commit()
+    assert await add_missing_transaction_columns(db_session) == ["category_source"]
+    assert await add_missing_transaction_columns(db_session) == []
+    columns = [row[1] for row in (await db_session.execute(text("PRAGMA table_info('transactions')"))).all()]
+    assert "category_source" in columns
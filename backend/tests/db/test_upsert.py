@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.src.db.session import Base
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.db.models.user_segment import UserSegment
+from backend.src.db.upsert import upsert_rows
+
+@pytest.fixture(name="db_session")
+async def create_db_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+@pytest.mark.asyncio
+async def test_upsert_rows_inserts_then_updates(db_session: AsyncSession):
+    db_session.add_all([
+        User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="pass") for i in range(3)
+    ])
+    await db_session.commit()
+    user_ids = (await db_session.execute(select(User.id).order_by(User.id))).scalars().all()
+
+    rows = [{"user_id": user_id, "segment": 0, "model_version": "000001"} for user_id in user_ids]
+    written = await upsert_rows(db_session, UserSegment.__table__, rows, ["user_id"], ["segment", "model_version"], batch_size=2)
+    await db_session.commit()
+    assert written == 3
+
+    await upsert_rows(db_session, UserSegment.__table__, [{"user_id": user_ids[0], "segment": 2, "model_version": "000002"}],
+                      ["user_id"], ["segment", "model_version"])
+    await db_session.commit()
+
+    result = await db_session.execute(select(UserSegment.user_id, UserSegment.segment, UserSegment.model_version).order_by(UserSegment.user_id))
+    assert result.all() == [(user_ids[0], 2, "000002"), (user_ids[1], 0, "000001"), (user_ids[2], 0, "000001")]
+
+@pytest.mark.asyncio
+async def test_upsert_rows_extra_set_refreshes_timestamps(db_session: AsyncSession):
+    user = User(username="segmented", email="segmented@example.com", hashed_password="pass")
+    db_session.add(user)
+    await db_session.commit()
+    stale = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    db_session.add(UserSegment(user_id=user.id, segment=0, model_version="000001", assigned_at=stale))
+    await db_session.commit()
+
+    # As assign_user_segments_task does: ON CONFLICT updates bypass the ORM's onupdate
+    await upsert_rows(db_session, UserSegment.__table__, [{"user_id": user.id, "segment": 1, "model_version": "000002"}],
+                      ["user_id"], ["segment", "model_version"], extra_set={"assigned_at": func.now()})
+    await db_session.commit()
+    assigned_at = await db_session.scalar(select(UserSegment.assigned_at).execution_options(populate_existing=True))
+    assert assigned_at.replace(tzinfo=timezone.utc) > stale
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.src.ml_engine.behavior_analyzer import BehaviorAnalyzer
+
+CATEGORIES = ['Dining', 'Groceries', 'Travel']
+
+def make_population(n_users: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for user_id in range(n_users):
+        heavy = CATEGORIES[user_id % 3]
+        for category in CATEGORIES:
+            rows.append((user_id, category, 1000.0 if category == heavy else rng.uniform(0, 50)))
+    return pd.DataFrame(rows, columns=['user_id', 'category', 'amount'])
+
+def chunks(df: pd.DataFrame, users_per_chunk: int):
+    for start in range(0, df['user_id'].max() + 1, users_per_chunk):
+        yield df[(df['user_id'] >= start) & (df['user_id'] < start + users_per_chunk)]
+
+def test_streamed_population_fit_separates_segments():
+    population = make_population(300)
+    analyzer = BehaviorAnalyzer()
+    analyzer.start_population_fit(CATEGORIES, n_clusters=3, batch_size=50)
+    for chunk in chunks(population, 2):
+        analyzer.update_population_scaler(chunk)
+    for chunk in chunks(population, 2):
+        analyzer.update_population_segments(chunk)
+    analyzer.finish_population_fit()
+
+    vectors = analyzer.pivot_spend_vectors(population)
+    labels = analyzer.kmeans_model.predict(analyzer.scaler.transform(vectors.to_numpy()))
+    # Users sharing a dominant category land in the same segment
+    for heavy in range(3):
+        assert len(set(labels[heavy::3])) == 1
+    assert len(set(labels)) == 3
+
+def test_pivot_reindexes_to_feature_set():
+    analyzer = BehaviorAnalyzer()
+    analyzer.start_population_fit(CATEGORIES, n_clusters=2)
+    df = pd.DataFrame({'user_id': [1, 1, 2], 'category': ['Dining', 'Crypto', 'Travel'], 'amount': [10.0, 5.0, 20.0]})
+    pivot = analyzer.pivot_spend_vectors(df)
+    assert list(pivot.columns) == CATEGORIES
+    assert pivot.loc[1].tolist() == [10.0, 0.0, 0.0]
+
+def test_finish_requires_enough_users():
+    analyzer = BehaviorAnalyzer()
+    analyzer.start_population_fit(CATEGORIES, n_clusters=3)
+    small = make_population(2)
+    analyzer.update_population_scaler(small)
+    analyzer.update_population_segments(small)
+    with pytest.raises(ValueError):
+        analyzer.finish_population_fit()
+
+def test_assign_segments_bulk_matches_single_user():
+    population = make_population(30)
+    analyzer = BehaviorAnalyzer()
+    analyzer.analyze_spending_patterns(population, n_clusters=3)
+
+    segments = analyzer.assign_segments(population)
+    assert set(segments) == set(range(30))
+
+    user_rows = population[population['user_id'] == 4].drop(columns='user_id')
+    assert analyzer.get_user_segment(user_rows) == segments[4]
+    assert analyzer.assign_segments(population.iloc[0:0]) == {}
+
+def test_assign_segments_requires_model():
+    with pytest.raises(ValueError):
+        BehaviorAnalyzer().assign_segments(make_population(3))
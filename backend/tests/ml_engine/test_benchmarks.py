@@ -0,0 +1,43 @@
+import pandas as pd
+
+from backend.benchmarks.run_benchmarks import COMPONENTS, compare, run_benchmarks
+from backend.benchmarks.synthetic_data import SyntheticFinanceGenerator
+
+def test_generator_is_seeded_and_realistic():
+    data = SyntheticFinanceGenerator(n_users=50, n_transactions=3_000, days=120, seed=7).generate()
+    again = SyntheticFinanceGenerator(n_users=50, n_transactions=3_000, days=120, seed=7).generate()
+    for name in ('transactions', 'budgets', 'goals'):
+        pd.testing.assert_frame_equal(data[name], again[name])
+
+    transactions = data['transactions']
+    assert len(transactions) == 3_000
+    assert transactions['date'].is_monotonic_increasing
+    assert set(transactions['type']) == {'debit', 'credit'}
+    assert (transactions.loc[transactions['type'] == 'credit', 'category'] == 'Income').all()
+    assert transactions['description'].str.contains('NETFLIX|SPOTIFY|RENT|COMCAST|VERIZON').any()
+    assert transactions['user_id'].between(1, 50).all()
+    assert set(data['budgets'].columns) == {'user_id', 'category', 'amount'}
+    assert data['goals']['target_date'].isna().any()
+
+def test_different_seed_changes_data():
+    a = SyntheticFinanceGenerator(n_users=20, n_transactions=500, seed=1).generate()['transactions']
+    b = SyntheticFinanceGenerator(n_users=20, n_transactions=500, seed=2).generate()['transactions']
+    assert not a['amount'].equals(b['amount'])
+
+def test_run_benchmarks_reports_every_component():
+    report = run_benchmarks(40, 2_000, days=90, arima_users=2)
+    assert set(report['results']) == {'synthetic_data', *COMPONENTS}
+    for result in report['results'].values():
+        assert result['items'] > 0
+        assert result['seconds'] >= 0
+        assert result['peak_memory_mb'] > 0
+    assert report['config']['n_transactions'] == 2_000
+    assert report['dataset']['transactions'] == 2_000
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"budget_optimizer": {"seconds": 1.0}, "forecaster_holt": {"seconds": 2.0}}}
+    report = {"results": {"budget_optimizer": {"seconds": 1.5}, "forecaster_holt": {"seconds": 2.1}, "behavior_analyzer": {"seconds": 1.0}}}
+    comparison = compare(report, baseline)
+    assert comparison["budget_optimizer"]["regression"]
+    assert not comparison["forecaster_holt"]["regression"]
+    assert "behavior_analyzer" not in comparison
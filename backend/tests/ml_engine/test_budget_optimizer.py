@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from backend.src.ml_engine.budget_optimizer import BudgetOptimizer
+
+HISTORY = pd.DataFrame({
+    'user_id': [1, 1, 1, 1, 2, 2],
+    'category': ['Groceries', 'Transport', 'Groceries', 'Shopping', 'Groceries', 'Dining'],
+    'amount': [150.0, 50.0, 120.0, 80.0, 40.0, 100.0],
+})
+BUDGETS = pd.DataFrame({
+    'user_id': [1, 1, 1, 2, 2, 3],
+    'category': ['Groceries', 'Transport', 'Shopping', 'Groceries', 'Travel', 'Groceries'],
+    'amount': [100.0, 70.0, 50.0, 45.0, 200.0, 300.0],
+})
+
+def test_optimize_budgets_applies_thresholds_for_all_users():
+    suggestions = BudgetOptimizer().optimize_budgets(HISTORY, BUDGETS)
+    assert suggestions['action'].tolist() == [
+        'decrease_suggestion', 'increase_suggestion', 'decrease_suggestion',
+        'no_change', 'increase_suggestion', 'increase_suggestion'
+    ]
+    assert suggestions['suggested_amount'].iloc[0] == 121.5
+    assert np.isnan(suggestions['suggested_amount'].iloc[3])
+    assert suggestions['has_history'].tolist() == [True] * 5 + [False]
+
+def test_batch_matches_single_user_optimization():
+    optimizer = BudgetOptimizer()
+    batch = optimizer.format_suggestions(optimizer.optimize_budgets(HISTORY, BUDGETS))
+    single = optimizer.optimize_budget(1, {'Groceries': 100.0, 'Transport': 70.0, 'Shopping': 50.0}, HISTORY)
+    assert batch[1] == single
+    assert single['suggestions']['Transport'] == {
+        'action': 'increase_suggestion', 'suggested_amount': 55.0,
+        'reason': 'Consistently underspending; consider reallocating funds.'
+    }
+    assert batch[3] == {'message': 'No spending history for optimization', 'suggestions': {'Groceries': 300.0}}
+
+def test_optimize_budget_with_empty_budget():
+    single = BudgetOptimizer().optimize_budget(1, {}, HISTORY)
+    assert single == {'message': 'Budget optimization initiated', 'suggestions': {}}
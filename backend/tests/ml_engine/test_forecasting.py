@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.src.ml_engine.forecasting import (
+    FinancialForecaster, build_cash_flow_matrix, build_daily_cash_flows, holt_forecast_matrix, state_last_observation_date
+)
+
+def make_transactions(user_ids, days: int = 60, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for user_id in user_ids:
+        for day in pd.date_range("2024-01-01", periods=days, freq='D'):
+            if day.day == 1:
+                rows.append((user_id, day, 3000.0, 'credit'))
+            rows.append((user_id, day, float(rng.uniform(10, 100)), 'debit'))
+    return pd.DataFrame(rows, columns=['user_id', 'date', 'amount', 'type'])
+
+def test_build_daily_cash_flows_nets_and_fills_gaps():
+    df = pd.DataFrame({
+        'user_id': [1, 1, 1, 2],
+        'date': ['2024-01-01', '2024-01-01', '2024-01-04', '2024-01-02'],
+        'amount': [100.0, 30.0, 20.0, 5.0],
+        'type': ['credit', 'debit', 'debit', 'debit'],
+    })
+    series = build_daily_cash_flows(df)
+    assert series[1].tolist() == [70.0, 0.0, 0.0, -20.0]
+    assert series[1].index.freqstr == 'D'
+    assert series[2].tolist() == [-5.0]
+
+def test_forecast_cash_flows_for_many_users():
+    transactions = make_transactions([1, 2, 3])
+    sparse_user = pd.DataFrame({'user_id': [4], 'date': ['2024-01-05'], 'amount': [10.0], 'type': ['debit']})
+    forecaster = FinancialForecaster()
+
+    forecasts = forecaster.forecast_cash_flows(pd.concat([transactions, sparse_user]), steps=7, max_workers=2)
+    assert set(forecasts) == {1, 2, 3, 4}
+    assert forecasts[4] == []
+    assert [row['date'] for row in forecasts[1]] == [d.strftime("%Y-%m-%d") for d in pd.date_range("2024-03-01", periods=7)]
+
+    in_process = forecaster.forecast_cash_flows(transactions, steps=7, max_workers=1)
+    assert in_process[2] == forecasts[2]
+
+def daily_series(days: int, start: str = "2024-01-01", seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.normal(0, 50, days), index=pd.date_range(start, periods=days, freq='D', tz='UTC'))
+
+def test_update_state_appends_without_refit():
+    forecaster = FinancialForecaster()
+    history = daily_series(120)
+    state = forecaster.fit_state(1, history.iloc[:100], as_of=datetime(2024, 4, 10))
+
+    new_state, refitted = forecaster.update_state(1, state, history.iloc[100:], as_of=datetime(2024, 4, 30))
+    assert refitted is False
+    assert new_state["params"] == state["params"]
+    assert len(new_state["history"]) == 120
+    assert state_last_observation_date(new_state) == history.index[-1]
+    forecast = forecaster.forecast_cash_flow(1, steps=5)
+    assert [row['date'] for row in forecast] == ["2024-04-30", "2024-05-01", "2024-05-02", "2024-05-03", "2024-05-04"]
+
+def test_update_state_fills_quiet_days_and_caps_history():
+    forecaster = FinancialForecaster()
+    state = forecaster.fit_state(1, daily_series(100), as_of=datetime(2024, 4, 10))
+    through = pd.Timestamp("2024-04-15", tz='UTC')
+    new_state, _ = forecaster.update_state(1, state, daily_series(0), through=through, as_of=datetime(2024, 4, 16), max_history_days=100)
+    assert state_last_observation_date(new_state) == through
+    assert len(new_state["history"]) == 100
+    assert new_state["history"][-6:] == [0.0] * 6
+
+def test_update_state_refits_on_schedule_or_drift():
+    forecaster = FinancialForecaster()
+    history = daily_series(130)
+    state = forecaster.fit_state(1, history.iloc[:100], as_of=datetime(2024, 4, 10))
+
+    _, refitted = forecaster.update_state(1, state, history.iloc[100:], as_of=datetime(2024, 6, 1), refit_interval_days=30)
+    assert refitted is True
+
+    shifted = history.iloc[100:] + 5000.0
+    _, refitted = forecaster.update_state(1, state, shifted, as_of=datetime(2024, 4, 30))
+    assert refitted is True
+
+def reference_holt(series, steps, alpha, beta, damping):
+    level, trend = series[0], 0.0
+    for x in series[1:]:
+        previous_level = level
+        level = alpha * x + (1 - alpha) * (level + damping * trend)
+        trend = beta * (level - previous_level) + (1 - beta) * damping * trend
+    return [level + trend * sum(damping ** i for i in range(1, h + 1)) for h in range(1, steps + 1)]
+
+def test_holt_forecast_matrix_matches_scalar_recurrence():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(0, 10, size=(3, 40))
+    matrix[1, :15] = np.nan # series starting later
+    forecast = holt_forecast_matrix(matrix, 5, alpha=0.4, beta=0.2, damping=0.9)
+    assert forecast.shape == (3, 5)
+    for row, expected_start in zip(range(3), [0, 15, 0]):
+        expected = reference_holt(matrix[row, expected_start:], 5, 0.4, 0.2, 0.9)
+        np.testing.assert_allclose(forecast[row], expected)
+
+def test_fast_forecast_cash_flows_aligns_users():
+    transactions = pd.concat([make_transactions([1], days=30), make_transactions([2], days=10)])
+    transactions.loc[transactions['user_id'] == 2, 'date'] += pd.Timedelta(days=5)
+    user_ids, dates, matrix = build_cash_flow_matrix(transactions)
+    assert user_ids.tolist() == [1, 2]
+    assert matrix.shape == (2, 30)
+    assert np.isnan(matrix[1, :5]).all() and (matrix[1, 15:] == 0).all()
+
+    forecasts = FinancialForecaster().forecast_cash_flows(transactions, steps=3, method="holt")
+    assert [row['date'] for row in forecasts[2]] == ["2024-01-31", "2024-02-01", "2024-02-02"]
+    assert [row['date'] for row in forecasts[1]] == [row['date'] for row in forecasts[2]]
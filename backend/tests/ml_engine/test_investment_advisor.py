@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from backend.src.ml_engine.investment_advisor import InvestmentAdvisor
+
+def test_simulate_portfolios_is_seeded_and_chunk_independent():
+    advisor = InvestmentAdvisor()
+    weights = advisor.allocation_matrix([
+        advisor.suggest_portfolio_allocation("conservative"),
+        advisor.suggest_portfolio_allocation("aggressive"),
+        {"cash": 1.0},
+    ])
+    kwargs = dict(initial_values=10000.0, monthly_contributions=100.0, horizon_months=36, n_paths=2000, seed=7, path_block_size=300)
+
+    full = advisor.simulate_portfolios(weights, target_amounts=[15000.0, 15000.0, 13000.0], **kwargs)
+    # A tiny element budget forces one portfolio per batch; results must not depend on it
+    chunked = advisor.simulate_portfolios(weights, target_amounts=[15000.0, 15000.0, 13000.0], max_chunk_elements=3 * 2000, **kwargs)
+    # Nor on which other portfolios share the call
+    alone = advisor.simulate_portfolios(weights[1:2], target_amounts=15000.0, **kwargs)
+
+    assert full["checkpoint_months"] == [12, 24, 36]
+    assert full["bands"].shape == (3, 5, 3)
+    np.testing.assert_allclose(full["bands"], chunked["bands"])
+    np.testing.assert_allclose(full["goal_probability"], chunked["goal_probability"])
+    np.testing.assert_allclose(full["bands"][1:2], alone["bands"])
+    np.testing.assert_allclose(full["goal_probability"][1:2], alone["goal_probability"])
+
+    # Percentile bands are ordered and the aggressive mix has the wider spread
+    assert np.all(np.diff(full["bands"], axis=1) >= 0)
+    spread = full["bands"][:, -1, -1] - full["bands"][:, 0, -1]
+    assert spread[1] > spread[0] > spread[2]
+    # Cash alone (~2%/yr + 3600 contributed) lands just above 13000 almost surely
+    assert full["goal_probability"][2] > 0.99
+
+def test_project_allocation_for_goal():
+    result = InvestmentAdvisor().project_allocation("moderate", 5000.0, 200.0, horizon_years=5,
+                                                    target_amount=1_000_000.0, n_paths=1000)
+
+    assert result["allocation"] == {"stocks": 0.6, "bonds": 0.3, "cash": 0.1}
+    assert result["checkpoint_months"] == [12, 24, 36, 48, 60]
+    assert set(result["percentile_bands"]) == {"p5", "p25", "p50", "p75", "p95"}
+    assert len(result["percentile_bands"]["p50"]) == 5
+    assert result["goal_probability"] == 0.0
+
+def test_compute_rebalancing_drift_flags_only_drifted_users():
+    holdings = pd.DataFrame({
+        'user_id': [1, 1, 1, 2, 2, 3, 4],
+        'type': ['stock', 'bond', 'cash', 'etf', 'bond', 'crypto', 'stock'],
+        'current_value': [6000.0, 3000.0, 1000.0, 9000.0, 1000.0, 500.0, 0.0],
+    })
+    strategies = pd.Series({2: 'aggressive', 3: 'conservative'})
+    advisor = InvestmentAdvisor()
+    drift = advisor.compute_rebalancing_drift(holdings, strategies)
+
+    # User 1 matches "moderate" exactly and user 4 holds nothing
+    assert list(drift['user_id']) == [2, 3]
+    user_2 = drift.iloc[0]
+    assert user_2['max_drift'] == 0.1
+    assert (user_2['stocks_trade'], user_2['bonds_trade'], user_2['cash_trade']) == (-1000.0, 500.0, 500.0)
+    assert drift.iloc[1]['stocks_weight'] == 1.0
+
+    suggestions = advisor.format_rebalance_suggestions(drift)
+    assert suggestions[2]['trades'] == {"stocks": -1000.0, "bonds": 500.0, "cash": 500.0}
+    assert suggestions[3]['target_allocation'] == {"stocks": 0.3, "bonds": 0.6, "cash": 0.1}
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from backend.src.ml_engine.merchant_index import MerchantIndex
+from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer
+
+def build_index() -> MerchantIndex:
+    history = pd.DataFrame({
+        'description': ['STARBUCKS #12', 'Starbucks 99', 'NETFLIX.COM', 'AMAZON MKTP', 'AMAZON MKTP', 'LOCAL SHOP'],
+        'category': ['Coffee', 'Coffee', 'Subscriptions', 'Shopping', 'Groceries', 'Shopping'],
+        'count': [2, 3, 4, 5, 5, 1]
+    })
+    merchant_index = MerchantIndex(min_support=3, min_purity=0.9)
+    merchant_index.build(history)
+    return merchant_index
+
+def test_build_keeps_only_confident_merchants():
+    merchant_index = build_index()
+    # amazon is ambiguous (50/50) and local shop lacks support
+    assert merchant_index.index == {'starbucks': 'Coffee', 'netflix com': 'Subscriptions'}
+
+def test_build_never_indexes_uncategorized():
+    merchant_index = MerchantIndex(min_support=3, min_purity=0.9)
+    merchant_index.build(pd.DataFrame({
+        'description': ['MYSTERY SHOP', 'STARBUCKS #1', 'STARBUCKS #2'],
+        'category': ['Uncategorized', 'Coffee', 'Uncategorized'],
+        'count': [5, 3, 1]
+    }))
+    # Uncategorized rows count neither as a label nor against the purity of a real one
+    assert merchant_index.index == {'starbucks': 'Coffee'}
+
+def test_lookup_counts_hits_and_misses():
+    merchant_index = build_index()
+    assert merchant_index.lookup_many(['STARBUCKS #7', 'AMAZON MKTP', 'Netflix.com']) == ['Coffee', None, 'Subscriptions']
+    stats = merchant_index.stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert stats['hit_rate'] == round(2 / 3, 4)
+
+def test_artifacts_round_trip():
+    merchant_index = build_index()
+    restored = MerchantIndex.from_artifacts(*merchant_index.to_artifacts())
+    assert restored.index == merchant_index.index
+    assert restored.built_at == merchant_index.built_at
+
+def test_categorizer_consults_index_before_model():
+    categorizer = TransactionCategorizer(merchant_index=build_index())
+    categorizer.train(pd.DataFrame({
+        'description': ['UBER TRIP', 'WHOLE FOODS', 'SHELL GAS'],
+        'category': ['Transportation', 'Groceries', 'Gas']
+    }))
+    results = categorizer.predict_proba_many(['STARBUCKS #1', 'UBER TRIP'])
+    assert results[0] == [('Coffee', 1.0)]
+    assert results[1][0][0] == 'Transportation'
+    assert categorizer.merchant_index.hits == 1
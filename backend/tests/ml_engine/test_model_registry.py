@@ -0,0 +1,80 @@
+import errno
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.src.ml_engine import model_registry
+from backend.src.ml_engine.model_registry import MAX_PUBLISH_ATTEMPTS, ModelHandle, ModelRegistry
+from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer
+
+def test_register_and_load_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.latest_version("weights") is None
+
+    v1 = registry.register("weights", {"coef": np.arange(4.0)}, {"trained_rows": 4})
+    v2 = registry.register("weights", {"coef": np.arange(8.0)})
+    assert (v1, v2) == ("000001", "000002")
+    assert registry.list_versions("weights") == [v1, v2]
+    assert registry.latest_version("weights") == v2
+
+    artifacts, metadata = registry.load("weights", v1)
+    assert isinstance(artifacts["coef"], np.memmap)
+    assert not artifacts["coef"].flags.writeable
+    assert metadata["trained_rows"] == 4
+
+    artifacts, _ = registry.load("weights", mmap_mode=None)
+    assert len(artifacts["coef"]) == 8
+    assert not isinstance(artifacts["coef"], np.memmap)
+
+def test_prune_keeps_latest(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    for i in range(4):
+        registry.register("weights", {"coef": np.zeros(i + 1)})
+    registry.set_latest("weights", "000001")
+    registry.prune("weights", keep=2)
+    assert registry.list_versions("weights") == ["000001", "000003", "000004"]
+
+    with pytest.raises(ValueError):
+        registry.set_latest("weights", "000002")
+
+def test_register_retries_only_version_collisions(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path))
+    attempts = []
+
+    def failing_rename(code):
+        def rename(src, dst):
+            attempts.append(dst)
+            raise OSError(code, os.strerror(code))
+        return rename
+
+    monkeypatch.setattr(model_registry.os, "rename", failing_rename(errno.EACCES))
+    with pytest.raises(PermissionError):
+        registry.register("weights", {"coef": np.zeros(2)})
+    assert len(attempts) == 1
+
+    attempts.clear()
+    monkeypatch.setattr(model_registry.os, "rename", failing_rename(errno.ENOTEMPTY))
+    with pytest.raises(OSError):
+        registry.register("weights", {"coef": np.zeros(2)})
+    assert len(attempts) == MAX_PUBLISH_ATTEMPTS
+    assert os.listdir(tmp_path / "weights") == [] # Staging directories are cleaned up
+
+def test_model_handle_hot_swaps_to_new_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    handle = ModelHandle(registry, "categorizer", TransactionCategorizer.from_artifacts, poll_interval=0)
+    with pytest.raises(FileNotFoundError):
+        handle.get()
+
+    categorizer = TransactionCategorizer(incremental=True)
+    categorizer.partial_fit(pd.DataFrame({'description': ['STARBUCKS', 'UBER'], 'category': ['Coffee', 'Transportation']}))
+    registry.register("categorizer", *categorizer.to_artifacts())
+    first = handle.get()
+    assert handle.version == "000001"
+    assert first.predict('STARBUCKS') == categorizer.predict('STARBUCKS')
+
+    registry.register("categorizer", *categorizer.to_artifacts())
+    assert handle.get() is not first
+    assert handle.version == "000002"
+    assert handle.refresh() is False
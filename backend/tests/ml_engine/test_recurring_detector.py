@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pandas as pd
+
+from backend.src.ml_engine.recurring_detector import RecurringDetector
+
+def test_update_detects_monthly_subscription():
+    detector = RecurringDetector()
+    state = None
+    for month in range(1, 5):
+        state = detector.update(state, datetime(2024, month, 15), 15.99)
+
+    assert state["count"] == 4
+    assert detector.is_recurring(state)
+    assert detector.cadence(state) == "monthly"
+    summary = detector.summarize(state)
+    assert summary["expected_amount"] == 15.99
+    assert summary["next_expected_date"].startswith("2024-05-1")
+
+    # A late, out-of-order charge only updates amount statistics
+    late = detector.update(state, datetime(2024, 3, 1), 15.99)
+    assert late["last_date"] == state["last_date"] and late["interval_mean"] == state["interval_mean"]
+
+def test_irregular_merchant_is_not_recurring():
+    detector = RecurringDetector()
+    state = None
+    for day, amount in [(1, 12.0), (3, 80.0), (20, 5.5), (22, 41.0)]:
+        state = detector.update(state, datetime(2024, 1, day), amount)
+    assert not detector.is_recurring(state)
+
+def test_update_many_keys_by_user_and_normalized_merchant():
+    detector = RecurringDetector()
+    df = pd.DataFrame({
+        'user_id': [1, 1, 1, 2, 1],
+        'description': ['NETFLIX.COM 123', 'Netflix.com 456', 'Netflix.com 789', 'NETFLIX.COM', 'PAYROLL'],
+        'amount': [15.49, 15.49, 15.49, 15.49, -2000.0],
+        'date': pd.to_datetime(['2024-03-05', '2024-01-05', '2024-02-05', '2024-01-05', '2024-01-31'], utc=True),
+    })
+    states = {}
+    touched = detector.update_many(states, df)
+
+    assert set(touched) == {(1, 'netflix com'), (2, 'netflix com')} # credits are ignored
+    assert states[(1, 'netflix com')]["count"] == 3
+    assert states[(1, 'netflix com')]["last_date"] == "2024-03-05T00:00:00"
+    assert detector.is_recurring(states[(1, 'netflix com')])
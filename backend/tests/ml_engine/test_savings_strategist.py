@@ -0,0 +1,37 @@
+import pandas as pd
+
+from backend.src.ml_engine.savings_strategist import SavingsStrategist
+
+AS_OF = pd.Timestamp("2024-01-01", tz='UTC')
+
+def test_allocate_savings_by_priority_and_deadline():
+    income = pd.DataFrame({'user_id': [1, 2, 3], 'amount': [5000.0, 2000.0, 1000.0]})
+    expenses = pd.DataFrame({'user_id': [1, 2, 3], 'amount': [3000.0, 2500.0, 500.0]})
+    goals = pd.DataFrame({
+        'user_id': [1, 1, 1, 1, 2],
+        'name': ['Vacation', 'Emergency Fund', 'Car', 'Done', 'Laptop'],
+        'target_amount': [1200.0, 6000.0, 20000.0, 100.0, 1500.0],
+        'current_amount': [0.0, 5400.0, 0.0, 100.0, 0.0],
+        'target_date': ['2024-12-31', '2024-03-31', None, '2024-06-30', '2024-06-30'],
+        'priority': ['low', 'high', 'high', 'high', None],
+    })
+    summary, allocations = SavingsStrategist().allocate_savings(income, expenses, goals, as_of=AS_OF)
+
+    # User 1 saves 20% of 2000 = 400: emergency fund need 600/3 = 200, vacation need 1200/12 = 100,
+    # the undated car goal has no monthly need; the leftover 100 tops up the emergency fund gap first
+    user_1 = allocations[allocations['user_id'] == 1].set_index('name')['allocated'].to_dict()
+    assert user_1 == {'Emergency Fund': 300.0, 'Car': 0.0, 'Vacation': 100.0}
+    assert list(allocations[allocations['user_id'] == 1]['name']) == ['Emergency Fund', 'Car', 'Vacation']
+
+    assert summary.loc[1, 'suggested_amount'] == 400.0
+    assert summary.loc[2, 'suggested_amount'] == 0.0 # no disposable income
+    assert summary.loc[3, 'suggested_amount'] == 100.0 # no goals: flat rate
+
+def test_single_user_suggestion_caps_at_goal_remaining():
+    income = pd.DataFrame({'user_id': [7], 'amount': [3000.0]})
+    expenses = pd.DataFrame({'user_id': [7], 'amount': [1500.0]})
+    goals = pd.DataFrame({'user_id': [7], 'name': ['Emergency Fund'], 'target_amount': [5000.0],
+                          'current_amount': [4900.0], 'target_date': ["2099-12-31"]})
+    suggestion = SavingsStrategist().suggest_savings_contribution(7, income, expenses, goals)
+    assert suggestion['suggested_amount'] == 100.0
+    assert suggestion['allocations'] == [{'name': 'Emergency Fund', 'amount': 100.0}]
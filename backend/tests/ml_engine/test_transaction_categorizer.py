@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer, normalize_merchant
+
+@pytest.fixture(name="categorizer")
+def trained_categorizer():
+    df = pd.DataFrame({
+        'description': [
+            'STARBUCKS COFFEE', 'WHOLE FOODS MARKET', 'AMAZON.COM',
+            'NYC TRANSIT MTA', 'ATM WITHDRAWAL', 'UBER TRIP',
+            'Spotify Premium', 'Netflix Subscription'
+        ],
+        'category': [
+            'Coffee', 'Groceries', 'Shopping',
+            'Transportation', 'Cash', 'Transportation',
+            'Subscriptions', 'Subscriptions'
+        ]
+    })
+    categorizer = TransactionCategorizer(cache_size=2)
+    categorizer.train(df)
+    return categorizer
+
+def test_normalize_merchant():
+    assert normalize_merchant("STARBUCKS #1234") == "starbucks"
+    assert normalize_merchant("  Uber *Trip 42 ") == "uber trip"
+    assert normalize_merchant(None) == ""
+
+def test_predict_many_matches_predict(categorizer: TransactionCategorizer):
+    descriptions = ['STARBUCKS COFFEE', 'UBER TRIP', 'Netflix Subscription']
+    batch = categorizer.predict_many(descriptions)
+    assert batch == [categorizer.predict(d) for d in descriptions]
+
+def test_predict_proba_many_top_k(categorizer: TransactionCategorizer):
+    results = categorizer.predict_proba_many(['STARBUCKS COFFEE', 'UBER TRIP'], top_k=3)
+    assert len(results) == 2
+    for ranked in results:
+        assert len(ranked) == 3
+        confidences = [conf for _, conf in ranked]
+        assert confidences == sorted(confidences, reverse=True)
+        assert all(0.0 <= conf <= 1.0 for conf in confidences)
+
+def test_cache_is_bounded_lru(categorizer: TransactionCategorizer):
+    categorizer.predict_many(['STARBUCKS #1', 'STARBUCKS #2', 'UBER TRIP', 'ATM WITHDRAWAL'])
+    assert list(categorizer._cache.keys()) == ['uber trip', 'atm withdrawal']
+
+    categorizer.predict('UBER TRIP')
+    categorizer.predict('AMAZON.COM')
+    assert list(categorizer._cache.keys()) == ['uber trip', 'amazon com']
+
+def test_predict_requires_trained_model():
+    with pytest.raises(ValueError):
+        TransactionCategorizer().predict_many(['STARBUCKS'])
+
+def test_partial_fit_updates_incremental_model():
+    categorizer = TransactionCategorizer(incremental=True)
+    first_batch = pd.DataFrame({
+        'description': ['STARBUCKS COFFEE', 'UBER TRIP', 'NETFLIX SUBSCRIPTION'],
+        'category': ['Coffee', 'Transportation', 'Subscriptions']
+    })
+    for _ in range(5):
+        categorizer.partial_fit(first_batch)
+    assert categorizer.predict('STARBUCKS #99') == 'Coffee'
+
+    correction = pd.DataFrame({'description': ['LYFT RIDE'] * 5, 'category': ['Transportation'] * 5})
+    categorizer.partial_fit(correction)
+    assert categorizer.predict('LYFT RIDE') == 'Transportation'
+
+    with pytest.raises(ValueError):
+        categorizer.partial_fit(pd.DataFrame({'description': ['CVS'], 'category': ['Health']}))
+
+def test_save_and_load_preserves_checkpoint(tmp_path):
+    categorizer = TransactionCategorizer(incremental=True)
+    categorizer.partial_fit(pd.DataFrame({'description': ['STARBUCKS', 'UBER'], 'category': ['Coffee', 'Transportation']}))
+    categorizer.checkpoint = pd.Timestamp("2024-01-31T12:00:00")
+    categorizer.save_model(str(tmp_path / "categorizer"))
+
+    loaded = TransactionCategorizer()
+    loaded.load_model(str(tmp_path / "categorizer"))
+    assert loaded.incremental is True
+    assert loaded.checkpoint == categorizer.checkpoint
+    assert loaded.predict('STARBUCKS') == categorizer.predict('STARBUCKS')
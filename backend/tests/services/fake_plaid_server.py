@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+class FakePlaidServer:
+    """
+    Minimal local stand-in for the Plaid API used by the sync tests. Each access token has an
+    append-only change log; a /transactions/sync cursor is the position in that log, so a client that
+    keeps its cursor only ever receives the changes recorded since its previous sync.
+    Records every request and can inject latency or a one-off mutation-during-pagination error.
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.items: Dict[str, dict] = {}
+        self.requests: List[dict] = []
+        self.connections = set() # Client (host, port) pairs seen, to check connection reuse
+        self.fail_next_with: Optional[str] = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakePlaidServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_item(self, access_token: str, item_id: str, accounts: Optional[List[dict]] = None):
+        self.items[access_token] = {"item_id": item_id, "log": [], "accounts": accounts or []}
+
+    def add(self, access_token: str, transactions: List[dict]):
+        self.items[access_token]["log"].extend(("added", tx) for tx in transactions)
+
+    def modify(self, access_token: str, transactions: List[dict]):
+        self.items[access_token]["log"].extend(("modified", tx) for tx in transactions)
+
+    def remove(self, access_token: str, transaction_ids: List[str]):
+        self.items[access_token]["log"].extend(("removed", {"transaction_id": tx_id}) for tx_id in transaction_ids)
+
+    def transactions_sync(self, body: dict) -> dict:
+        with self._lock:
+            self.requests.append(body)
+            if self.fail_next_with and body.get("cursor"):
+                error, self.fail_next_with = self.fail_next_with, None
+                return {"__status__": 400, "error_type": "TRANSACTIONS_ERROR", "error_code": error,
+                        "error_message": "Underlying transaction data changed since last page was fetched."}
+        item = self.items.get(body["access_token"])
+        if item is None:
+            return {"__status__": 400, "error_type": "INVALID_INPUT", "error_code": "INVALID_ACCESS_TOKEN"}
+        start = int(body.get("cursor") or 0)
+        end = min(start + body.get("count", 100), len(item["log"]))
+        page = {"added": [], "modified": [], "removed": []}
+        for kind, tx in item["log"][start:end]:
+            page[kind].append(tx)
+        return {**page, "accounts": item["accounts"], "next_cursor": str(end), "has_more": end < len(item["log"]),
+                "request_id": f"req-{len(self.requests)}", "transactions_update_status": "HISTORICAL_UPDATE_COMPLETE"}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+
+            def do_POST(self):
+                server.connections.add(self.client_address)
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if server.latency:
+                    time.sleep(server.latency)
+                if self.path == "/transactions/sync":
+                    payload = server.transactions_sync(body)
+                elif self.path == "/accounts/get":
+                    server.requests.append(body)
+                    item = server.items.get(body["access_token"])
+                    payload = ({"accounts": item["accounts"], "item": {"item_id": item["item_id"]}, "request_id": f"req-{len(server.requests)}"}
+                               if item else {"__status__": 400, "error_type": "INVALID_INPUT", "error_code": "INVALID_ACCESS_TOKEN"})
+                elif self.path == "/item/public_token/exchange":
+                    server.requests.append(body)
+                    payload = {"access_token": f"access-{body['public_token']}", "item_id": f"item-{body['public_token']}",
+                               "request_id": f"req-{len(server.requests)}"}
+                else:
+                    payload = {"__status__": 404, "error_code": "NOT_FOUND"}
+                status = payload.pop("__status__", 200)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def plaid_transaction(transaction_id: str, account_id: str, name: str, amount: float, date: str, category: str = "GENERAL_MERCHANDISE") -> dict:
+    return {"transaction_id": transaction_id, "account_id": account_id, "name": name, "amount": amount, "date": date,
+            "iso_currency_code": "USD", "pending": False, "personal_finance_category": {"primary": category}}
+
+def plaid_account(account_id: str, name: str = "Checking", type: str = "depository", current: float = 100.0) -> dict:
+    return {"account_id": account_id, "name": name, "official_name": None, "type": type, "subtype": None, "mask": "0000",
+            "balances": {"current": current, "available": current, "iso_currency_code": "USD"}}
@@ -0,0 +1,197 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.src.db.session import Base
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.db.models.plaid_item_cursor import PlaidItemCursor
+from backend.src.core.config import settings
+from backend.src.services.account_service import AccountService, SYNC_MUTATION_ERROR
+from backend.src.services.data_ingestion_service import DataIngestionService
+from backend.src.services.plaid_client import PlaidClient
+from backend.tests.services.fake_plaid_server import FakePlaidServer, plaid_account, plaid_transaction
+
+@pytest.fixture(name="db_session")
+async def create_db_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+@pytest.fixture(name="plaid_server")
+def create_plaid_server():
+    server = FakePlaidServer().start()
+    yield server
+    server.stop()
+
+async def link_item(db_session: AsyncSession, user_id: int, item_id: str, plaid_account_ids: list):
+    db_session.add_all([
+        Account(user_id=user_id, plaid_account_id=plaid_account_id, plaid_item_id=item_id, access_token=f"access-{item_id}",
+                name=plaid_account_id, type="depository")
+        for plaid_account_id in plaid_account_ids
+    ])
+    await db_session.commit()
+
+@pytest.mark.asyncio
+async def test_sync_pages_through_deltas_and_persists_cursor(db_session: AsyncSession, plaid_server: FakePlaidServer, monkeypatch):
+    monkeypatch.setattr(settings, "PLAID_SYNC_PAGE_SIZE", 2)
+    await link_item(db_session, 1, "item-1", ["checking", "savings"])
+    # brokerage was added to the item after it was linked; the sync creates its account
+    plaid_server.add_item("access-item-1", "item-1", [plaid_account("checking"), plaid_account("savings"), plaid_account("brokerage", "Brokerage", "investment")])
+    plaid_server.add("access-item-1", [
+        plaid_transaction("t1", "checking", "GROCER", 40.0, "2024-01-02"),
+        plaid_transaction("t2", "checking", "CAFE", 4.5, "2024-01-03"),
+        plaid_transaction("t3", "savings", "INTEREST", -1.2, "2024-01-31"),
+        plaid_transaction("t4", "brokerage", "FUND", 10.0, "2024-01-31"),
+    ])
+    service = AccountService(db_session, PlaidClient(host=plaid_server.url))
+    checking = (await db_session.execute(select(Account).where(Account.plaid_account_id == "checking"))).scalar_one()
+
+    counts = await service.sync_transactions_for_account(checking.id)
+    assert counts == {"inserted": 4, "updated": 0, "removed": 0, "skipped": 0, "unmapped": 0}
+    assert [request.get("cursor") for request in plaid_server.requests] == [None, "2"]
+    assert (await db_session.scalar(select(PlaidItemCursor.cursor))) == "4"
+    brokerage = (await db_session.execute(select(Account).where(Account.plaid_account_id == "brokerage"))).scalar_one()
+    assert (brokerage.user_id, brokerage.plaid_item_id, brokerage.type, brokerage.current_balance) == (1, "item-1", "investment", 100.0)
+
+    # The next sync starts from the stored cursor and only receives the new changes
+    plaid_server.modify("access-item-1", [plaid_transaction("t2", "checking", "CAFE", 5.0, "2024-01-03")])
+    plaid_server.remove("access-item-1", ["t1"])
+    plaid_server.requests.clear()
+    counts = await service.sync_item("item-1")
+    assert counts == {"inserted": 0, "updated": 1, "removed": 1, "skipped": 0, "unmapped": 0}
+    assert [request.get("cursor") for request in plaid_server.requests] == ["4"]
+
+    rows = (await db_session.execute(select(Transaction.plaid_transaction_id, Transaction.amount, Transaction.account_id)
+                                     .order_by(Transaction.plaid_transaction_id))).all()
+    savings = (await db_session.execute(select(Account.id).where(Account.plaid_account_id == "savings"))).scalar_one()
+    assert [tuple(row) for row in rows] == [("t2", 5.0, checking.id), ("t3", -1.2, savings), ("t4", 10.0, brokerage.id)]
+
+    # Nothing new: one request, no writes
+    plaid_server.requests.clear()
+    assert await service.sync_item("item-1") == {"inserted": 0, "updated": 0, "removed": 0, "skipped": 0, "unmapped": 0}
+    assert len(plaid_server.requests) == 1
+
+@pytest.mark.asyncio
+async def test_sync_writes_pages_as_they_arrive(db_session: AsyncSession, plaid_server: FakePlaidServer, monkeypatch):
+    monkeypatch.setattr(settings, "PLAID_SYNC_PAGE_SIZE", 2)
+    monkeypatch.setattr(settings, "INGESTION_BATCH_SIZE", 3)
+    await link_item(db_session, 1, "item-1", ["checking"])
+    plaid_server.add_item("access-item-1", "item-1")
+    plaid_server.add("access-item-1", [plaid_transaction(f"t{i}", "checking", "SHOP", 1.0 + i, "2024-01-02") for i in range(5)])
+    plaid_server.remove("access-item-1", ["t1"]) # Removed on the third page, after it was written
+    plaid_server.add("access-item-1", [plaid_transaction("t5", "checking", "SHOP", 6.0, "2024-01-03")])
+
+    writes = []
+    apply_item_changes = DataIngestionService.apply_item_changes
+    async def record_writes(self, user_id, account_ids, parsed, removed_ids, batch_size=None):
+        writes.append((len(parsed), len(plaid_server.requests)))
+        return await apply_item_changes(self, user_id, account_ids, parsed, removed_ids, batch_size)
+    monkeypatch.setattr(DataIngestionService, "apply_item_changes", record_writes)
+
+    counts = await AccountService(db_session, PlaidClient(host=plaid_server.url)).sync_item("item-1")
+    # Batches of at most INGESTION_BATCH_SIZE rows, the first written before the later pages are fetched
+    assert writes == [(3, 2), (2, 3), (1, 4)]
+    assert counts == {"inserted": 6, "updated": 0, "removed": 1, "skipped": 0, "unmapped": 0}
+    stored = (await db_session.execute(select(Transaction.plaid_transaction_id).order_by(Transaction.plaid_transaction_id))).scalars().all()
+    assert stored == ["t0", "t2", "t3", "t4", "t5"]
+    assert (await db_session.scalar(select(PlaidItemCursor.cursor))) == "7"
+
+@pytest.mark.asyncio
+async def test_sync_keeps_cursor_while_transactions_are_unmapped(db_session: AsyncSession, plaid_server: FakePlaidServer):
+    # Linked through the old public token exchange, which stored a placeholder instead of the real account
+    await link_item(db_session, 1, "item-1", ["dummy_acc_item-1"])
+    plaid_server.add_item("access-item-1", "item-1")
+    plaid_server.add("access-item-1", [plaid_transaction("t1", "checking", "GROCER", 40.0, "2024-01-02")])
+    service = AccountService(db_session, PlaidClient(host=plaid_server.url))
+
+    # Plaid lists no accounts, even on /accounts/get: nothing can be mapped, so the cursor stays put
+    counts = await service.sync_item("item-1")
+    assert counts["unmapped"] == 1 and counts["inserted"] == 0
+    assert [request.get("cursor") for request in plaid_server.requests] == [None, None] # sync, then /accounts/get
+    assert (await db_session.scalar(select(PlaidItemCursor.cursor))) is None
+
+    # Once Plaid returns the account, the placeholder becomes it and the same changes are ingested
+    plaid_server.items["access-item-1"]["accounts"] = [plaid_account("checking")]
+    counts = await service.sync_item("item-1")
+    assert counts == {"inserted": 1, "updated": 0, "removed": 0, "skipped": 0, "unmapped": 0}
+    assert (await db_session.scalar(select(PlaidItemCursor.cursor))) == "1"
+    accounts = (await db_session.execute(select(Account.plaid_account_id, Account.current_balance))).all()
+    assert [tuple(row) for row in accounts] == [("checking", 100.0)]
+
+@pytest.mark.asyncio
+async def test_sync_restarts_when_item_changes_during_pagination(db_session: AsyncSession, plaid_server: FakePlaidServer, monkeypatch):
+    monkeypatch.setattr(settings, "PLAID_SYNC_PAGE_SIZE", 1)
+    await link_item(db_session, 1, "item-1", ["checking"])
+    plaid_server.add_item("access-item-1", "item-1")
+    plaid_server.add("access-item-1", [plaid_transaction(f"t{i}", "checking", "SHOP", 1.0 + i, "2024-02-01") for i in range(3)])
+    plaid_server.fail_next_with = SYNC_MUTATION_ERROR
+
+    counts = await AccountService(db_session, PlaidClient(host=plaid_server.url)).sync_item("item-1")
+    assert counts["inserted"] == 3
+    assert [request.get("cursor") for request in plaid_server.requests] == [None, "1", None, "1", "2"]
+
+@pytest.mark.asyncio
+async def test_sync_user_items_fetches_items_concurrently(db_session: AsyncSession, plaid_server: FakePlaidServer):
+    # 4 items (8 accounts) at 0.5s per request; the item whose token Plaid rejects must not block the others
+    plaid_server.latency = 0.5
+    for i in range(4):
+        await link_item(db_session, 1, f"item-{i}", [f"acc-{i}-a", f"acc-{i}-b"])
+        if i < 3:
+            plaid_server.add_item(f"access-item-{i}", f"item-{i}")
+            plaid_server.add(f"access-item-{i}", [plaid_transaction(f"t{i}", f"acc-{i}-b", "SHOP", 10.0, "2024-03-01")])
+    await link_item(db_session, 2, "item-other-user", ["acc-other"])
+
+    start = time.perf_counter()
+    results = await AccountService(db_session, PlaidClient(host=plaid_server.url)).sync_user_items(1, max_concurrency=4)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.5 # One request per item (not per account), all in flight together; sequential would take 2s
+    assert len(plaid_server.requests) == 4
+    assert {item_id: result.get("inserted") for item_id, result in results.items()} == {
+        "item-0": 1, "item-1": 1, "item-2": 1, "item-3": None
+    }
+    assert "INVALID_ACCESS_TOKEN" in results["item-3"]["error"]
+    cursors = dict((await db_session.execute(select(PlaidItemCursor.plaid_item_id, PlaidItemCursor.cursor))).all())
+    assert cursors == {"item-0": "1", "item-1": "1", "item-2": "1"}
+
+@pytest.mark.asyncio
+async def test_sync_user_items_times_out_slow_items(db_session: AsyncSession, plaid_server: FakePlaidServer):
+    plaid_server.latency = 0.5
+    await link_item(db_session, 1, "item-slow", ["acc-slow"])
+    plaid_server.add_item("access-item-slow", "item-slow")
+
+    results = await AccountService(db_session, PlaidClient(host=plaid_server.url)).sync_user_items(1, item_timeout=0.1)
+    assert results == {"item-slow": {"error": "timed out after 0.1s"}}
+    assert (await db_session.scalar(select(PlaidItemCursor.cursor))) is None
+
+@pytest.mark.asyncio
+async def test_timed_out_item_frees_its_client_thread(db_session: AsyncSession, plaid_server: FakePlaidServer):
+    plaid_server.latency = 1.0
+    await link_item(db_session, 1, "item-slow", ["acc-slow"])
+    plaid_server.add_item("access-item-slow", "item-slow")
+    client = PlaidClient(host=plaid_server.url, pool_size=1)
+
+    results = await AccountService(db_session, client).sync_user_items(1, item_timeout=0.2)
+    assert results == {"item-slow": {"error": "timed out after 0.2s"}}
+    # The request carried the timeout, so the only pool thread is free again well before Plaid answers
+    start = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(client._executor, lambda: None)
+    assert time.perf_counter() - start < 0.5
+    assert await AccountService(db_session).get_linked_user_ids() == [1]
@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.src.db.session import Base
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.db.models.recurring_charge_state import RecurringChargeState
+from backend.src.services.data_ingestion_service import DataIngestionService
+from backend.src.services.rollup_service import RollupService
+
+@pytest.fixture(name="db_session")
+async def create_db_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+def plaid_transaction(transaction_id: str, name: str, amount: float, date: str) -> dict:
+    return {"transaction_id": transaction_id, "name": name, "amount": amount, "date": date,
+            "personal_finance_category": {"primary": "ENTERTAINMENT"}}
+
+@pytest.mark.asyncio
+async def test_ingestion_updates_recurring_charge_states(db_session: AsyncSession):
+    service = DataIngestionService(db_session)
+    await service.ingest_transactions_from_plaid(1, 1, [
+        plaid_transaction("t1", "SPOTIFY USA", 9.99, "2024-01-10"),
+        plaid_transaction("t2", "SPOTIFY USA", 9.99, "2024-02-10"),
+        plaid_transaction("t3", "PAYCHECK", -1500.0, "2024-02-01"),
+    ])
+    assert await service.get_recurring_charges(1) == []
+
+    # A later page only loads and updates the state of the merchants it contains
+    await service.ingest_transactions_from_plaid(1, 1, [plaid_transaction("t4", "Spotify USA", 9.99, "2024-03-10")])
+
+    states = (await db_session.execute(select(RecurringChargeState))).scalars().all()
+    assert [(s.merchant, s.state["count"]) for s in states] == [("spotify usa", 3)]
+    charges = await service.get_recurring_charges(1)
+    assert charges == [{"merchant": "spotify usa", "is_recurring": True, "cadence": "monthly",
+                        "expected_amount": 9.99, "next_expected_date": charges[0]["next_expected_date"]}]
+    assert charges[0]["next_expected_date"].startswith("2024-04-0")
+
+@pytest.mark.asyncio
+async def test_bulk_ingestion_dedupes_updates_and_removes(db_session: AsyncSession):
+    service = DataIngestionService(db_session)
+    page = [plaid_transaction(f"t{i}", "CINEMA", 10.0 + i, "2024-01-10") for i in range(5)]
+    assert await service.ingest_plaid_changes(1, 1, page, batch_size=2) == {"inserted": 5, "updated": 0, "removed": 0, "skipped": 0}
+
+    # A re-delivered page writes nothing
+    assert await service.ingest_transactions_from_plaid(1, 1, page) == {"inserted": 0, "updated": 0, "removed": 0, "skipped": 5}
+
+    # User corrections survive modifications, even ones carrying a Plaid category
+    corrected = (await db_session.execute(select(Transaction).where(Transaction.plaid_transaction_id == "t1"))).scalar_one()
+    corrected.category, corrected.category_source = "Movies", "user"
+    await db_session.commit()
+    await RollupService(db_session).rebuild([1]) # Keep the rollup in line with the direct edit
+    await db_session.commit()
+    modified = [plaid_transaction("t1", "CINEMA", 25.0, "2024-01-11")]
+    added = [plaid_transaction("t9", "CINEMA", 4.0, "2024-01-12"), {"transaction_id": "t8", "name": "MYSTERY", "amount": 3.0, "date": "2024-01-12"},
+             {"transaction_id": "bad", "name": "x", "amount": None, "date": "2024-01-12"}]
+    removed = [{"transaction_id": "t2"}, {"transaction_id": "t3"}, {"transaction_id": "never-seen"}]
+    counts = await service.ingest_plaid_changes(1, 1, added, modified, removed, batch_size=2)
+    assert counts == {"inserted": 2, "updated": 1, "removed": 2, "skipped": 2}
+
+    db_session.expire_all() # Core upserts bypass the identity map
+    rows = (await db_session.execute(select(Transaction).order_by(Transaction.plaid_transaction_id))).scalars().all()
+    assert [(tx.plaid_transaction_id, tx.amount, tx.category, tx.category_source) for tx in rows] == [
+        ("t0", 10.0, "ENTERTAINMENT", "plaid"), ("t1", 25.0, "Movies", "user"), ("t4", 14.0, "ENTERTAINMENT", "plaid"),
+        ("t8", 3.0, "Uncategorized", "model"), ("t9", 4.0, "ENTERTAINMENT", "plaid")
+    ]
+    assert rows[1].updated_at is not None
+
+    # The rollup matches a full rebuild after the update and removals
+    rollup_service = RollupService(db_session)
+    incremental = (await rollup_service.load(user_ids=[1])).sort_values(['date', 'category']).reset_index(drop=True)
+    await rollup_service.rebuild()
+    rebuilt = (await rollup_service.load(user_ids=[1])).sort_values(['date', 'category']).reset_index(drop=True)
+    assert incremental.values.tolist() == rebuilt.values.tolist()
+    assert incremental[['category', 'amount', 'count']].values.tolist() == [
+        ['ENTERTAINMENT', 24.0, 2], ['Movies', 25.0, 1], ['ENTERTAINMENT', 4.0, 1], ['Uncategorized', 3.0, 1]
+    ]
+
+@pytest.mark.asyncio
+async def test_stream_ingestion_commits_fixed_size_batches(db_session: AsyncSession):
+    service = DataIngestionService(db_session)
+    commits = []
+    commit = db_session.commit
+
+    async def counting_commit():
+        commits.append(len((await db_session.execute(select(Transaction.id))).all()))
+        await commit()
+    db_session.commit = counting_commit
+
+    pages = ([plaid_transaction(f"p{i}-{j}", "GROCER", 5.0, f"2024-0{i + 1}-1{j}") for j in range(3)] for i in range(4))
+    counts = await service.ingest_plaid_stream(1, 1, pages, batch_size=5)
+    assert counts == {"inserted": 12, "updated": 0, "removed": 0, "skipped": 0}
+    assert commits == [5, 10, 12]
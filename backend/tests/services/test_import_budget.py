@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+HEAVY_MODULES = ["numpy", "pandas", "sklearn", "statsmodels", "pyarrow", "joblib"]
+IMPORT_BUDGET_SECONDS = 5.0
+
+def _import_in_subprocess(module: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    env = dict(os.environ, SECRET_KEY="x", PLAID_CLIENT_ID="x", PLAID_SECRET="x")
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+@pytest.mark.parametrize("module", [
+    "backend.src.services.data_ingestion_service",
+    "backend.src.services.inference_executor",
+    "backend.src.services.automation_service",
+    "backend.src.tasks.ml_training",
+    "backend.src.tasks.account_sync",
+    "backend.src.tasks.notification_tasks",
+])
+def test_entry_points_do_not_import_ml_stack(module):
+    report = _import_in_subprocess(module)
+    assert report["loaded"] == []
+    assert report["elapsed"] < IMPORT_BUDGET_SECONDS
+
+def test_lazy_module_loads_on_first_use():
+    from backend.src.core.lazy_imports import lazy_import
+    pd = lazy_import("pandas")
+    frame = pd.DataFrame({"amount": [1.0, 2.0]})
+    assert isinstance(frame, pd.DataFrame)
+    assert frame["amount"].sum() == 3.0
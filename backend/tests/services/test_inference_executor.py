@@ -0,0 +1,70 @@
+import asyncio
+import pandas as pd
+import pytest
+from backend.src.ml_engine.model_registry import ModelRegistry
+from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer, CATEGORIZER_MODEL_NAME
+from backend.src.services import inference_executor as executor_module
+from backend.src.services.inference_executor import InferenceExecutor
+
+@pytest.fixture(name="executor")
+async def create_executor(tmp_path, monkeypatch):
+    categorizer = TransactionCategorizer()
+    categorizer.train(pd.DataFrame({
+        'description': ['STARBUCKS COFFEE', 'LOCAL CAFE', 'UBER TRIP', 'NYC TRANSIT MTA'],
+        'category': ['Coffee', 'Coffee', 'Transportation', 'Transportation'],
+    }))
+    ModelRegistry(str(tmp_path)).register(CATEGORIZER_MODEL_NAME, *categorizer.to_artifacts())
+    # Spawned workers read their settings from the environment
+    monkeypatch.setenv("MODEL_REGISTRY_DIR", str(tmp_path))
+
+    executor = InferenceExecutor(max_workers=2, batch_window=0.05)
+    await executor.start()
+    yield executor
+    await executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_concurrent_categorize_calls_are_micro_batched(executor: InferenceExecutor):
+    batches = []
+    run = executor._run
+    async def recording_run(fn, *args):
+        if fn is executor_module._categorize_batch:
+            batches.append(args[0])
+        return await run(fn, *args)
+    executor._run = recording_run
+
+    descriptions = ['STARBUCKS #12', 'UBER *TRIP', 'Local Cafe'] * 4
+    results = await asyncio.gather(*(executor.categorize(d) for d in descriptions))
+
+    assert results == ['Coffee', 'Transportation', 'Coffee'] * 4
+    assert len(batches) == 1 and len(batches[0]) == 12
+    assert await executor.categorize_many(['MTA TRANSIT']) == ['Transportation']
+
+@pytest.mark.asyncio
+async def test_forecast_and_segments_run_in_workers(executor: InferenceExecutor):
+    dates = pd.date_range('2024-01-01', periods=60, freq='D')
+    transactions = [{'user_id': 1, 'date': d.isoformat(), 'amount': 20.0, 'type': 'debit'} for d in dates]
+    forecasts = await executor.forecast_cash_flows(transactions, steps=7)
+    assert len(forecasts[1]) == 7
+    assert await executor.assign_segments([{'user_id': 1, 'category': 'Coffee', 'amount': 5.0}]) == {}
+
+@pytest.mark.asyncio
+async def test_shutdown_completes_pending_batches(executor: InferenceExecutor):
+    calls = [asyncio.ensure_future(executor.categorize(d)) for d in ['STARBUCKS #12', 'UBER *TRIP']]
+    await asyncio.sleep(0) # Queued in the batch window, not yet sent to a worker
+    await executor.shutdown()
+    assert await asyncio.gather(*calls) == ['Coffee', 'Transportation']
+
+@pytest.mark.asyncio
+async def test_cancelled_batch_cancels_its_callers(executor: InferenceExecutor):
+    async def hanging_run(fn, *args):
+        await asyncio.Event().wait()
+    executor._run = hanging_run
+
+    call = asyncio.ensure_future(executor.categorize('STARBUCKS #12'))
+    await asyncio.sleep(0)
+    executor._flush()
+    for batch in list(executor._batches):
+        batch.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert not executor._batches
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from plaid.model.transactions_sync_request import TransactionsSyncRequest
+from backend.src.db.session import Base
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.services.plaid_client import PlaidClient
+from backend.src.services.plaid_webhook_handler import PlaidWebhookHandler
+from backend.tests.services.fake_plaid_server import FakePlaidServer, plaid_account
+
+@pytest.fixture(name="plaid_server")
+def create_plaid_server():
+    server = FakePlaidServer().start()
+    server.add_item("access-1", "item-1")
+    yield server
+    server.stop()
+
+@pytest.mark.asyncio
+async def test_client_reuses_keep_alive_connections(plaid_server: FakePlaidServer):
+    client = PlaidClient(host=plaid_server.url, pool_size=2)
+    try:
+        for _ in range(5):
+            page = await client.transactions_sync(TransactionsSyncRequest(access_token="access-1"))
+            assert page["has_more"] is False
+        assert len(plaid_server.connections) == 1
+    finally:
+        client.close()
+
+@pytest.mark.asyncio
+async def test_calls_do_not_block_the_event_loop(plaid_server: FakePlaidServer):
+    plaid_server.latency = 0.3
+    client = PlaidClient(host=plaid_server.url, pool_size=4)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client.transactions_sync(TransactionsSyncRequest(access_token="access-1")) for _ in range(4)))
+        elapsed = time.perf_counter() - start
+    finally:
+        ticking.cancel()
+        client.close()
+    assert elapsed < 1.0 # The 4 calls overlap on the client's own thread pool
+    assert ticks > 10 # The loop kept running while Plaid was "slow"
+
+@pytest.mark.asyncio
+async def test_webhook_handler_uses_shared_client(plaid_server: FakePlaidServer):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    plaid_server.add_item("access-public-abc1", "item-public-abc1", [plaid_account("checking"), plaid_account("card", "Card", "credit")])
+    client = PlaidClient(host=plaid_server.url)
+    try:
+        async with async_session() as session:
+            await PlaidWebhookHandler(session, client).exchange_public_token("public-abc1", user_id=1)
+            accounts = (await session.execute(select(Account).order_by(Account.id))).scalars().all()
+            assert [(a.plaid_account_id, a.type) for a in accounts] == [("checking", "depository"), ("card", "credit")]
+            assert {(a.plaid_item_id, a.access_token) for a in accounts} == {("item-public-abc1", "access-public-abc1")}
+    finally:
+        client.close()
+        await engine.dispose()
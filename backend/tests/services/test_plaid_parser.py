@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from backend.src.services.plaid_parser import PARSED_COLUMNS, PlaidTransactionParser
+
+def plaid_page(start: int, size: int) -> list:
+    return [{"transaction_id": f"t{i}", "name": f"SHOP {i}", "amount": float(i), "date": "2024-01-15",
+             "personal_finance_category": {"primary": "GENERAL_MERCHANDISE"}} for i in range(start, start + size)]
+
+def test_parse_page_normalizes_columns():
+    parser = PlaidTransactionParser()
+    parsed = parser.parse_page([
+        {"transaction_id": "a", "name": "Payroll", "amount": -1200, "date": "2024-03-01", "category": ["Transfer", "Payroll"]},
+        {"transaction_id": "b", "name": "", "amount": 4.5, "date": "2024-03-02", "personal_finance_category": {"primary": "FOOD"}},
+        {"transaction_id": "c", "name": "Shop", "amount": 9, "date": "2024-03-03", "personal_finance_category": None},
+        {"transaction_id": "d", "name": "Broken", "amount": None, "date": "2024-03-03"},
+        {"transaction_id": "e", "name": "Broken", "amount": 1, "date": "03/03/2024"},
+        {"name": "No id", "amount": 1, "date": "2024-03-03"},
+    ])
+    assert list(parsed.columns) == PARSED_COLUMNS
+    assert parsed['plaid_transaction_id'].tolist() == ["a", "b", "c"]
+    assert parsed['description'].tolist() == ["Payroll", "N/A", "Shop"]
+    assert parsed['amount'].tolist() == [-1200.0, 4.5, 9.0]
+    assert parsed['category'].tolist() == ["Transfer", "FOOD", None]
+    assert parsed['type'].tolist() == ["credit", "debit", "debit"]
+    assert parsed['date'].tolist() == list(pd.to_datetime(["2024-03-01", "2024-03-02", "2024-03-03"], utc=True))
+    assert parser.skipped == 3
+
+def test_batches_are_fixed_size_and_lazy():
+    consumed = []
+
+    def pages():
+        for start in range(0, 25, 7):
+            consumed.append(start)
+            yield plaid_page(start, min(7, 25 - start))
+
+    parser = PlaidTransactionParser(batch_size=10)
+    batches = parser.batches(pages())
+    first = next(batches)
+    assert len(first) == 10 and consumed == [0, 7] # Only the pages needed for the first batch were read
+    rest = list(batches)
+    assert [len(batch) for batch in rest] == [10, 5]
+    assert pd.concat([first, *rest])['plaid_transaction_id'].tolist() == [f"t{i}" for i in range(25)]
+
+@pytest.mark.asyncio
+async def test_async_batches():
+    async def pages():
+        for start in (0, 4, 8):
+            yield plaid_page(start, 4)
+
+    parser = PlaidTransactionParser(batch_size=5)
+    assert [len(batch) async for batch in parser.abatches(pages())] == [5, 5, 2]
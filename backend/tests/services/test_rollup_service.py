@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.src.db.session import Base
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.ml_engine.budget_optimizer import BudgetOptimizer
+from backend.src.services.data_ingestion_service import DataIngestionService
+from backend.src.services.rollup_service import RollupService, utc_day_column
+
+@pytest.fixture(name="db_session")
+async def create_db_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+def plaid_transaction(transaction_id: str, name: str, amount: float, date: str, category: str) -> dict:
+    return {"transaction_id": transaction_id, "name": name, "amount": amount, "date": date,
+            "personal_finance_category": {"primary": category}}
+
+@pytest.mark.asyncio
+async def test_ingestion_accumulates_daily_rollup(db_session: AsyncSession):
+    service = DataIngestionService(db_session)
+    await service.ingest_transactions_from_plaid(1, 1, [
+        plaid_transaction("t1", "Whole Foods", 50.0, "2024-01-10", "FOOD"),
+        plaid_transaction("t2", "Trader Joes", 30.0, "2024-01-10", "FOOD"),
+        plaid_transaction("t3", "Payroll", -2000.0, "2024-01-10", "INCOME"),
+    ])
+    await service.ingest_transactions_from_plaid(1, 1, [
+        plaid_transaction("t4", "Safeway", 20.0, "2024-01-10", "FOOD"),
+        plaid_transaction("t5", "Safeway", 40.0, "2024-01-11", "FOOD"),
+    ])
+
+    rollup = await RollupService(db_session).load(user_ids=[1])
+    rollup = rollup.sort_values(['date', 'category']).reset_index(drop=True)
+    assert rollup[['category', 'type', 'amount', 'count']].values.tolist() == [
+        ['FOOD', 'debit', 100.0, 3], ['INCOME', 'credit', -2000.0, 1], ['FOOD', 'debit', 40.0, 1]
+    ]
+
+    # Per-transaction averages are preserved when models read pre-aggregated rows
+    budgets = pd.DataFrame({'user_id': [1], 'category': ['FOOD'], 'amount': [100.0]})
+    suggestions = BudgetOptimizer().optimize_budgets(rollup, budgets)
+    assert suggestions.loc[0, 'avg_spent'] == 35.0
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_transactions(db_session: AsyncSession):
+    db_session.add_all([
+        Transaction(user_id=1, account_id=1, description="A", amount=10.0, date=datetime(2024, 1, 1, 9), category=None, type="debit"),
+        Transaction(user_id=1, account_id=1, description="B", amount=5.0, date=datetime(2024, 1, 1, 18), category=None, type="debit"),
+        Transaction(user_id=2, account_id=2, description="C", amount=7.0, date=datetime(2024, 1, 2), category="Fun", type="debit"),
+    ])
+    await db_session.commit()
+
+    rollup_service = RollupService(db_session)
+    await rollup_service.rebuild()
+    await db_session.commit()
+
+    rollup = (await rollup_service.load(start=datetime(2024, 1, 1).date())).sort_values('user_id')
+    assert rollup[['user_id', 'category', 'amount', 'count']].values.tolist() == [[1, 'Uncategorized', 15.0, 2], [2, 'Fun', 7.0, 1]]
+    assert list(rollup['date'].dt.day) == [1, 2]
+
+def test_days_are_grouped_in_utc_on_postgresql():
+    # Ingestion buckets batches by UTC date, so a rebuild must not follow the session's TimeZone
+    day = utc_day_column("postgresql")
+    sql = str(select(day).group_by(day).compile(dialect=postgresql.dialect()))
+    assert sql.count("date(timezone('UTC', transactions.date))") == 2
+    assert "timezone" not in str(select(utc_day_column("sqlite")))
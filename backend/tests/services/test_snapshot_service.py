@@ -0,0 +1,77 @@
+import os
+import pytest
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from backend.src.db.session import Base
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.services.snapshot_service import TransactionSnapshotExporter, read_transaction_snapshot, utc_month_columns
+
+@pytest.fixture(name="db_session")
+async def create_db_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+def transaction(description: str, date: datetime, category: str = None, source: str = None) -> Transaction:
+    return Transaction(user_id=1, account_id=1, description=description, amount=10.0, date=date, category=category,
+                       category_source=source, type="debit")
+
+@pytest.mark.asyncio
+async def test_export_writes_only_new_or_changed_months(db_session: AsyncSession, tmp_path):
+    db_session.add_all([
+        transaction("Coffee", datetime(2024, 1, 5), "Coffee", "plaid"),
+        transaction("Groceries", datetime(2024, 1, 31, 23), "Groceries", "model"),
+        transaction("Unknown", datetime(2024, 2, 1)),
+    ])
+    await db_session.commit()
+
+    exporter = TransactionSnapshotExporter(db_session, str(tmp_path), chunk_size=1)
+    assert await exporter.export() == ["2024-01", "2024-02"]
+    assert await exporter.export() == []
+    assert os.path.exists(tmp_path / "month=2024-01" / "part.parquet")
+
+    db_session.add(transaction("Cinema", datetime(2024, 3, 2), "Fun", "user"))
+    await db_session.commit()
+    assert await exporter.export() == ["2024-03"]
+
+    full = read_transaction_snapshot(str(tmp_path))
+    assert len(full) == 4
+    assert str(full['user_id'].dtype) == 'int32'
+    assert str(full['category'].dtype) == 'category'
+
+    labeled = read_transaction_snapshot(str(tmp_path), ['description', 'category'], labeled_only=True)
+    assert list(labeled.columns) == ['description', 'category']
+    assert sorted(labeled['description']) == ['Cinema', 'Coffee', 'Groceries']
+
+    trusted = read_transaction_snapshot(str(tmp_path), ['description'], labeled_only=True, trusted_only=True)
+    assert sorted(trusted['description']) == ['Cinema', 'Coffee'] # The categorizer's own prediction is left out
+
+    checkpoint = full['labeled_at'].max()
+    assert read_transaction_snapshot(str(tmp_path), labeled_after=checkpoint).empty
+
+def test_months_are_grouped_in_utc_on_postgresql():
+    # Partitions are written and pruned with UTC bounds, so the grouping must not follow the session's TimeZone
+    year, month = utc_month_columns("postgresql")
+    sql = str(select(year, month).group_by(year, month).compile(dialect=postgresql.dialect()))
+    assert sql.count("timezone('UTC', transactions.date)") == 4
+    assert "timezone" not in str(select(*utc_month_columns("sqlite")))
+
+def test_read_without_snapshot_is_empty(tmp_path):
+    assert read_transaction_snapshot(str(tmp_path), ['description']).empty
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from backend.src.db.session import Base
+from backend.src.db.models.user import User
+from backend.src.db.models.account import Account
+from backend.src.db.models.transaction import Transaction
+from backend.src.db.models.budget import Budget
+from backend.src.db.models.saving import Saving
+from backend.src.db.models.investment import Investment
+from backend.src.db.models.goal import Goal
+from backend.src.core.config import settings
+from backend.src.ml_engine.model_registry import ModelRegistry
+from backend.src.ml_engine.transaction_categorizer import TransactionCategorizer, CATEGORIZER_MODEL_NAME, UNCATEGORIZED
+from backend.src.tasks import ml_training
+
+FIRST_LABEL_TIME = datetime(2024, 2, 1, 12)
+NEW_LABEL_TIME = datetime(2024, 3, 1, 12)
+
+@pytest.fixture(name="add_transactions")
+def create_training_environment(tmp_path, monkeypatch):
+    # The tasks run their own event loop, so connections must not be pooled across asyncio.run calls
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'fingenius.db'}", poolclass=NullPool)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False)
+    monkeypatch.setattr(ml_training, "async_session_factory", session_factory)
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(settings, "MODEL_REGISTRY_DIR", str(tmp_path / "models"))
+
+    async def _create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    asyncio.run(_create_all())
+
+    def add_transactions(rows, labeled_at: datetime):
+        async def _add():
+            async with session_factory() as session:
+                session.add_all([
+                    Transaction(user_id=1, account_id=1, description=description, amount=10.0, date=datetime(2024, 1, 15),
+                                category=category, category_source=source, type="debit", created_at=labeled_at)
+                    for description, category, source in rows
+                ])
+                await session.commit()
+        asyncio.run(_add())
+
+    yield add_transactions
+    asyncio.run(engine.dispose())
+
+def seed_labels(add_transactions):
+    add_transactions([
+        ("STARBUCKS 1234", "Coffee", "plaid"),
+        ("WHOLE FOODS MARKET", "Groceries", "plaid"),
+        ("NETFLIX.COM", "Subscriptions", "user"),
+        # The categorizer's own output: its predictions and the placeholder for what it could not categorize
+        ("ACME DINER", "Dining Out", "model"),
+        ("MYSTERY MERCHANT", UNCATEGORIZED, "model"),
+    ], FIRST_LABEL_TIME)
+
+def add_new_labels(add_transactions):
+    add_transactions([("TRADER JOES", "Groceries", "user")], NEW_LABEL_TIME)
+    add_transactions([("CORNER SHOP", UNCATEGORIZED, "model")], datetime(2024, 3, 2, 12))
+
+def load_categorizer():
+    artifacts, metadata = ModelRegistry(settings.MODEL_REGISTRY_DIR).load(CATEGORIZER_MODEL_NAME, mmap_mode=None)
+    return TransactionCategorizer.from_artifacts(artifacts, metadata)
+
+def test_categorizer_trains_only_on_trusted_labels(add_transactions):
+    seed_labels(add_transactions)
+    ml_training.export_transaction_snapshot_task()
+    ml_training.train_transaction_categorizer_task()
+    assert list(load_categorizer().label_encoder.classes_) == ["Coffee", "Groceries", "Subscriptions"]
+
+    # The incremental update consumes the user's new label but not the later model-labeled row
+    add_new_labels(add_transactions)
+    ml_training.export_transaction_snapshot_task()
+    ml_training.train_transaction_categorizer_task()
+    categorizer = load_categorizer()
+    assert list(categorizer.label_encoder.classes_) == ["Coffee", "Groceries", "Subscriptions"]
+    assert categorizer.checkpoint.replace(tzinfo=None) == NEW_LABEL_TIME
+
+def test_streaming_categorizer_trains_only_on_trusted_labels(add_transactions):
+    seed_labels(add_transactions)
+    ml_training.train_transaction_categorizer_task(streaming=True, chunk_size=2)
+    categorizer = load_categorizer()
+    assert list(categorizer.label_encoder.classes_) == ["Coffee", "Groceries", "Subscriptions"]
+    assert categorizer.checkpoint == FIRST_LABEL_TIME
+
+    add_new_labels(add_transactions)
+    ml_training.train_transaction_categorizer_task(streaming=True, chunk_size=2)
+    categorizer = load_categorizer()
+    assert list(categorizer.label_encoder.classes_) == ["Coffee", "Groceries", "Subscriptions"]
+    assert categorizer.checkpoint == NEW_LABEL_TIME